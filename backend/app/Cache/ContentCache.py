@@ -0,0 +1,115 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from Common import metrics
+
+
+class ContentCache:
+    """Byte-bounded on-disk blob store with LRU eviction.
+
+    One file per key (keys must be filesystem-safe). The LRU index lives in
+    memory and is rebuilt from file access times on startup, so the bound
+    survives restarts. ``max_bytes`` caps the total size of stored files;
+    ``path`` hands back a file path so callers can stream it with sendfile.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, name: str = "content") -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.name = name
+        self._lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_atime, entry.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._total += size
+        self._evict()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def path(self, key: str) -> Optional[str]:
+        """Path of the cached blob (marking it recently used), or None on a miss."""
+        with self._lock:
+            if key not in self._sizes:
+                metrics.incr(f"cache.{self.name}.misses")
+                return None
+            self._sizes.move_to_end(key)
+        path = self._file(key)
+        if not os.path.exists(path):
+            self.delete(key)
+            metrics.incr(f"cache.{self.name}.misses")
+            return None
+        metrics.incr(f"cache.{self.name}.hits")
+        return path
+
+    def contains(self, key: str) -> bool:
+        """Membership check that neither touches recency nor counts as a hit/miss."""
+        with self._lock:
+            return key in self._sizes
+
+    def put(self, key: str, data: bytes) -> str:
+        if len(data) > self.max_bytes:
+            raise ValueError(f"{key} is larger than the cache ({len(data)} bytes)")
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, self._file(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._total -= self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            self._total += len(data)
+            self._evict()
+        return self._file(key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._total -= self._sizes.pop(key, 0)
+            self._publish()
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total
+
+    def _evict(self) -> None:
+        # Caller holds the lock.
+        while self._total > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self._total -= size
+            metrics.incr(f"cache.{self.name}.evictions")
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"cache.{self.name}.bytes", self._total)
+        metrics.set_gauge(f"cache.{self.name}.entries", len(self._sizes))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sizes)
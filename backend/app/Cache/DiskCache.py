@@ -0,0 +1,118 @@
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+from Common import Codec, metrics
+
+# The directory is swept after this many writes per process.
+_SWEEP_EVERY = 256
+# Temp files older than this are left over from a crashed writer.
+_STALE_TMP_SECONDS = 3600
+
+
+class DiskCache:
+    """JSON-file cache tier: one file per key, expiry stored alongside the value.
+
+    Keys must be filesystem-safe strings (e.g. hex digests). Values must be
+    JSON-serializable. Writes go through a temp file + rename so concurrent
+    readers never see a partial entry. Every _SWEEP_EVERY writes the
+    directory is swept: expired entries go, then the oldest-written ones
+    until at most ``max_entries`` remain.
+    """
+
+    def __init__(
+        self, directory: str, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None
+    ) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as handle:
+                entry = Codec.loads(handle.read())
+        except (OSError, ValueError):
+            return default
+        expires_at = entry.get("expires_at") if isinstance(entry, dict) else None
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return default
+        return entry.get("value", default)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        entry = {
+            "expires_at": time.time() + ttl if ttl is not None else None,
+            "value": value,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(Codec.dumps_bytes(entry))
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            self.sweep()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                self.delete(name[: -len(".json")])
+
+    def sweep(self) -> int:
+        """Delete expired entries, then the oldest beyond ``max_entries``; returns how many went."""
+        now = time.time()
+        live = []
+        removed = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.name.endswith(".tmp"):
+                    if entry.stat().st_mtime < now - _STALE_TMP_SECONDS:
+                        os.remove(entry.path)
+                    continue
+                if not entry.name.endswith(".json"):
+                    continue
+                with open(entry.path, "rb") as handle:
+                    stored = Codec.loads(handle.read())
+                expires_at = stored.get("expires_at") if isinstance(stored, dict) else now
+                if expires_at is not None and expires_at <= now:
+                    os.remove(entry.path)
+                    removed += 1
+                    continue
+                live.append((entry.stat().st_mtime, entry.path))
+            except (OSError, ValueError):
+                continue  # Raced with another writer or sweeper; next sweep sees it.
+        if self.max_entries is not None and len(live) > self.max_entries:
+            live.sort()
+            for _, path in live[: len(live) - self.max_entries]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        if removed:
+            metrics.incr("cache.disk.swept", removed)
+        return removed
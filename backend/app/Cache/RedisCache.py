@@ -0,0 +1,164 @@
+import socket
+import threading
+import time
+from typing import Any, List, Optional, Union
+from urllib.parse import urlparse
+
+from Common import Codec
+
+# After a connection failure the tier is skipped (every call a miss) for this long.
+_RETRY_AFTER_SECONDS = 5.0
+
+_Reply = Union[None, int, bytes, str, List[Any]]
+
+
+class RedisError(RuntimeError):
+    """An error reply from the server (``-ERR ...``)."""
+
+
+class _Connection:
+    """One socket speaking RESP2; just enough of the protocol for a cache."""
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+
+    def command(self, *args: Union[str, bytes, int]) -> _Reply:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> _Reply:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("connection closed by server")
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"unexpected reply type: {kind!r}")
+
+    def close(self) -> None:
+        try:
+            self._reader.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class RedisCache:
+    """Cache tier on a Redis-protocol server shared by every worker and host.
+
+    Works with Redis, Valkey, KeyDB or the local stand-in
+    (``backend/redis_standin.py``). Keys are ``<namespace>:<key>``; values
+    are JSON-serializable and expire server-side. Connections are kept per
+    thread. When the server is unreachable every call is a miss for a few
+    seconds, so an outage degrades to recomputing instead of failing requests.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        namespace: str,
+        ttl_seconds: Optional[float] = None,
+        timeout: float = 1.0,
+    ) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"invalid_redis_url: expected redis://host:port/db, got {url!r}")
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.username = parsed.username or None
+        self.password = parsed.password or None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _connection(self) -> _Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = _Connection(self.host, self.port, self.timeout)
+            try:
+                if self.password:
+                    if self.username:
+                        connection.command("AUTH", self.username, self.password)
+                    else:
+                        connection.command("AUTH", self.password)
+                if self.db:
+                    connection.command("SELECT", self.db)
+            except Exception:
+                connection.close()
+                raise
+            self._local.connection = connection
+        return connection
+
+    def _command(self, *args: Union[str, bytes, int]) -> _Reply:
+        """Run one command; None on connection trouble (the caller treats it as a miss)."""
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return self._connection().command(*args)
+        except (OSError, ConnectionError, RedisError) as exc:
+            connection = getattr(self._local, "connection", None)
+            if connection is not None:
+                connection.close()
+                self._local.connection = None
+            if not isinstance(exc, RedisError):
+                self._down_until = time.monotonic() + _RETRY_AFTER_SECONDS
+            print(f"[RedisCache] {self.namespace} {args[0]} failed: {exc}")
+            return None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        data = self._command("GET", self._key(key))
+        if not isinstance(data, bytes):
+            return default
+        try:
+            return Codec.loads(data)
+        except ValueError:
+            return default
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        args: List[Union[str, bytes, int]] = ["SET", self._key(key), Codec.dumps_bytes(value)]
+        if ttl is not None:
+            args += ["PX", max(1, int(ttl * 1000))]
+        self._command(*args)
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", self._key(key))
+
+    def clear(self) -> None:
+        cursor = "0"
+        while True:
+            reply = self._command("SCAN", cursor, "MATCH", f"{self.namespace}:*", "COUNT", 500)
+            if not isinstance(reply, list) or len(reply) != 2:
+                return
+            cursor, keys = reply[0].decode("utf-8"), reply[1]
+            if keys:
+                self._command("DEL", *keys)
+            if cursor == "0":
+                return
@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from Common import Codec
+
+# Expired rows are swept after this many writes per process.
+_PRUNE_EVERY = 256
+
+
+class SQLiteCache:
+    """Cache tier shared by every worker process on a host via one SQLite file.
+
+    The database runs in WAL mode so readers never block the writer. Each
+    instance is one namespace in a shared table, so all caches can live in a
+    single file. Values must be JSON-serializable. Like DiskCache, database
+    errors are logged and treated as misses rather than failing the request.
+    """
+
+    def __init__(self, path: str, namespace: str, ttl_seconds: Optional[float] = None) -> None:
+        self.path = path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+        # Fail fast (as OSError/sqlite3.Error) if the file can't be opened.
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires_at REAL, PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (expires_at)")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        except sqlite3.Error as exc:
+            print(f"[SQLiteCache] {self.namespace} read failed: {exc}")
+            return default
+        if row is None:
+            return default
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return default
+        try:
+            return Codec.loads(value)
+        except ValueError:
+            return default
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.time() + ttl if ttl is not None else None
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (self.namespace, key, Codec.dumps_bytes(value), expires_at),
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                connection.execute(
+                    "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                    (time.time(),),
+                )
+        except sqlite3.Error as exc:
+            print(f"[SQLiteCache] {self.namespace} write failed: {exc}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connection().execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+        except sqlite3.Error as exc:
+            print(f"[SQLiteCache] {self.namespace} delete failed: {exc}")
+
+    def clear(self) -> None:
+        try:
+            self._connection().execute(
+                "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error as exc:
+            print(f"[SQLiteCache] {self.namespace} clear failed: {exc}")
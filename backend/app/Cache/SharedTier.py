@@ -0,0 +1,45 @@
+import os
+import sqlite3
+from typing import Optional, Union
+
+from .DiskCache import DiskCache
+from .RedisCache import RedisCache
+from .SQLiteCache import SQLiteCache
+
+# Where caches and sessions live beyond the process: "disk" (JSON files per cache directory,
+# the default), "sqlite" (one WAL database shared by the workers on a host), "redis" (any
+# Redis-protocol server, shared across hosts) or "memory" (per-process only).
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "disk").lower()
+CACHE_SQLITE_PATH = os.getenv(
+    "CACHE_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "shared.sqlite3"),
+)
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
+# Entries kept per disk cache directory; the oldest-written go first.
+CACHE_DISK_MAX_ENTRIES = int(os.getenv("CACHE_DISK_MAX_ENTRIES", "20000"))
+CACHE_BACKENDS = ("disk", "sqlite", "redis", "memory")
+
+SharedTier = Union[DiskCache, SQLiteCache, RedisCache]
+
+
+def shared_tier(
+    namespace: str, ttl_seconds: Optional[float], directory: Optional[str] = None
+) -> Optional[SharedTier]:
+    """The tier behind a cache's in-process LRU, per CACHE_BACKEND; None means memory only.
+
+    The disk backend only applies to caches with a ``directory``; sqlite and
+    redis cover every namespace, sessions included.
+    """
+    if CACHE_BACKEND not in CACHE_BACKENDS:
+        raise ValueError(f"invalid_cache_backend: {CACHE_BACKEND!r} (expected one of {CACHE_BACKENDS})")
+    try:
+        if CACHE_BACKEND == "sqlite":
+            os.makedirs(os.path.dirname(CACHE_SQLITE_PATH) or ".", exist_ok=True)
+            return SQLiteCache(CACHE_SQLITE_PATH, namespace, ttl_seconds=ttl_seconds)
+        if CACHE_BACKEND == "redis":
+            return RedisCache(CACHE_REDIS_URL, namespace, ttl_seconds=ttl_seconds)
+        if CACHE_BACKEND == "disk" and directory:
+            return DiskCache(directory, ttl_seconds=ttl_seconds, max_entries=CACHE_DISK_MAX_ENTRIES)
+    except (OSError, sqlite3.Error) as exc:
+        print(f"[Cache] {namespace} shared tier unavailable: {exc}")
+    return None
@@ -0,0 +1,102 @@
+import hashlib
+import time
+from typing import Any, Optional, Tuple
+
+from Common import metrics
+
+from .LRUCache import LRUCache
+from .SharedTier import SharedTier, shared_tier
+
+
+class TieredCache:
+    """Memory LRU in front of an optional shared tier, with entry ages.
+
+    The shared tier is picked by CACHE_BACKEND (see ``shared_tier``): JSON
+    files under ``directory``, a SQLite file or a Redis server, so worker
+    processes see each other's entries. Keys are arbitrary strings (hashed
+    for the shared tier). Each entry records when it was stored so
+    background refreshers can renew it before it expires. The shared tier is
+    created lazily and skipped if unavailable.
+
+    ``cache_locally=False`` skips the memory tier whenever a shared tier
+    exists, for mutable entries (sessions) where a stale per-process copy
+    would be wrong. ``shared=False`` keeps the cache in this process only,
+    whatever CACHE_BACKEND says.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl_seconds: float,
+        directory: Optional[str] = None,
+        cache_locally: bool = True,
+        shared: bool = True,
+    ) -> None:
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self.cache_locally = cache_locally
+        self._memory = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._shared: Optional[SharedTier] = None
+        self._shared_checked = not shared
+
+    def _shared_tier(self) -> Optional[SharedTier]:
+        if not self._shared_checked:
+            self._shared = shared_tier(self.name, self.ttl_seconds, self.directory)
+            self._shared_checked = True
+        return self._shared
+
+    def _use_memory(self) -> bool:
+        return self.cache_locally or self._shared_tier() is None
+
+    @staticmethod
+    def _shared_key(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """``(value, age_seconds)`` or None on a miss."""
+        use_memory = self._use_memory()
+        entry = self._memory.get(key) if use_memory else None
+        if entry is None:
+            shared = self._shared_tier()
+            entry = shared.get(self._shared_key(key)) if shared is not None else None
+            if isinstance(entry, dict) and "stored_at" in entry and "value" in entry:
+                if use_memory:
+                    ttl = entry.get("ttl", self.ttl_seconds)
+                    remaining = ttl - (time.time() - entry["stored_at"])
+                    self._memory.set(key, entry, ttl_seconds=max(remaining, 0))
+            else:
+                entry = None
+        if entry is None:
+            metrics.incr(f"cache.{self.name}.misses")
+            return None
+        metrics.incr(f"cache.{self.name}.hits")
+        return entry["value"], max(0.0, time.time() - entry["stored_at"])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a JSON-serializable value in both tiers, optionally with its own TTL."""
+        entry = {"stored_at": time.time(), "value": value}
+        if ttl_seconds is not None:
+            entry["ttl"] = ttl_seconds
+        if self._use_memory():
+            self._memory.set(key, entry, ttl_seconds=ttl_seconds)
+        shared = self._shared_tier()
+        if shared is not None:
+            shared.set(self._shared_key(key), entry, ttl_seconds=ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self._memory.delete(key)
+        shared = self._shared_tier()
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def clear(self) -> None:
+        self._memory.clear()
+        shared = self._shared_tier()
+        if shared is not None:
+            shared.clear()
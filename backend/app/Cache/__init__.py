@@ -0,0 +1,7 @@
+from .LRUCache import LRUCache
+from .DiskCache import DiskCache
+from .ContentCache import ContentCache
+from .SQLiteCache import SQLiteCache
+from .RedisCache import RedisCache
+from .SharedTier import CACHE_BACKEND, shared_tier
+from .TieredCache import TieredCache
@@ -0,0 +1,78 @@
+import hashlib
+import hmac
+import os
+import re
+from typing import Any, Optional
+
+# Keyed so captured ids can't be matched back to live session ids or headers.
+# Workers that should agree on ids (gunicorn) need a shared CAPTURE_SALT.
+_SALT = os.getenv("CAPTURE_SALT", "").encode("utf-8") or os.urandom(16)
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_URL = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+# Runs of digits and separators long enough to be a phone or card number.
+_NUMBER_RUN = re.compile(r"\+?\(?\d[\d\s().-]{6,}\d")
+_DATE = re.compile(r"\b\d{4}-\d{1,2}-\d{1,2}\b|\b\d{1,2}[./-]\d{1,2}[./-]\d{2,4}\b")
+
+
+def _scrub_number(match: "re.Match[str]") -> str:
+    candidate = match.group(0)
+    if sum(ch.isdigit() for ch in candidate) < 9 or _DATE.search(candidate):
+        return candidate  # budgets, years and travel dates stay intact
+    return "<number>"
+
+
+def scrub_text(text: str, urls: bool = True) -> str:
+    """Replace emails, phone/card-like numbers and (optionally) URLs with placeholders.
+
+    Idempotent: scrubbing already scrubbed text changes nothing, so keys
+    derived from scrubbed requests match again at replay time.
+    """
+    text = _EMAIL.sub("<email>", text)
+    if urls:
+        text = _URL.sub("<url>", text)
+    return _NUMBER_RUN.sub(_scrub_number, text)
+
+
+def scrub(value: Any) -> Any:
+    """``scrub_text`` applied to every string in a JSON value, URLs kept.
+
+    URLs are kept here because structured state (POI images) carries our own
+    proxy URLs, not user input.
+    """
+    if isinstance(value, str):
+        return scrub_text(value, urls=False)
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    if isinstance(value, dict):
+        return {key: scrub(item) for key, item in value.items()}
+    return value
+
+
+def anonymize_payload(payload: Any) -> Any:
+    """A /chat or /ws/chat request as it is safe to store.
+
+    The free-text message is fully scrubbed, state is scrubbed of contact
+    details, and a client session id is replaced by a keyed hash.
+    """
+    if not isinstance(payload, dict):
+        return scrub(payload)
+    cleaned = scrub({key: value for key, value in payload.items() if key != "message"})
+    if isinstance(payload.get("message"), str):
+        cleaned["message"] = scrub_text(payload["message"])
+    if payload.get("session_id"):
+        cleaned["session_id"] = pseudonym(str(payload["session_id"]))
+    return cleaned
+
+
+def pseudonym(raw_id: Optional[str] = None) -> str:
+    """Stable anonymous id for ``raw_id`` within this capture; random without one."""
+    if raw_id is None:
+        return os.urandom(8).hex()
+    return hmac.new(_SALT, raw_id.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+
+def request_key(site: str, request: str) -> str:
+    """Lookup key for an upstream request, computed from its scrubbed text."""
+    digest = hashlib.sha256(f"{site}\n{scrub_text(request)}".encode("utf-8"))
+    return digest.hexdigest()
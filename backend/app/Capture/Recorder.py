@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from Common import Codec, metrics
+
+from .Anonymizer import anonymize_payload, pseudonym, scrub_text
+
+# Opt-in traffic capture: anonymized chat turns and upstream responses, one
+# JSON object per line. Unset (the default) records nothing.
+CAPTURE_PATH = os.getenv("CAPTURE_PATH", "")
+
+_fd: Optional[int] = None
+_fd_lock = threading.Lock()
+
+
+def capture_enabled() -> bool:
+    return bool(CAPTURE_PATH)
+
+
+def record(entry: Dict[str, Any]) -> None:
+    """Append one entry to the capture file; failures are logged, never raised."""
+    global _fd
+    if not CAPTURE_PATH:
+        return
+    line = Codec.dumps_bytes({"ts": round(time.time(), 3), **entry}) + b"\n"
+    try:
+        with _fd_lock:
+            if _fd is None:
+                directory = os.path.dirname(os.path.abspath(CAPTURE_PATH))
+                os.makedirs(directory, exist_ok=True)
+                _fd = os.open(CAPTURE_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        # One write per line on an O_APPEND descriptor, so lines from several
+        # worker processes don't interleave.
+        os.write(_fd, line)
+        metrics.incr("capture.entries")
+    except OSError as exc:
+        metrics.incr("capture.errors")
+        print(f"[Capture] write to {CAPTURE_PATH} failed: {exc}")
+
+
+class TurnRecord:
+    """Times one chat turn and writes it, with its anonymized input, when finished."""
+
+    def __init__(self, transport: str, conversation: str, payload: Any) -> None:
+        self.transport = transport
+        self.conversation = conversation
+        self.request = anonymize_payload(payload)
+        self.frames: Dict[str, int] = {}
+        self._started = time.time()
+        self._finished = False
+
+    def frame(self, update: Dict[str, Any]) -> None:
+        kind = update.get("type", "unknown")
+        self.frames[kind] = self.frames.get(kind, 0) + 1
+
+    def finish(self, outcome: Optional[str] = None, detail: Optional[str] = None) -> None:
+        """Write the turn once; without ``outcome`` it is read from the frames sent."""
+        if self._finished:
+            return
+        self._finished = True
+        if outcome is None:
+            outcome = next(
+                (kind for kind in ("error", "cancelled") if self.frames.get(kind)),
+                "ok" if self.frames.get("done") else "incomplete",
+            )
+        entry = {
+            "type": "turn",
+            "conversation": self.conversation,
+            "transport": self.transport,
+            "started_at": round(self._started, 3),
+            "elapsed_ms": round((time.time() - self._started) * 1000, 1),
+            "outcome": outcome,
+            "frames": self.frames,
+            "request": self.request,
+        }
+        if detail:
+            entry["detail"] = scrub_text(detail)
+        record(entry)
+
+
+def start_turn(
+    transport: str, payload: Any, connection_id: Optional[str] = None
+) -> Optional[TurnRecord]:
+    """A ``TurnRecord`` for this turn, or None when capture is off.
+
+    Turns are grouped by the client's (pseudonymized) session id when it
+    sends one, else by ``connection_id``; a turn with neither stands alone,
+    which is fine since those clients upload their full state every turn.
+    """
+    if not CAPTURE_PATH:
+        return None
+    session_id = payload.get("session_id") if isinstance(payload, dict) else None
+    if session_id:
+        conversation = pseudonym(str(session_id))
+    else:
+        conversation = connection_id or pseudonym()
+    return TurnRecord(transport, conversation, payload)
+
+
+def _after_fork_in_child() -> None:
+    global _fd_lock
+    _fd_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
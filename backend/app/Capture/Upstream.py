@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from Common import (
+    CancelToken,
+    Codec,
+    DeadlineExceeded,
+    OperationCancelled,
+    check_cancelled,
+    metrics,
+    time_budget,
+)
+
+from .Anonymizer import request_key, scrub
+from .Recorder import capture_enabled, record
+
+# Replay mode: serve upstream calls from a capture file instead of the real
+# services, so captured traffic can be re-driven offline without API keys.
+UPSTREAM_REPLAY_PATH = os.getenv("UPSTREAM_REPLAY_PATH", "")
+# Recorded latencies are divided by this; 0 answers immediately.
+UPSTREAM_REPLAY_SPEED = float(os.getenv("UPSTREAM_REPLAY_SPEED", "1"))
+_STREAM_CHUNK_CHARS = 64
+
+
+class RecordedUpstreamError(RuntimeError):
+    """A stand-in replaying an upstream call that failed when it was captured."""
+
+
+class StandIns:
+    """Captured upstream responses, looked up by scrubbed request.
+
+    Repeated requests cycle through their recordings in order (an agent
+    retry gets the answer the retry got). A request that was never captured
+    gets another recording from the same site, so the load keeps its shape;
+    those are counted as ``replay.<site>.misses``.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_site: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        with open(path, "rb") as handle:
+            for line in handle:
+                try:
+                    entry = Codec.loads(line)
+                except Codec.DecodeError:
+                    continue
+                if isinstance(entry, dict) and entry.get("type") == "upstream":
+                    self._by_key.setdefault(entry["key"], []).append(entry)
+                    self._by_site.setdefault(entry["site"], []).append(entry)
+        count = sum(len(entries) for entries in self._by_site.values())
+        print(f"[Capture] replaying {count} upstream responses from {path}")
+
+    def has_site(self, site: str) -> bool:
+        return site in self._by_site
+
+    def lookup(self, site: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            entries, cursor = self._by_key.get(key), key
+            if entries:
+                metrics.incr(f"replay.{site}.hits")
+            else:
+                metrics.incr(f"replay.{site}.misses")
+                entries, cursor = self._by_site.get(site), site
+                if not entries:
+                    raise LookupError(f"no_recorded_response: {site}")
+            position = self._cursors.get(cursor, 0)
+            self._cursors[cursor] = position + 1
+            return entries[position % len(entries)]
+
+
+_stand_ins: Optional[StandIns] = None
+_stand_ins_lock = threading.Lock()
+
+
+def replaying() -> bool:
+    return bool(UPSTREAM_REPLAY_PATH)
+
+
+def get_stand_ins() -> StandIns:
+    global _stand_ins
+    with _stand_ins_lock:
+        if _stand_ins is None:
+            _stand_ins = StandIns(UPSTREAM_REPLAY_PATH)
+        return _stand_ins
+
+
+def has_recordings(site: str) -> bool:
+    """Whether replay mode can answer calls to ``site`` (e.g. without its API key)."""
+    return replaying() and get_stand_ins().has_site(site)
+
+
+def _pause(seconds: float, cancel_token: Optional[CancelToken]) -> None:
+    if UPSTREAM_REPLAY_SPEED <= 0 or seconds <= 0:
+        return
+    seconds = seconds / UPSTREAM_REPLAY_SPEED
+    if cancel_token is not None:
+        cancel_token.wait(time_budget(cancel_token, seconds))
+    else:
+        time.sleep(seconds)
+    check_cancelled(cancel_token)
+
+
+def _record_upstream(site: str, request: str, started: float, **fields: Any) -> None:
+    entry = {
+        "type": "upstream",
+        "site": site,
+        "key": request_key(site, request),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    for name, value in fields.items():
+        entry[name] = scrub(value)
+    record(entry)
+
+
+def recorded_call(
+    site: str,
+    request: str,
+    call: Callable[[], Any],
+    cancel_token: Optional[CancelToken] = None,
+) -> Any:
+    """Run an upstream call, recording it in capture mode or answering from the capture in replay mode.
+
+    ``request`` is the text that determines the answer (prompt, query); the
+    response must be JSON-serializable.
+    """
+    if replaying():
+        entry = get_stand_ins().lookup(site, request_key(site, request))
+        _pause(entry.get("elapsed_ms", 0) / 1000, cancel_token)
+        if "error" in entry:
+            raise RecordedUpstreamError(entry["error"])
+        return entry.get("response")
+    if not capture_enabled():
+        return call()
+    started = time.perf_counter()
+    try:
+        response = call()
+    except (OperationCancelled, DeadlineExceeded):
+        raise  # the turn's doing, not the upstream's
+    except Exception as exc:
+        _record_upstream(site, request, started, error=str(exc))
+        raise
+    _record_upstream(site, request, started, response=response)
+    return response
+
+
+def recorded_stream(
+    site: str,
+    request: str,
+    stream: Callable[[], Iterable[str]],
+    cancel_token: Optional[CancelToken] = None,
+) -> Iterator[str]:
+    """``recorded_call`` for streamed text; replay re-chunks it over the recorded duration.
+
+    Only streams that run to completion are recorded.
+    """
+    if replaying():
+        entry = get_stand_ins().lookup(site, request_key(site, request))
+        if "error" in entry:
+            _pause(entry.get("elapsed_ms", 0) / 1000, cancel_token)
+            raise RecordedUpstreamError(entry["error"])
+        text = entry.get("response") or ""
+        first_ms = entry.get("first_chunk_ms", entry.get("elapsed_ms", 0))
+        chunks = [text[idx:idx + _STREAM_CHUNK_CHARS]
+                  for idx in range(0, len(text), _STREAM_CHUNK_CHARS)]
+        gap_ms = max(entry.get("elapsed_ms", 0) - first_ms, 0) / max(len(chunks), 1)
+        _pause(first_ms / 1000, cancel_token)
+        for idx, chunk in enumerate(chunks):
+            if idx:
+                _pause(gap_ms / 1000, cancel_token)
+            yield chunk
+        return
+    if not capture_enabled():
+        yield from stream()
+        return
+    started = time.perf_counter()
+    first_chunk_ms = None
+    parts = []
+    try:
+        for chunk in stream():
+            if first_chunk_ms is None:
+                first_chunk_ms = round((time.perf_counter() - started) * 1000, 1)
+            parts.append(chunk)
+            yield chunk
+    except (OperationCancelled, DeadlineExceeded):
+        raise
+    except Exception as exc:
+        _record_upstream(site, request, started, error=str(exc))
+        raise
+    _record_upstream(site, request, started, response="".join(parts),
+                     first_chunk_ms=first_chunk_ms)
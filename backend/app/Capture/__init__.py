@@ -0,0 +1,11 @@
+from .Anonymizer import anonymize_payload, pseudonym, request_key, scrub, scrub_text
+from .Recorder import CAPTURE_PATH, TurnRecord, capture_enabled, record, start_turn
+from .Upstream import (
+    UPSTREAM_REPLAY_PATH,
+    RecordedUpstreamError,
+    StandIns,
+    has_recordings,
+    recorded_call,
+    recorded_stream,
+    replaying,
+)
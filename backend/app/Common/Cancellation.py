@@ -0,0 +1,108 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class OperationCancelled(Exception):
+    """Raised at a cancellation checkpoint once the turn's CancelToken is cancelled."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised at a checkpoint once the turn's deadline has passed."""
+
+
+class CancelToken:
+    """Cooperative cancellation shared by everything working on one turn.
+
+    Long-running steps call ``raise_if_cancelled`` between units of work;
+    blocking calls that can be interrupted (an open LLM stream, a rate-limit
+    queue wait) register ``on_cancel`` callbacks that break them out early.
+
+    The token also carries the turn's deadline. Running out of time doesn't
+    cancel anything by itself: stages bound their waits with ``remaining``
+    and the orchestrator decides what to drop.
+    """
+
+    def __init__(self, deadline_seconds: Optional[float] = None) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: Optional[str] = None
+        self.deadline: Optional[float] = None
+        if deadline_seconds is not None:
+            self.set_deadline(deadline_seconds)
+
+    def set_deadline(self, seconds: float) -> None:
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (never negative), or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def raise_if_expired(self) -> None:
+        if self.expired:
+            raise DeadlineExceeded("turn_deadline_exceeded")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                print(f"[CancelToken] cancel callback failed: {exc}")
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run ``callback`` on cancel (now, if already cancelled); returns an unregister function."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+        if not registered:
+            callback()
+
+        def unregister() -> None:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return unregister
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+
+def check_cancelled(token: Optional[CancelToken]) -> None:
+    """Checkpoint helper for code paths where the token is optional."""
+    if token is not None:
+        token.raise_if_cancelled()
+        token.raise_if_expired()
+
+
+def time_budget(token: Optional[CancelToken], limit: Optional[float] = None) -> Optional[float]:
+    """The smaller of ``limit`` and the time left on the token's deadline."""
+    remaining = token.remaining() if token is not None else None
+    if remaining is None:
+        return limit
+    if limit is None:
+        return remaining
+    return min(limit, remaining)
@@ -0,0 +1,192 @@
+import importlib.util
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from Common.Metrics import Metrics, metrics
+
+# Connection pool of the shared OpenAI client (per worker process).
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "16"))
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "90"))
+# HTTP/2 multiplexes concurrent calls over one connection; needs the optional h2 package.
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "1") == "1"
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+# How long a call may wait for a free pooled connection.
+OPENAI_POOL_TIMEOUT_SECONDS = float(os.getenv("OPENAI_POOL_TIMEOUT_SECONDS", "10"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+# Upper bound on any one Ollama call; turns stop waiting sooner at their deadline.
+OLLAMA_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_TIMEOUT_SECONDS", "120"))
+
+# Per call site: (read timeout seconds, max retries). Each site gets a view of
+# the shared client ("openai.<site>") with its own policy over the same pool.
+OPENAI_CALL_SITES = {
+    "poi": (
+        float(os.getenv("OPENAI_POI_TIMEOUT_SECONDS", "60")),
+        int(os.getenv("OPENAI_POI_MAX_RETRIES", "2")),
+    ),
+    "planner": (
+        float(os.getenv("OPENAI_PLANNER_TIMEOUT_SECONDS", "180")),
+        int(os.getenv("OPENAI_PLANNER_MAX_RETRIES", "1")),
+    ),
+}
+
+_factories: Dict[str, Callable[[], Any]] = {}
+_clients: Dict[str, Any] = {}
+# Re-entrant: a call-site factory builds on the shared client via get_client.
+_lock = threading.RLock()
+
+
+def register_client(name: str, factory: Callable[[], Any]) -> None:
+    """Declare how to build an upstream client; nothing is constructed until first use."""
+    with _lock:
+        _factories[name] = factory
+        _clients.pop(name, None)
+
+
+def get_client(name: str) -> Any:
+    """The process-wide client for ``name``, built on first call.
+
+    Construction (and the SDK import behind it) happens here rather than at
+    module import, so starting the app or importing a module never needs API
+    keys or pays for SDKs the request doesn't use.
+    """
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            factory = _factories.get(name)
+            if factory is None:
+                raise KeyError(f"unknown_client: {name}")
+            started = time.perf_counter()
+            client = factory()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metrics.set_gauge(f"clients.{name}.init_ms", round(elapsed_ms, 1))
+            print(f"[Clients] {name} client ready in {elapsed_ms:.0f} ms")
+            _clients[name] = client
+        return client
+
+
+def reset_clients() -> None:
+    """Drop built clients; the next ``get_client`` rebuilds them."""
+    with _lock:
+        _clients.clear()
+
+
+def _httpx_module(openai: Any) -> Any:
+    # The pool settings must come from the HTTP library the SDK is built on:
+    # httpx for openai 1.x, httpx2 for releases that export DefaultHttpx2Client.
+    if hasattr(openai, "DefaultHttpx2Client"):
+        import httpx2
+
+        return httpx2
+    import httpx
+
+    return httpx
+
+
+def _count_request(request: Any) -> None:
+    metrics.incr("clients.openai.requests")
+    # The SDK numbers its own retries on each attempt it sends.
+    if request.headers.get("x-stainless-retry-count", "0") not in ("", "0"):
+        metrics.incr("clients.openai.retries")
+
+
+def _openai_factory() -> Any:
+    import openai  # heavy import, deferred to first use
+
+    httpx = _httpx_module(openai)
+    http2 = OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+    http_client = openai.DefaultHttpxClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_SECONDS,
+        ),
+        event_hooks={"request": [_count_request]},
+    )
+    metrics.set_gauge("clients.openai.http2", int(http2))
+    metrics.set_gauge("clients.openai.pool.max_connections", OPENAI_MAX_CONNECTIONS)
+    return openai.OpenAI(  # reads OPENAI_API_KEY from env
+        http_client=http_client,
+        timeout=_openai_timeout(httpx, OPENAI_TIMEOUT_SECONDS),
+        max_retries=OPENAI_MAX_RETRIES,
+    )
+
+
+def _openai_timeout(httpx: Any, read_seconds: float) -> Any:
+    return httpx.Timeout(
+        read_seconds,
+        connect=OPENAI_CONNECT_TIMEOUT_SECONDS,
+        pool=OPENAI_POOL_TIMEOUT_SECONDS,
+    )
+
+
+def _openai_call_site_factory(site: str) -> Callable[[], Any]:
+    read_seconds, max_retries = OPENAI_CALL_SITES[site]
+
+    def factory() -> Any:
+        import openai
+
+        # with_options copies the client but keeps its http_client, so every
+        # call site shares one connection pool.
+        return get_client("openai").with_options(
+            timeout=_openai_timeout(_httpx_module(openai), read_seconds),
+            max_retries=max_retries,
+        )
+
+    return factory
+
+
+def _ollama_factory() -> Any:
+    import ollama  # deferred like openai
+
+    # Reads OLLAMA_HOST from env; one pooled connection set for every call.
+    return ollama.Client(timeout=OLLAMA_TIMEOUT_SECONDS)
+
+
+register_client("openai", _openai_factory)
+for _site in OPENAI_CALL_SITES:
+    register_client(f"openai.{_site}", _openai_call_site_factory(_site))
+register_client("ollama", _ollama_factory)
+
+
+def _collect_openai_pool(snapshot_metrics: Metrics) -> None:
+    """Sample the shared OpenAI client's connection pool into gauges."""
+    client = _clients.get("openai")
+    if client is None:
+        return
+    pool = getattr(getattr(client._client, "_transport", None), "_pool", None)
+    if pool is None:  # custom transport; nothing to sample
+        return
+    connections = list(pool.connections)
+    idle = sum(1 for connection in connections if connection.is_idle())
+    active = len(connections) - idle
+    queued = sum(1 for request in list(getattr(pool, "_requests", [])) if request.is_queued())
+    snapshot_metrics.set_gauge("clients.openai.pool.connections", len(connections))
+    snapshot_metrics.set_gauge("clients.openai.pool.active", active)
+    snapshot_metrics.set_gauge("clients.openai.pool.idle", idle)
+    snapshot_metrics.set_gauge("clients.openai.pool.queued", queued)
+    snapshot_metrics.set_gauge(
+        "clients.openai.pool.utilization", round(active / max(OPENAI_MAX_CONNECTIONS, 1), 3)
+    )
+
+
+metrics.add_collector(_collect_openai_pool)
+
+
+def _after_fork_in_child() -> None:
+    # A forked worker must not reuse the parent's pooled connections, and the
+    # lock may have been held by a parent thread that doesn't exist here.
+    global _lock
+    _lock = threading.RLock()
+    _clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
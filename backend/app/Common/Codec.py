@@ -0,0 +1,85 @@
+"""Process-wide JSON codec.
+
+Every layer encodes and decodes JSON through this module so the backend can
+be swapped in one place. ``orjson`` or ``msgspec`` are used when installed
+(``JSON_BACKEND`` forces one of ``orjson``, ``msgspec`` or ``stdlib``);
+otherwise the stdlib ``json`` module is used. Output is always compact UTF-8.
+"""
+
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None
+
+
+class DecodeError(ValueError):
+    """Raised for malformed JSON regardless of the active backend."""
+
+
+def _select_backend() -> str:
+    requested = os.getenv("JSON_BACKEND", "auto").lower()
+    available = {"orjson": orjson is not None, "msgspec": msgspec is not None, "stdlib": True}
+    if requested != "auto":
+        if not available.get(requested):
+            raise ValueError(f"JSON_BACKEND={requested} is not installed")
+        return requested
+    for name in ("orjson", "msgspec"):
+        if available[name]:
+            return name
+    return "stdlib"
+
+
+BACKEND = _select_backend()
+
+if BACKEND == "orjson":
+    _encode = orjson.dumps
+    _decode = orjson.loads
+    _decode_errors: tuple = (orjson.JSONDecodeError,)
+elif BACKEND == "msgspec":
+    _msgspec_encoder = msgspec.json.Encoder()
+    _encode = _msgspec_encoder.encode
+    _decode = msgspec.json.decode
+    _decode_errors = (msgspec.DecodeError,)
+else:
+    _stdlib_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def _encode(obj: Any) -> bytes:
+        return _stdlib_encoder.encode(obj).encode("utf-8")
+
+    _decode = json.loads
+    _decode_errors = (json.JSONDecodeError, UnicodeDecodeError)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encode straight to UTF-8 bytes (no intermediate str for the fast backends)."""
+    return _encode(obj)
+
+
+def dumps(obj: Any) -> str:
+    return _encode(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    try:
+        return _decode(data)
+    except _decode_errors as exc:
+        raise DecodeError(str(exc)) from exc
+    except TypeError as exc:
+        raise DecodeError(f"cannot decode {type(data).__name__}: {exc}") from exc
+
+
+def dumps_canonical(obj: Any) -> str:
+    """Deterministic encoding for hashing: sorted keys, ASCII, stdlib on every backend.
+
+    Cache keys derived from this stay stable when the fast backend changes.
+    """
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(",", ":"))
@@ -0,0 +1,54 @@
+import threading
+from typing import Callable, Dict, List, Union
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """Process-wide counters and gauges, exported as a flat dict by /metrics."""
+
+    def __init__(self) -> None:
+        self._counters: Dict[str, Number] = {}
+        self._gauges: Dict[str, Number] = {}
+        self._collectors: List[Callable[["Metrics"], None]] = []
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: Number = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counter(self, name: str) -> Number:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def set_gauge(self, name: str, value: Number) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_gauge(self, name: str, delta: Number) -> None:
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def add_collector(self, collector: Callable[["Metrics"], None]) -> None:
+        """Call ``collector(metrics)`` before each snapshot, for gauges sampled on demand."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict[str, Number]]:
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception as exc:
+                print(f"[Metrics] collector {getattr(collector, '__name__', collector)} failed: {exc}")
+        with self._lock:
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+
+
+metrics = Metrics()
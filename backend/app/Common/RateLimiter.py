@@ -0,0 +1,316 @@
+import itertools
+import os
+import threading
+import time
+from enum import Enum
+from typing import Dict, List, Optional
+
+from Common.Cancellation import CancelToken, OperationCancelled, time_budget
+from Common.Metrics import metrics
+
+
+class RequestPriority(Enum):
+    """Lower value is served first; PREFETCH is shed first under pressure."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    PREFETCH = 2
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised when a request is shed or its queue deadline passes."""
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float) -> None:
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+            self._updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate_per_second
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        # Positive delta refunds, negative charges; debt is allowed so an
+        # underestimated request delays the next ones instead of being lost.
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class _Waiter:
+    def __init__(self, priority: RequestPriority, seq: int, tokens: float, deadline: float) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.deadline = deadline
+        self.shed = False
+
+    def sort_key(self) -> tuple:
+        return (self.priority.value, self.seq)
+
+
+class Permit:
+    """Held while an upstream call is in flight; feeds latency/429 back to AIMD."""
+
+    def __init__(self, limiter: "UpstreamLimiter", tokens: float) -> None:
+        self._limiter = limiter
+        self._tokens = tokens
+        self._started = time.monotonic()
+
+    def record_tokens(self, actual_tokens: Optional[int]) -> None:
+        """Correct the token-per-minute bucket with the real usage reported upstream."""
+        if actual_tokens is None or self._limiter._tpm_bucket is None:
+            return
+        with self._limiter._cond:
+            self._limiter._tpm_bucket.adjust(self._tokens - actual_tokens)
+            self._tokens = actual_tokens
+
+    def __enter__(self) -> "Permit":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        latency = time.monotonic() - self._started
+        self._limiter._release(
+            latency, throttled=_is_throttled(exc),
+            # An aborted call says nothing about upstream health.
+            cancelled=isinstance(exc, OperationCancelled),
+        )
+        return False
+
+
+class UpstreamLimiter:
+    """Token-bucket rate limit plus AIMD-adjusted concurrency for one upstream.
+
+    Requests queue in (priority, arrival) order until a concurrency slot and
+    enough request/token budget are available, or until their deadline passes.
+    When the queue is full the lowest-priority, newest waiter is shed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float,
+        burst: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        latency_target_seconds: Optional[float] = None,
+        max_queue: int = 64,
+        queue_timeout_seconds: float = 30.0,
+    ) -> None:
+        self.name = name
+        self._request_bucket = TokenBucket(requests_per_second, burst or max(1.0, requests_per_second))
+        self._tpm_bucket = (
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute) if tokens_per_minute else None
+        )
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.latency_target_seconds = latency_target_seconds
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._in_flight = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(
+        self,
+        priority: RequestPriority = RequestPriority.INTERACTIVE,
+        tokens: float = 0,
+        timeout: Optional[float] = None,
+        cancel_token: Optional[CancelToken] = None,
+    ) -> Permit:
+        timeout = timeout if timeout is not None else self.queue_timeout_seconds
+        # Never queue past the turn's own deadline.
+        deadline = time.monotonic() + time_budget(cancel_token, timeout)
+        unregister = cancel_token.on_cancel(self._wake) if cancel_token is not None else None
+        with self._cond:
+            waiter = _Waiter(priority, next(self._seq), tokens, deadline)
+            try:
+                self._enqueue(waiter)
+                while True:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        metrics.incr(f"ratelimit.{self.name}.cancelled")
+                        raise OperationCancelled(cancel_token.reason)
+                    if waiter.shed:
+                        metrics.incr(f"ratelimit.{self.name}.shed.{priority.name.lower()}")
+                        raise RateLimitExceeded(f"rate_limit_shed: {self.name} queue is full")
+                    now = time.monotonic()
+                    wait = self._try_grant(waiter, now)
+                    if wait is None:
+                        break
+                    remaining = waiter.deadline - now
+                    if remaining <= 0:
+                        metrics.incr(f"ratelimit.{self.name}.deadline_exceeded")
+                        raise RateLimitExceeded(
+                            f"rate_limit_timeout: {self.name} queue deadline exceeded")
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    self._cond.notify_all()
+                self._publish()
+                if unregister is not None:
+                    unregister()
+        metrics.incr(f"ratelimit.{self.name}.granted")
+        return Permit(self, tokens)
+
+    def _wake(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        if len(self._waiters) >= self.max_queue:
+            worst = max(self._waiters, key=_Waiter.sort_key)
+            if worst.sort_key() < waiter.sort_key():
+                metrics.incr(f"ratelimit.{self.name}.shed.{waiter.priority.name.lower()}")
+                raise RateLimitExceeded(f"rate_limit_shed: {self.name} queue is full")
+            worst.shed = True
+            self._waiters.remove(worst)
+            self._cond.notify_all()
+        self._waiters.append(waiter)
+
+    def _try_grant(self, waiter: _Waiter, now: float) -> Optional[float]:
+        """Grant the slot if ``waiter`` is next in line; otherwise return how long to wait."""
+        head = min(self._waiters, key=_Waiter.sort_key)
+        if head is not waiter:
+            return waiter.deadline - now
+        if self._in_flight >= int(self.concurrency_limit):
+            return waiter.deadline - now
+        wait = self._request_bucket.time_until(1, now)
+        if self._tpm_bucket is not None and waiter.tokens:
+            wait = max(wait, self._tpm_bucket.time_until(waiter.tokens, now))
+        if wait > 0:
+            return wait
+        self._request_bucket.consume(1, now)
+        if self._tpm_bucket is not None and waiter.tokens:
+            self._tpm_bucket.consume(waiter.tokens, now)
+        self._in_flight += 1
+        return None
+
+    def _release(self, latency: float, throttled: bool, cancelled: bool = False) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if cancelled:
+                self._publish()
+                self._cond.notify_all()
+                return
+            slow = (
+                self.latency_target_seconds is not None
+                and latency > self.latency_target_seconds
+            )
+            if throttled or slow:
+                # Multiplicative decrease on 429s or latency above target.
+                self.concurrency_limit = max(float(self.min_concurrency), self.concurrency_limit / 2)
+                metrics.incr(f"ratelimit.{self.name}.{'throttled' if throttled else 'slow'}")
+            else:
+                # Additive increase of roughly one slot per full window of successes.
+                self.concurrency_limit = min(
+                    float(self.max_concurrency),
+                    self.concurrency_limit + 1.0 / max(self.concurrency_limit, 1.0),
+                )
+            self._publish()
+            self._cond.notify_all()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"ratelimit.{self.name}.in_flight", self._in_flight)
+        metrics.set_gauge(f"ratelimit.{self.name}.queue_depth", len(self._waiters))
+        metrics.set_gauge(f"ratelimit.{self.name}.concurrency_limit", round(self.concurrency_limit, 2))
+
+
+def _is_throttled(exc: Optional[BaseException]) -> bool:
+    if exc is None:
+        return False
+    # openai.RateLimitError exposes status_code, urllib's HTTPError exposes code.
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    return status == 429
+
+
+def estimate_tokens(*texts: str, completion_tokens: int = 0) -> int:
+    """Rough OpenAI token estimate (~4 characters per token) for TPM budgeting."""
+    return sum(len(text) for text in texts) // 4 + completion_tokens
+
+
+# name -> (requests/s, burst, tokens/min, max concurrency, latency target s)
+_DEFAULTS: Dict[str, tuple] = {
+    "openai": (5.0, 10.0, 30000.0, 8, 60.0),
+    # Flickr allows 3600 queries/hour per key.
+    "flickr": (1.0, 10.0, None, 4, 5.0),
+    # Static photo CDN behind /images; not counted against the API quota.
+    "flickr_static": (20.0, 40.0, None, 8, 10.0),
+    "google": (10.0, 20.0, None, 8, 5.0),
+    # Budget for the background warmer, on top of the upstream limiters.
+    "warmer": (0.2, 2.0, None, 1, None),
+}
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    return float(raw)
+
+
+def get_limiter(name: str) -> UpstreamLimiter:
+    """Return the process-wide limiter for an upstream, configured from env.
+
+    Overrides: RATE_LIMIT_<NAME>_RPS, _BURST, _TPM, _MAX_CONCURRENCY,
+    _LATENCY_TARGET_SECONDS, _MAX_QUEUE, _QUEUE_TIMEOUT_SECONDS.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            rps, burst, tpm, max_concurrency, latency_target = _DEFAULTS.get(
+                name, (5.0, 10.0, None, 8, None))
+            prefix = f"RATE_LIMIT_{name.upper()}_"
+            limiter = UpstreamLimiter(
+                name,
+                requests_per_second=_env_float(prefix + "RPS", rps),
+                burst=_env_float(prefix + "BURST", burst),
+                tokens_per_minute=_env_float(prefix + "TPM", tpm),
+                max_concurrency=int(_env_float(prefix + "MAX_CONCURRENCY", max_concurrency)),
+                latency_target_seconds=_env_float(prefix + "LATENCY_TARGET_SECONDS", latency_target),
+                max_queue=int(_env_float(prefix + "MAX_QUEUE", 64)),
+                queue_timeout_seconds=_env_float(prefix + "QUEUE_TIMEOUT_SECONDS", 30.0),
+            )
+            _limiters[name] = limiter
+        return limiter
+
+
+def split_rate_limits(parts: int) -> None:
+    """Give this process 1/``parts`` of every upstream's rate budget.
+
+    For process pools sharing one set of API keys: each process has its own
+    limiters, so unsplit they would together send ``parts`` times the quota.
+    Call before the first ``get_limiter``; explicit env overrides are split too.
+    """
+    if parts <= 1:
+        return
+    for name, (rps, burst, tpm, _, _) in _DEFAULTS.items():
+        prefix = f"RATE_LIMIT_{name.upper()}_"
+        for suffix, default, minimum in (("RPS", rps, None), ("BURST", burst, 1.0), ("TPM", tpm, None)):
+            value = _env_float(prefix + suffix, default)
+            if value is None:
+                continue
+            shared = value / parts
+            if minimum is not None:
+                shared = max(shared, minimum)
+            os.environ[prefix + suffix] = str(shared)
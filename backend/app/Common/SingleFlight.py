@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from Common.Cancellation import CancelToken, DeadlineExceeded, OperationCancelled, time_budget
+from Common.Metrics import metrics
+from Common.RateLimiter import RateLimitExceeded
+
+# Upper bound on how long a follower waits for the leader's upstream call.
+SINGLEFLIGHT_TIMEOUT_SECONDS = float(os.getenv("SINGLEFLIGHT_TIMEOUT_SECONDS", "180"))
+# How often a waiting follower checks its own cancel token.
+_CANCEL_POLL_SECONDS = 0.2
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # The leader failed for reasons of its own (cancelled, out of time,
+        # shed at its priority), not because of the request itself.
+        self.leader_gave_up = False
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream call.
+
+    The first caller for a key (the leader) runs ``fn``; callers arriving while
+    it is in flight wait for the leader and receive the same result, or the
+    same exception. Nothing is cached once the call completes.
+
+    Counters (under ``singleflight.<name>.*``): ``calls`` is every request,
+    ``executed`` the upstream calls actually made, ``shared`` the calls saved,
+    ``retried`` followers that took over from a leader that gave up.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        timeout: Optional[float] = None,
+        cancel_token: Optional[CancelToken] = None,
+    ) -> Any:
+        """Run ``fn`` once per in-flight ``key``.
+
+        ``timeout`` only bounds how long a follower waits for the leader; it
+        raises ``TimeoutError`` without affecting the leader or other waiters.
+        A follower whose ``cancel_token`` fires stops waiting. If instead the
+        leader gave up on its own account (cancelled, past its deadline, or
+        shed by the rate limiter at its priority), a still-live follower
+        retries as the new leader under its own token rather than inheriting
+        that failure. Followers also stop waiting at the token's deadline.
+        """
+        timeout = time_budget(cancel_token, timeout)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            metrics.incr(f"singleflight.{self.name}.calls")
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None:
+                    leader = False
+                else:
+                    call = _Call()
+                    self._calls[key] = call
+                    leader = True
+
+            if leader:
+                break
+
+            self._wait(call, deadline, timeout, cancel_token)
+            if call.leader_gave_up:
+                if isinstance(call.error, OperationCancelled):
+                    metrics.incr(f"singleflight.{self.name}.leader_cancelled")
+                metrics.incr(f"singleflight.{self.name}.retried")
+                continue
+            # Only now was a call actually saved; a retry above makes its own.
+            metrics.incr(f"singleflight.{self.name}.shared")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.incr(f"singleflight.{self.name}.executed")
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            call.leader_gave_up = isinstance(
+                exc, (OperationCancelled, DeadlineExceeded, RateLimitExceeded)
+            ) or (cancel_token is not None and (cancel_token.cancelled or cancel_token.expired))
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def _wait(
+        self,
+        call: _Call,
+        deadline: Optional[float],
+        timeout: Optional[float],
+        cancel_token: Optional[CancelToken],
+    ) -> None:
+        while True:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                metrics.incr(f"singleflight.{self.name}.timeouts")
+                raise TimeoutError(
+                    f"singleflight_timeout: {self.name} call did not finish in {timeout}s")
+            if cancel_token is None:
+                if call.done.wait(remaining):
+                    return
+                continue
+            wait = _CANCEL_POLL_SECONDS if remaining is None else min(remaining, _CANCEL_POLL_SECONDS)
+            if call.done.wait(wait):
+                return
+            cancel_token.raise_if_cancelled()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,18 @@
+from . import Codec
+from .Cancellation import (
+    CancelToken,
+    DeadlineExceeded,
+    OperationCancelled,
+    check_cancelled,
+    time_budget,
+)
+from .Clients import OPENAI_CALL_SITES, get_client, register_client, reset_clients
+from .Metrics import metrics
+from .RateLimiter import (
+    RateLimitExceeded,
+    RequestPriority,
+    estimate_tokens,
+    get_limiter,
+    split_rate_limits,
+)
+from .SingleFlight import SINGLEFLIGHT_TIMEOUT_SECONDS, SingleFlight
@@ -0,0 +1,352 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from Cache import TieredCache
+from Common import CancelToken, metrics
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "64"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_RETAINED = int(os.getenv("JOB_MAX_RETAINED", "1000"))
+# How often readers on another worker poll the shared tier for new frames,
+# and how often the owning worker checks it for cancel requests.
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.25"))
+JOB_CANCEL_POLL_SECONDS = float(os.getenv("JOB_CANCEL_POLL_SECONDS", "1"))
+JOB_STATE_DIR = os.getenv(
+    "JOB_STATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "jobs"),
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+_FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised by submit when JOB_MAX_PENDING jobs are already waiting."""
+
+
+class JobStore:
+    """Job status and frames in the shared cache tier, so any worker can serve a job.
+
+    Uses whatever CACHE_BACKEND picks (a directory shared by the workers on a
+    host, SQLite, or Redis across hosts); with ``memory`` only the worker
+    running a job can answer for it. Each frame is its own entry, so
+    publishing one never rewrites the others.
+    """
+
+    def __init__(self, retention_seconds: float, max_entries: int) -> None:
+        self._cache = TieredCache(
+            "jobs", max_entries=max_entries, ttl_seconds=retention_seconds,
+            directory=JOB_STATE_DIR, cache_locally=False,
+        )
+
+    def save_status(self, job_id: str, status: Dict[str, Any]) -> None:
+        self._cache.set(f"{job_id}:status", status)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        status = self._cache.get(f"{job_id}:status")
+        return status if isinstance(status, dict) else None
+
+    def save_update(self, job_id: str, index: int, update: Dict[str, Any]) -> None:
+        self._cache.set(f"{job_id}:{index}", update)
+
+    def updates(self, job_id: str, start: int, end: int) -> List[Dict[str, Any]]:
+        updates = []
+        for index in range(start, end):
+            update = self._cache.get(f"{job_id}:{index}")
+            if update is None:
+                break
+            updates.append(update)
+        return updates
+
+    def request_cancel(self, job_id: str) -> None:
+        self._cache.set(f"{job_id}:cancel", True)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return self._cache.get(f"{job_id}:cancel") is True
+
+
+class Job:
+    """One pipeline run: its progress frames, final result and status.
+
+    Frames are appended by the worker and never removed, so any number of
+    readers can replay them from any position (``updates_since``) while the
+    job is running or after it finished. ``target`` gets the job's cancel
+    token; ``cancel`` fires it, or skips the job if it hasn't started.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[CancelToken], Iterable[Dict[str, Any]]],
+        finalize: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+        store: Optional[JobStore] = None,
+    ) -> None:
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.updates: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.cancel_token = CancelToken()
+        self._target = target
+        self._finalize = finalize
+        self._store = store
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def publish(self, update: Dict[str, Any]) -> None:
+        with self._cond:
+            self.updates.append(update)
+            index = len(self.updates) - 1
+            self._cond.notify_all()
+        if self._store is not None:
+            self._store.save_update(self.id, index, update)
+            self._save()
+
+    def cancel(self) -> None:
+        self.cancel_token.cancel("job_cancelled")
+        with self._cond:
+            if self.status != QUEUED:
+                return
+            self._finish(None, "cancelled", CANCELLED)
+
+    def _finish(self, result: Optional[Dict[str, Any]], error: Optional[str], status: str) -> None:
+        # Caller holds _cond; the store is written before local readers wake,
+        # so a reader that saw the job finish here finds it finished anywhere.
+        self.result = result
+        self.error = error
+        self.status = status
+        self.finished_at = time.time()
+        self._save()
+        self._cond.notify_all()
+        metrics.incr(f"jobs.{status}")
+
+    def _save(self) -> None:
+        if self._store is not None:
+            self._store.save_status(self.id, self.to_dict())
+
+    def updates_since(
+        self, cursor: int, timeout: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Frames from ``cursor`` on, waiting up to ``timeout`` for new ones; also returns finished."""
+        with self._cond:
+            if timeout is not None:
+                self._cond.wait_for(
+                    lambda: len(self.updates) > cursor or self.finished, timeout=timeout)
+            return self.updates[cursor:], self.finished
+
+    def run(self) -> None:
+        with self._cond:
+            if self.finished:
+                return  # Cancelled while queued
+            self.status = RUNNING
+            self.started_at = time.time()
+        self._save()
+        try:
+            for update in self._target(self.cancel_token):
+                self.publish(update)
+            result = self._finalize(self.updates)
+            error = result.get("error") if isinstance(result, dict) else None
+            if error:
+                result = None
+        except Exception as exc:
+            result, error = None, str(exc)
+        if self.cancel_token.cancelled:
+            status = CANCELLED
+        else:
+            status = FAILED if error else DONE
+        with self._cond:
+            self._finish(result, error, status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._cond:
+            data: Dict[str, Any] = {
+                "job_id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "update_count": len(self.updates),
+            }
+            if self.result is not None:
+                data["result"] = self.result
+            if self.error is not None:
+                data["error"] = self.error
+            return data
+
+
+class StoredJob:
+    """Read-only view of a job another worker is running, loaded from the JobStore."""
+
+    def __init__(self, store: JobStore, job_id: str, status: Dict[str, Any]) -> None:
+        self.id = job_id
+        self._store = store
+        self._status = status
+
+    @property
+    def status(self) -> str:
+        return self._status.get("status", QUEUED)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._status.get("error")
+
+    @property
+    def updates(self) -> List[Dict[str, Any]]:
+        return self._store.updates(self.id, 0, self._status.get("update_count", 0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._status)
+
+    def updates_since(
+        self, cursor: int, timeout: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Same contract as ``Job.updates_since``, polling the shared tier."""
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            self._status = self._store.status(self.id) or self._status
+            count = self._status.get("update_count", 0)
+            updates = self._store.updates(self.id, cursor, count)
+            if updates or self.finished or time.monotonic() >= deadline:
+                # Frames past retention read as missing; don't wait for them.
+                caught_up = not updates or cursor + len(updates) >= count
+                return updates, self.finished and caught_up
+            time.sleep(JOB_POLL_SECONDS)
+
+    def cancel(self) -> None:
+        # The owning worker notices within JOB_CANCEL_POLL_SECONDS.
+        self._store.request_cancel(self.id)
+
+
+class JobQueue:
+    """Job queue with a fixed worker pool in this process.
+
+    Finished jobs stay readable for ``retention_seconds`` (at most
+    ``max_retained`` of them) so clients that timed out or disconnected
+    can pick up the result. Status and frames are mirrored to the shared
+    cache tier (``JobStore``), so ``get`` and ``cancel`` work from any
+    worker process, not only the one that accepted the job.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_MAX_PENDING,
+        retention_seconds: float = JOB_RETENTION_SECONDS,
+        max_retained: int = JOB_MAX_RETAINED,
+    ) -> None:
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self._pending: "queue.Queue[Job]" = queue.Queue(maxsize=max_pending)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._store = JobStore(retention_seconds, max_entries=max(max_retained, 1) * 64)
+
+    def _ensure_workers(self) -> None:
+        # Caller holds _lock; workers start with the first job.
+        if not self._threads:
+            threading.Thread(target=self._watch_cancels, name="job-cancel-watch", daemon=True).start()
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(
+        self,
+        target: Callable[[CancelToken], Iterable[Dict[str, Any]]],
+        finalize: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+    ) -> Job:
+        job = Job(target, finalize, self._store)
+        with self._lock:
+            self._prune()
+            self._ensure_workers()
+            try:
+                self._pending.put_nowait(job)
+            except queue.Full:
+                metrics.incr("jobs.rejected")
+                raise JobQueueFull("job_queue_full: try again later")
+            self._jobs[job.id] = job
+        job._save()
+        metrics.incr("jobs.submitted")
+        metrics.set_gauge("jobs.pending", self._pending.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[Union[Job, StoredJob]]:
+        """The job, whichever worker runs it; None if unknown or past retention."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        status = self._store.status(job_id)
+        return StoredJob(self._store, job_id, status) if status is not None else None
+
+    def cancel(self, job_id: str) -> Optional[Union[Job, StoredJob]]:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel()
+        return job
+
+    def _watch_cancels(self) -> None:
+        # Cancel requests made through another worker arrive via the shared tier.
+        while True:
+            time.sleep(JOB_CANCEL_POLL_SECONDS)
+            with self._lock:
+                running = [job for job in self._jobs.values() if not job.finished]
+            for job in running:
+                if not job.cancel_token.cancelled and self._store.cancel_requested(job.id):
+                    job.cancel()
+
+    def _work(self) -> None:
+        while True:
+            job = self._pending.get()
+            metrics.set_gauge("jobs.pending", self._pending.qsize())
+            metrics.add_gauge("jobs.running", 1)
+            try:
+                job.run()
+            finally:
+                metrics.add_gauge("jobs.running", -1)
+
+    def _prune(self) -> None:
+        # Caller holds _lock. Only finished jobs are ever dropped.
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at,
+        )
+        excess = len(finished) - self.max_retained
+        for idx, job in enumerate(finished):
+            if idx < excess or now - job.finished_at > self.retention_seconds:
+                del self._jobs[job.id]
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
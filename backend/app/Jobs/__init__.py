@@ -0,0 +1 @@
+from .JobQueue import Job, JobQueueFull, StoredJob, get_job_queue
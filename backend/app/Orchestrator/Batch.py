@@ -0,0 +1,103 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait as wait_futures
+from typing import Any, Dict, Iterator, List, Tuple
+
+from Common import CancelToken, RequestPriority, metrics
+
+from .Orchestrator import analyze_intents_stream, collect_stream_result, turn_deadline_seconds
+
+# Workers shared by every /chat/batch request; each request also has its own cap.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="chat-batch")
+
+
+def parse_batch(payload: Any) -> Tuple[List[Any], int]:
+    """``(items, concurrency)`` from a /chat/batch body; ValueError if it's unusable.
+
+    Individual items are not checked here: a bad item fails on its own.
+    """
+    items = payload.get("items") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("items must be a non-empty list")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"too_many_items: max {BATCH_MAX_ITEMS}")
+    concurrency = payload.get("concurrency", BATCH_CONCURRENCY)
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        raise ValueError("invalid_concurrency: expected a positive integer")
+    return items, min(concurrency, BATCH_WORKERS)
+
+
+def _run_item(index: int, item: Any, cancel_token: CancelToken) -> Dict[str, Any]:
+    started = time.perf_counter()
+    entry: Dict[str, Any] = {"index": index}
+    try:
+        if not isinstance(item, dict):
+            raise ValueError("item must be an object")
+        if "id" in item:
+            entry["id"] = item["id"]
+        message = item.get("message")
+        if not isinstance(message, str) or not message:
+            raise ValueError("message is required")
+        updates = analyze_intents_stream(
+            message, item.get("pois"), item.get("requirements"), item.get("plan"),
+            cancel_token=cancel_token,
+            deadline_seconds=turn_deadline_seconds(item.get("deadline_seconds")),
+            priority=RequestPriority.BACKGROUND,
+        )
+        result = collect_stream_result(list(updates))
+    except Exception as exc:
+        result = {"error": str(exc)}
+    if "error" in result:
+        entry.update(status="error", error=result["error"])
+    else:
+        entry.update(status="ok", result=result)
+    entry["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    metrics.incr(f"batch.items.{entry['status']}")
+    return entry
+
+
+def run_batch(items: List[Any], concurrency: int = BATCH_CONCURRENCY) -> Iterator[Dict[str, Any]]:
+    """Run independent chat items, yielding each item's result as it finishes.
+
+    At most ``concurrency`` items of this batch run at once. Results carry
+    the item's ``index`` (and ``id`` if it had one); a failing item yields
+    ``status: "error"`` without affecting the others. Closing the iterator
+    (e.g. the client went away) cancels the items still queued or running.
+    """
+    pending: Dict[Future, CancelToken] = {}
+    upcoming = iter(enumerate(items))
+    exhausted = False
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    index, item = next(upcoming)
+                except StopIteration:
+                    exhausted = True
+                    break
+                cancel_token = CancelToken()
+                pending[_executor.submit(_run_item, index, item, cancel_token)] = cancel_token
+            if not pending:
+                break
+            done, _ = wait_futures(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                yield future.result()
+    finally:
+        for future, cancel_token in pending.items():
+            future.cancel()
+            cancel_token.cancel("batch_closed")
+
+
+def summarize(results: List[Dict[str, Any]], elapsed_seconds: float) -> Dict[str, Any]:
+    failed = sum(1 for entry in results if entry["status"] != "ok")
+    return {
+        "items": len(results),
+        "ok": len(results) - failed,
+        "failed": failed,
+        "elapsed_ms": round(elapsed_seconds * 1000, 1),
+    }
@@ -0,0 +1,76 @@
+import copy
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+from Cache import TieredCache
+from Common import Codec, metrics
+from Common.Metrics import Metrics
+
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "1024"))
+INTENT_CACHE_TTL_SECONDS = float(os.getenv("INTENT_CACHE_TTL_SECONDS", "3600"))
+# Cached intents hold user-derived text, so by default they stay in this
+# process's memory; INTENT_CACHE_SHARED=1 also writes them to the shared tier.
+INTENT_CACHE_SHARED = os.getenv("INTENT_CACHE_SHARED", "0") == "1"
+INTENT_CACHE_DIR = os.getenv(
+    "INTENT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "intents"),
+)
+
+_intent_cache = TieredCache(
+    "intents", max_entries=INTENT_CACHE_SIZE, ttl_seconds=INTENT_CACHE_TTL_SECONDS,
+    directory=INTENT_CACHE_DIR, shared=INTENT_CACHE_SHARED,
+)
+
+
+def normalize_message(message: str) -> str:
+    # "Thanks!" and "thanks" classify the same; inner punctuation ("$3,000") is kept.
+    return " ".join(message.casefold().split()).strip(" .!?")
+
+
+def classifier_fingerprint(system_prompt: str, model_name: str) -> str:
+    """Identifies the classifier; a new prompt or model starts a new key space."""
+    return hashlib.sha256(f"{model_name}\n{system_prompt}".encode("utf-8")).hexdigest()[:16]
+
+
+def intent_cache_key(message: str, fingerprint: str, context: Any = None) -> str:
+    """Key for a classification; ``context`` is whatever else the agent is shown."""
+    canonical = {
+        "classifier": fingerprint,
+        "message": normalize_message(message),
+        "context": context,
+    }
+    encoded = Codec.dumps_canonical(canonical)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def get_cached_intents(key: str) -> Optional[Dict[str, Any]]:
+    payload = _intent_cache.get(key)
+    if not isinstance(payload, dict):
+        return None
+    # Callers hand the intents on to the client; keep the cached copy intact.
+    return copy.deepcopy(payload)
+
+
+def store_intents(key: str, payload: Dict[str, Any]) -> None:
+    """Store a validated intent payload (never a failed or partial one)."""
+    _intent_cache.set(key, payload)
+
+
+def clear_intent_cache() -> None:
+    """Drop cached classifications (this process's memory, and the shared tier if enabled).
+
+    Not needed after changing ORCHESTRATOR_SYSTEM_PROMPT or OLLAMA_MODEL:
+    those are part of every key, so old entries simply stop matching.
+    """
+    _intent_cache.clear()
+
+
+def _collect_hit_rate(snapshot_metrics: Metrics) -> None:
+    hits = snapshot_metrics.counter("cache.intents.hits")
+    lookups = hits + snapshot_metrics.counter("cache.intents.misses")
+    if lookups:
+        snapshot_metrics.set_gauge("cache.intents.hit_rate", round(hits / lookups, 3))
+
+
+metrics.add_collector(_collect_hit_rate)
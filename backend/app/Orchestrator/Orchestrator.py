@@ -1,17 +1,45 @@
-import json
 import os
-from typing import Any, Dict, List, Optional
-
-import ollama
-
-from POI.POIAgent import add_poi, remove_poi, fetch_poi_images_stream
-from POI.POIModel import POIModel
-from Planner import plan
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError, wait as wait_futures
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Capture import recorded_call
+from Common import (
+    CancelToken,
+    Codec,
+    DeadlineExceeded,
+    OperationCancelled,
+    RequestPriority,
+    check_cancelled,
+    get_client,
+)
+from POI.POIAgent import add_poi, remove_poi, start_image_fetch, stream_poi
+from POI.PlaceResolver import apply_place, resolver_enabled, start_place_resolution
+from POI.POIModel import POIModel, SinglePOIWithCost
+from POI.Thumbnails import images_payload
+from Planner import cached_plan, plan
 from Planner.PlanOptionModel import PlanOptionModel
 from Planner.RequirementModel import RequirementModel
+from Warmer import record_destination
+
+from .IntentCache import classifier_fingerprint, get_cached_intents, intent_cache_key, store_intents
 
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral")
 MAX_ATTEMPTS = 2
+POI_STREAMING = os.getenv("POI_STREAMING", "1") != "0"
+# Whole-turn budget, overridable per request with "deadline_seconds" (capped).
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", "120"))
+TURN_MAX_DEADLINE_SECONDS = float(os.getenv("TURN_MAX_DEADLINE_SECONDS", "300"))
+# With less budget than this left, the planner is skipped for a cached or previous plan.
+PLANNER_MIN_SECONDS = float(os.getenv("PLANNER_MIN_SECONDS", "20"))
+# How often waits on background lookups check whether the turn was cancelled.
+_CANCEL_POLL_SECONDS = 0.2
+# Intent classifications in flight at once (and abandoned ones still finishing).
+ORCHESTRATOR_AGENT_WORKERS = int(os.getenv("ORCHESTRATOR_AGENT_WORKERS", "16"))
+
+_ollama_executor = ThreadPoolExecutor(
+    max_workers=ORCHESTRATOR_AGENT_WORKERS, thread_name_prefix="orchestrator-agent"
+)
 
 ORCHESTRATOR_SYSTEM_PROMPT = """\
 You are a travel planning assistant that classifies user messages into structured intents.
@@ -104,30 +132,19 @@ def analyze_intents(
     existing_pois: Any = None,
     existing_requirements: Any = None,
     existing_plan: Any = None,
+    deadline_seconds: Any = None,
 ) -> Dict[str, Any]:
     print(f"[Orchestrator] analyze_intents: {message}")
-    last_error: Optional[str] = None
-    for attempt in range(1, MAX_ATTEMPTS + 1):
-        output_text = _call_orchestrator_agent(message)
-        print(f"[Orchestrator] intent raw response: {output_text}")
-
-        try:
-            payload = json.loads(output_text)
-        except json.JSONDecodeError as exc:
-            last_error = f"invalid_json: {exc}"
-            continue
-
-        errors = _validate_intents(payload)
-        if not errors:
-            print("[Orchestrator] intent validation successful")
-            return _build_and_plan(
-                payload,
-                existing_pois=existing_pois,
-                existing_requirements=existing_requirements,
-                existing_plan=existing_plan,
-            )
-
-        last_error = "; ".join(errors)
+    cancel_token = CancelToken(turn_deadline_seconds(deadline_seconds))
+    payload, last_error = _classify_intents(message, cancel_token)
+    if payload is not None:
+        return _build_and_plan(
+            payload,
+            existing_pois=existing_pois,
+            existing_requirements=existing_requirements,
+            existing_plan=existing_plan,
+            cancel_token=cancel_token,
+        )
 
     print(f"[Orchestrator] intent validation failed: {last_error}")
     return {
@@ -145,30 +162,37 @@ def analyze_intents_stream(
     existing_pois: Any = None,
     existing_requirements: Any = None,
     existing_plan: Any = None,
+    cancel_token: Optional[CancelToken] = None,
+    deadline_seconds: Any = None,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
 ):
-    """Generator that yields progressive updates as dicts during intent analysis and planning."""
+    """Generator that yields progressive updates as dicts during intent analysis and planning.
+
+    Cancelling ``cancel_token`` (client gone, or a newer message superseding
+    this turn) aborts pending upstream calls at the next checkpoint; the turn
+    then ends with a ``cancelled`` update instead of ``done``.
+
+    The turn runs against a deadline (``turn_deadline_seconds``). When time
+    runs short it degrades in order: leftover image lookups are dropped, the
+    planner is replaced by the cached or previous plan, and POIs still being
+    generated are cut off. Anything dropped is listed in a ``degraded``
+    update sent before ``done``.
+
+    ``priority`` is the rate-limiter class for the turn's agent and image
+    calls; batch runs pass ``BACKGROUND`` so chat users go first.
+    """
+    if cancel_token is None:
+        cancel_token = CancelToken()
+    image_fetches: Dict[str, Future] = {}
+    place_lookups: List[Tuple[SinglePOIWithCost, Future]] = []
+    skipped: List[str] = []
     try:
         print(f"[Orchestrator] analyze_intents_stream: {message}")
-        last_error: Optional[str] = None
+        cancel_token.set_deadline(turn_deadline_seconds(deadline_seconds))
 
-        # Step 1: Call orchestrator agent to classify intents
-        for attempt in range(1, MAX_ATTEMPTS + 1):
-            output_text = _call_orchestrator_agent(message)
-            print(f"[Orchestrator] intent raw response: {output_text}")
-
-            try:
-                payload = json.loads(output_text)
-            except json.JSONDecodeError as exc:
-                last_error = f"invalid_json: {exc}"
-                continue
-
-            errors = _validate_intents(payload)
-            if not errors:
-                print("[Orchestrator] intent validation successful")
-                break
-
-            last_error = "; ".join(errors)
-        else:
+        # Step 1: Classify intents (cached, or by the orchestrator agent)
+        payload, last_error = _classify_intents(message, cancel_token)
+        if payload is None:
             # Step 2: Validation failed after retries
             print(f"[Orchestrator] intent validation failed: {last_error}")
             yield {
@@ -178,6 +202,7 @@ def analyze_intents_stream(
             return
 
         intents = payload.get("intents", [])
+        cancel_token.raise_if_cancelled()
 
         # Step 3: Yield classified intents
         yield {"type": "intents", "data": intents}
@@ -213,7 +238,7 @@ def analyze_intents_stream(
         # Step 5: If no actionable intents, yield unchanged state and done
         has_actionable = poi_add or poi_remove or req_add or req_remove
         if not has_actionable:
-            yield {"type": "pois", "data": poi_model.to_list()}
+            yield {"type": "pois", "data": poi_model.to_list(variants=True)}
             yield {"type": "requirements", "data": requirement_model.to_list()}
             yield {"type": "plan", "data": plan_model.to_list() if plan_model else []}
             yield {"type": "done"}
@@ -225,69 +250,307 @@ def analyze_intents_stream(
             if poi_name:
                 poi_model = remove_poi(poi_model.to_list(), poi_name)
 
-        # Step 7: Process POI adds (skip images — they stream later)
-        existing_poi_names = {item.poi.name for item in poi_model.items}
+        # Step 7: Process POI adds. With streaming on, each POI is sent as soon
+        # as the agent finishes generating it and its image lookup starts at once.
+        images_started = {item.poi.name for item in poi_model.items}
+        images_dropped = False
         for intent in poi_add:
             poi_name = intent.get("value", "")
-            if poi_name:
-                poi_model = add_poi(poi_model.to_list(), poi_name, skip_images=True)
+            if not poi_name:
+                continue
+            record_destination(poi_name)
+            try:
+                check_cancelled(cancel_token)
+                if not POI_STREAMING:
+                    poi_model = add_poi(poi_model.to_list(), poi_name, skip_images=True,
+                                        priority=priority, cancel_token=cancel_token)
+                    continue
+                for item in stream_poi(poi_name, priority=priority, cancel_token=cancel_token):
+                    poi_model = POIModel(poi_model.items + [item])
+                    yield {"type": "pois", "data": poi_model.to_list(variants=True)}
+                    if item.poi.name not in images_started and item.poi.images is None:
+                        images_started.add(item.poi.name)
+                        image_fetches[item.poi.name] = start_image_fetch(
+                            item.poi.name, cancel_token=cancel_token)
+                    if resolver_enabled() and not item.poi.place_id:
+                        place_lookups.append((item, start_place_resolution(item, poi_name)))
+                    yield from _finished_images(poi_model, image_fetches)
+            except Exception as exc:
+                if not _out_of_time(cancel_token, exc):
+                    raise
+                # Keep the POIs that made it; the rest of this turn runs on fallbacks.
+                print(f"[Orchestrator] deadline hit while adding POIs: {exc}")
+                skipped.append("pois")
+                break
+
+        # Verified coordinates must be in place before the final snapshot and the planner
+        for item, lookup in place_lookups:
+            try:
+                apply_place(item, _await(lookup, cancel_token))
+            except DeadlineExceeded:
+                lookup.cancel()
+                if "places" not in skipped:
+                    skipped.append("places")
+        place_lookups.clear()
+
+        # Gazetteer POIs arrive with images; only the agent's need a lookup
+        for item in poi_model.items:
+            if item.poi.name not in images_started and item.poi.images is None:
+                images_started.add(item.poi.name)
+                if cancel_token.expired:
+                    images_dropped = True
+                    continue
+                image_fetches[item.poi.name] = start_image_fetch(
+                    item.poi.name, cancel_token=cancel_token)
 
         # Step 8: Yield POIs
-        yield {"type": "pois", "data": poi_model.to_list()}
-        print(
-            f"[Orchestrator] poi: {json.dumps(poi_model.to_list(), ensure_ascii=True)}")
+        yield {"type": "pois", "data": poi_model.to_list(variants=True)}
+        print(f"[Orchestrator] poi: {len(poi_model.items)} items")
 
         # Step 9: Process requirement removes and adds
         for intent in req_remove:
             desc = intent.get("value", "")
             if desc:
-                requirement_model = RequirementModel.remove_requirement(
-                    requirement_model, desc)
+                requirement_model.remove(desc)
 
         for intent in req_add:
             desc = intent.get("value", "")
-            if desc:
-                new_reqs = RequirementModel.from_json([{"description": desc}])
-                requirement_model = RequirementModel(
-                    requirement_model.items + new_reqs.items)
+            if desc and not requirement_model.add(desc):
+                print(f"[Orchestrator] requirement already present: {desc!r}")
 
         # Step 10: Yield requirements
         yield {"type": "requirements", "data": requirement_model.to_list()}
-        print(
-            f"[Orchestrator] requirements: {json.dumps(requirement_model.to_list(), ensure_ascii=True)}")
+        print(f"[Orchestrator] requirements: {len(requirement_model.items)} items")
 
-        # Step 11: Call the planner
-        planner_result = plan(poi_model, requirement_model,
-                              existing_plan=plan_model)
+        yield from _finished_images(poi_model, image_fetches)
 
-        # Step 12: Yield plan
-        yield {"type": "plan", "data": planner_result.to_list()}
+        # Step 11: Call the planner, or fall back if the budget is too short
+        cancel_token.raise_if_cancelled()
+        planner_result, plan_source = _plan_within_deadline(
+            poi_model, requirement_model, plan_model, cancel_token, priority)
+        if plan_source != "planner":
+            skipped.append("plan")
 
-        # Step 13: Stream images for newly added POIs
-        new_pois = POIModel([item for item in poi_model.items if item.poi.name not in existing_poi_names])
-        if new_pois.items:
-            for poi_name, image_urls in fetch_poi_images_stream(new_pois):
-                yield {"type": "poi_images", "data": {"name": poi_name, "images": {"urls": image_urls}}}
+        # Step 12: Yield plan
+        yield {"type": "plan", "data": planner_result.to_list() if planner_result else []}
 
-        # Step 14: Yield done
+        # Step 13: Stream the remaining images for newly added POIs as they finish
+        try:
+            yield from _finished_images(poi_model, image_fetches, wait=True,
+                                        cancel_token=cancel_token)
+        except DeadlineExceeded:
+            for future in image_fetches.values():
+                future.cancel()
+            image_fetches.clear()
+            images_dropped = True
+        if images_dropped:
+            skipped.insert(0, "images")
+
+        # Step 14: Report what the deadline cost, then done
+        if skipped:
+            print(f"[Orchestrator] degraded turn: skipped {skipped}, plan from {plan_source}")
+            yield {"type": "degraded", "data": {"skipped": skipped, "plan_source": plan_source}}
         yield {"type": "done"}
 
+    except OperationCancelled as exc:
+        # Lookups that haven't started yet are dropped; running ones see the
+        # token at their next checkpoint.
+        for future in list(image_fetches.values()) + [lookup for _, lookup in place_lookups]:
+            future.cancel()
+        print(f"[Orchestrator] turn cancelled: {exc}")
+        yield {"type": "cancelled", "reason": str(exc)}
     except Exception as exc:
         print(f"[Orchestrator] stream error: {exc}")
         yield {"type": "error", "message": str(exc)}
 
 
-def _call_orchestrator_agent(message: str) -> str:
-    response = ollama.chat(
-        model=OLLAMA_MODEL,
-        messages=[
-            {"role": "system", "content": ORCHESTRATOR_SYSTEM_PROMPT},
-            {"role": "user", "content": message},
-        ],
-        format="json",
-        options={"temperature": 0.1},
+def collect_stream_result(updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold analyze_intents_stream updates into the analyze_intents response shape."""
+    result: Dict[str, Any] = {"intents": [], "pois": [], "requirements": [], "plan": []}
+    for update in updates:
+        kind = update.get("type")
+        if kind == "error":
+            return {"error": update.get("message")}
+        if kind == "cancelled":
+            return {"error": f"cancelled: {update.get('reason')}"}
+        if kind == "degraded":
+            result["degraded"] = update.get("data")
+        if kind == "pois":
+            result["pois"] = [dict(poi) for poi in update.get("data") or []]
+        elif kind in result:
+            result[kind] = update.get("data") or []
+        elif kind == "poi_images":
+            data = update.get("data") or {}
+            for poi in result["pois"]:
+                if poi.get("name") == data.get("name"):
+                    poi["images"] = data.get("images")
+    return result
+
+
+def turn_deadline_seconds(requested: Any = None) -> float:
+    """The turn budget: TURN_DEADLINE_SECONDS, or the request's own capped at TURN_MAX_DEADLINE_SECONDS."""
+    if requested is None:
+        return TURN_DEADLINE_SECONDS
+    if isinstance(requested, bool) or not isinstance(requested, (int, float)) or requested <= 0:
+        raise ValueError("invalid_deadline_seconds: must be a positive number")
+    return min(float(requested), TURN_MAX_DEADLINE_SECONDS)
+
+
+def _out_of_time(cancel_token: CancelToken, exc: Exception) -> bool:
+    # Past the deadline, any upstream failure (timeout, shed, closed stream) counts as running out of time.
+    return cancel_token.expired and not isinstance(exc, OperationCancelled)
+
+
+def _plan_within_deadline(
+    poi_model: POIModel,
+    requirement_model: RequirementModel,
+    plan_model: Optional[PlanOptionModel],
+    cancel_token: CancelToken,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+) -> Tuple[Optional[PlanOptionModel], str]:
+    """Plan if the budget allows, else fall back to the cached plan, then the previous one.
+
+    Returns the plan (None when there's nothing to fall back to) and where it
+    came from: ``planner``, ``cache``, ``previous`` or ``none``.
+    """
+    remaining = cancel_token.remaining()
+    if remaining is None or remaining >= PLANNER_MIN_SECONDS:
+        try:
+            return plan(poi_model, requirement_model, existing_plan=plan_model,
+                        priority=priority, cancel_token=cancel_token), "planner"
+        except Exception as exc:
+            if not _out_of_time(cancel_token, exc):
+                raise
+            print(f"[Orchestrator] deadline hit while planning: {exc}")
+    else:
+        print(f"[Orchestrator] {remaining:.1f}s left, skipping the planner")
+    cached = cached_plan(poi_model, requirement_model)
+    if cached is not None:
+        return cached, "cache"
+    if plan_model is not None and plan_model.items:
+        return plan_model, "previous"
+    return None, "none"
+
+
+def _await(future: Future, cancel_token: Optional[CancelToken]) -> Any:
+    """``future.result()`` that gives up once the turn is cancelled or out of time."""
+    if cancel_token is None:
+        return future.result()
+    while not future.done():
+        check_cancelled(cancel_token)
+        wait_futures([future], timeout=_CANCEL_POLL_SECONDS)
+    return future.result()
+
+
+def _as_completed(futures: Iterable[Future], cancel_token: Optional[CancelToken]) -> Iterator[Future]:
+    if cancel_token is None:
+        yield from as_completed(futures)
+        return
+    pending = set(futures)
+    while pending:
+        done, pending = wait_futures(pending, timeout=_CANCEL_POLL_SECONDS,
+                                     return_when=FIRST_COMPLETED)
+        yield from done
+        if pending:
+            check_cancelled(cancel_token)
+
+
+def _finished_images(
+    poi_model: POIModel,
+    image_fetches: Dict[str, Future],
+    wait: bool = False,
+    cancel_token: Optional[CancelToken] = None,
+):
+    """Yield poi_images updates for completed lookups (all of them if ``wait``).
+
+    URLs are also attached to the POI so later ``pois`` snapshots in the same
+    turn don't drop images the client has already merged.
+    """
+    if wait:
+        finished = _as_completed(list(image_fetches.values()), cancel_token)
+    else:
+        finished = [future for future in image_fetches.values() if future.done()]
+    by_future = {future: name for name, future in image_fetches.items()}
+    for future in finished:
+        poi_name = by_future[future]
+        del image_fetches[poi_name]
+        image_urls = future.result()
+        for item in poi_model.items:
+            if item.poi.name == poi_name:
+                item.poi.images = image_urls
+        yield {"type": "poi_images", "data": {"name": poi_name, "images": images_payload(image_urls)}}
+
+
+def _classify_intents(
+    message: str, cancel_token: CancelToken
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """``(payload, None)`` with validated intents, or ``(None, last_error)``.
+
+    Validated payloads are cached by normalized message and classifier
+    (prompt + model). The agent only sees the message, so the conversation
+    state is not part of the key.
+    """
+    cache_key = intent_cache_key(
+        message, classifier_fingerprint(ORCHESTRATOR_SYSTEM_PROMPT, OLLAMA_MODEL))
+    cached = get_cached_intents(cache_key)
+    if cached is not None:
+        print(f"[Orchestrator] intent cache hit: {cache_key}")
+        return cached, None
+
+    last_error: Optional[str] = None
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        check_cancelled(cancel_token)
+        output_text = _call_orchestrator_agent(message, timeout=cancel_token.remaining())
+        print(f"[Orchestrator] intent raw response: {output_text}")
+
+        try:
+            payload = Codec.loads(output_text)
+        except Codec.DecodeError as exc:
+            last_error = f"invalid_json: {exc}"
+            continue
+
+        errors = _validate_intents(payload)
+        if not errors:
+            print("[Orchestrator] intent validation successful")
+            store_intents(cache_key, payload)
+            return payload, None
+
+        last_error = "; ".join(errors)
+    return None, last_error
+
+
+def _call_orchestrator_agent(message: str, timeout: Optional[float] = None) -> str:
+    return recorded_call(
+        "orchestrator", message, lambda: _call_orchestrator_agent_upstream(message, timeout)
     )
-    return response["message"]["content"]
+
+
+def _call_orchestrator_agent_upstream(message: str, timeout: Optional[float] = None) -> str:
+    client = get_client("ollama")
+
+    def chat() -> str:
+        response = client.chat(
+            model=OLLAMA_MODEL,
+            messages=[
+                {"role": "system", "content": ORCHESTRATOR_SYSTEM_PROMPT},
+                {"role": "user", "content": message},
+            ],
+            format="json",
+            options={"temperature": 0.1},
+        )
+        return response["message"]["content"]
+
+    if timeout is None:
+        return chat()
+    # The shared client's timeout is per call, not per turn, so the turn stops
+    # waiting at its deadline; the call itself finishes (or times out) in the
+    # background and its connection goes back to the pool.
+    future = _ollama_executor.submit(chat)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceeded("turn_deadline_exceeded")
 
 
 def _validate_intents(payload: Any) -> List[str]:
@@ -344,7 +607,10 @@ def _build_and_plan(
     existing_pois: Any = None,
     existing_requirements: Any = None,
     existing_plan: Any = None,
+    cancel_token: Optional[CancelToken] = None,
 ) -> Dict[str, Any]:
+    if cancel_token is None:
+        cancel_token = CancelToken(turn_deadline_seconds())
     intents = payload.get("intents", [])
 
     # Classify intents into buckets
@@ -380,7 +646,7 @@ def _build_and_plan(
     if not has_actionable:
         return {
             "intents": intents,
-            "pois": poi_model.to_list(),
+            "pois": poi_model.to_list(variants=True),
             "requirements": requirement_model.to_list(),
             "plan": plan_model.to_list() if plan_model else [],
         }
@@ -394,31 +660,45 @@ def _build_and_plan(
     for intent in req_remove:
         desc = intent.get("value", "")
         if desc:
-            requirement_model = RequirementModel.remove_requirement(
-                requirement_model, desc)
+            requirement_model.remove(desc)
 
+    skipped: List[str] = []
     for intent in poi_add:
         poi_name = intent.get("value", "")
         if poi_name:
-            poi_model = add_poi(poi_model.to_list(), poi_name)
+            record_destination(poi_name)
+            try:
+                check_cancelled(cancel_token)
+                poi_model = add_poi(poi_model.to_list(), poi_name, cancel_token=cancel_token)
+            except Exception as exc:
+                if not _out_of_time(cancel_token, exc):
+                    raise
+                print(f"[Orchestrator] deadline hit while adding POIs: {exc}")
+                skipped.append("pois")
+                break
+    if poi_add and cancel_token.expired and "pois" not in skipped:
+        # add_poi stops looking up images once the budget is gone.
+        skipped.append("images")
 
     for intent in req_add:
         desc = intent.get("value", "")
-        if desc:
-            new_reqs = RequirementModel.from_json([{"description": desc}])
-            requirement_model = RequirementModel(
-                requirement_model.items + new_reqs.items)
+        if desc and not requirement_model.add(desc):
+            print(f"[Orchestrator] requirement already present: {desc!r}")
 
-    print(
-        f"[Orchestrator] poi: {json.dumps(poi_model.to_list(), ensure_ascii=True)}")
-    print(
-        f"[Orchestrator] requirements: {json.dumps(requirement_model.to_list(), ensure_ascii=True)}")
+    print(f"[Orchestrator] poi: {len(poi_model.items)} items")
+    print(f"[Orchestrator] requirements: {len(requirement_model.items)} items")
 
-    planner_result = plan(poi_model, requirement_model,
-                          existing_plan=plan_model)
-    return {
+    planner_result, plan_source = _plan_within_deadline(
+        poi_model, requirement_model, plan_model, cancel_token)
+    if plan_source != "planner":
+        skipped.append("plan")
+    result = {
         "intents": intents,
-        "pois": poi_model.to_list(),
+        "pois": poi_model.to_list(variants=True),
         "requirements": requirement_model.to_list(),
-        "plan": planner_result.to_list(),
+        "plan": planner_result.to_list() if planner_result else [],
     }
+    if skipped:
+        print(f"[Orchestrator] degraded turn: skipped {skipped}, plan from {plan_source}")
+        result["degraded"] = {"skipped": skipped, "plan_source": plan_source}
+    return result
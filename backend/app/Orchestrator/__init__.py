@@ -1 +1,7 @@
-from .Orchestrator import analyze_intents, analyze_intents_stream
+from .Batch import parse_batch, run_batch, summarize
+from .Orchestrator import (
+    analyze_intents,
+    analyze_intents_stream,
+    collect_stream_result,
+    turn_deadline_seconds,
+)
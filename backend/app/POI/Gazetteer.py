@@ -0,0 +1,157 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+from Common import Codec, metrics
+from POI.POIModel import POIModel
+
+GAZETTEER_SCHEMA_VERSION = 1
+POI_GAZETTEER_PATH = os.getenv(
+    "POI_GAZETTEER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "gazetteer.sqlite"),
+)
+
+_SCHEMA = """
+CREATE TABLE destinations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    pois BLOB NOT NULL
+);
+CREATE TABLE aliases (
+    key TEXT PRIMARY KEY,
+    destination_id INTEGER NOT NULL REFERENCES destinations(id)
+) WITHOUT ROWID;
+"""
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_local = threading.local()
+
+
+def destination_key(text: str) -> str:
+    """Order-, case-, accent- and punctuation-insensitive key for a destination name.
+
+    Matching is exact on this key: "Kyoto, Japan" and "japan kyoto" share a key,
+    but "temples in Kyoto" does not match "Kyoto".
+    """
+    stripped = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in stripped if not unicodedata.combining(char))
+    return " ".join(sorted(set(_TOKEN_RE.findall(stripped.lower()))))
+
+
+def _connection() -> Optional[sqlite3.Connection]:
+    # One read-only connection per thread; reopened if the file was rebuilt.
+    try:
+        stat = os.stat(POI_GAZETTEER_PATH)
+    except OSError:
+        return None
+    signature = (stat.st_ino, stat.st_mtime_ns)
+    cached = getattr(_local, "connection", None)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    connection = sqlite3.connect(f"file:{POI_GAZETTEER_PATH}?mode=ro", uri=True)
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version != GAZETTEER_SCHEMA_VERSION:
+        connection.close()
+        print(f"[Gazetteer] ignoring {POI_GAZETTEER_PATH}: schema version {version}")
+        _local.connection = None
+        return None
+    _local.connection = (signature, connection)
+    return connection
+
+
+def lookup_destination(
+    name: str,
+    number_of_poi: Optional[int] = None,
+    images_per_poi: Optional[int] = None,
+) -> Optional[POIModel]:
+    """Prebuilt POIs for a destination, or None on a miss.
+
+    A request for more POIs than the entry holds is a miss, so the agent can
+    answer it. Returned models are fresh copies and safe to mutate.
+    """
+    key = destination_key(name)
+    connection = _connection() if key else None
+    if connection is None:
+        return None
+    row = connection.execute(
+        "SELECT d.pois FROM aliases a JOIN destinations d ON d.id = a.destination_id"
+        " WHERE a.key = ?",
+        (key,),
+    ).fetchone()
+    if row is None:
+        metrics.incr("gazetteer.misses")
+        return None
+
+    poi_model, errors = POIModel.decode(Codec.loads(row[0]), require_images=True)
+    if errors:
+        print(f"[Gazetteer] corrupt entry for '{name}': {errors[0]}")
+        metrics.incr("gazetteer.misses")
+        return None
+    if number_of_poi is not None:
+        if len(poi_model.items) < number_of_poi:
+            metrics.incr("gazetteer.misses")
+            return None
+        poi_model = POIModel(poi_model.items[:number_of_poi])
+    if images_per_poi is not None:
+        for item in poi_model.items:
+            item.poi.images = item.poi.images[:images_per_poi]
+    metrics.incr("gazetteer.hits")
+    print(f"[Gazetteer] serving '{name}' from disk: {len(poi_model.items)} POIs")
+    return poi_model
+
+
+def build_gazetteer(path: str, entries: Iterable[Dict[str, Any]]) -> int:
+    """Write a new gazetteer file atomically; returns the number of destinations.
+
+    Each entry is ``{"name": str, "aliases": [str], "pois": [...]}``; POIs are
+    validated (images required) before they are stored. Readers keep using the
+    previous file until the rename.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(tmp_path)
+    count = 0
+    try:
+        connection.executescript(_SCHEMA)
+        for entry in entries:
+            poi_model, errors = POIModel.decode(entry.get("pois"), require_images=True)
+            if errors:
+                raise ValueError(f"invalid POIs for '{entry.get('name')}': {errors[0]}")
+            cursor = connection.execute(
+                "INSERT INTO destinations (name, pois) VALUES (?, ?)",
+                (entry["name"], poi_model.to_json_bytes()),
+            )
+            keys = {destination_key(alias) for alias in [entry["name"], *entry.get("aliases", [])]}
+            connection.executemany(
+                "INSERT OR REPLACE INTO aliases (key, destination_id) VALUES (?, ?)",
+                [(key, cursor.lastrowid) for key in keys if key],
+            )
+            count += 1
+        connection.execute(f"PRAGMA user_version = {GAZETTEER_SCHEMA_VERSION}")
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_gazetteer(path: str) -> List[Dict[str, Any]]:
+    """All entries of an existing gazetteer, in ``build_gazetteer`` input form."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        entries: Dict[int, Dict[str, Any]] = {}
+        for row_id, name, pois in connection.execute("SELECT id, name, pois FROM destinations"):
+            entries[row_id] = {"name": name, "aliases": [], "pois": Codec.loads(pois)}
+        for key, row_id in connection.execute("SELECT key, destination_id FROM aliases"):
+            if key != destination_key(entries[row_id]["name"]):
+                entries[row_id]["aliases"].append(key)
+        return list(entries.values())
+    finally:
+        connection.close()
@@ -1,26 +1,72 @@
-import json
 import os
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
+from Cache import TieredCache
+from Capture import recorded_call
+from Common import (
+    SINGLEFLIGHT_TIMEOUT_SECONDS,
+    CancelToken,
+    Codec,
+    RequestPriority,
+    SingleFlight,
+    check_cancelled,
+    get_limiter,
+    time_budget,
+)
+from POI.ImageProxy import proxy_url
+from POI.Thumbnails import prerender_variants
+
 TEXT_SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
 FLICKR_REST_URL = "https://api.flickr.com/services/rest/"
 
+IMAGE_SEARCH_CACHE_SIZE = int(os.getenv("IMAGE_SEARCH_CACHE_SIZE", "4096"))
+IMAGE_SEARCH_TTL_SECONDS = float(os.getenv("IMAGE_SEARCH_TTL_SECONDS", "86400"))
+IMAGE_SEARCH_CACHE_DIR = os.getenv(
+    "IMAGE_SEARCH_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "image_search"),
+)
+
+_google_flight = SingleFlight("google_places")
+_flickr_flight = SingleFlight("flickr")
+_image_search_cache = TieredCache(
+    "image_search", max_entries=IMAGE_SEARCH_CACHE_SIZE, ttl_seconds=IMAGE_SEARCH_TTL_SECONDS,
+    directory=IMAGE_SEARCH_CACHE_DIR,
+)
+
 
 def google_text_search_place(
     location_name: str,
     api_key: Optional[str] = None,
     field_mask: Optional[str] = None,
+    location_bias: Optional[dict] = None,
 ) -> dict:
+    """Places text search; ``location_bias`` is the API's ``locationBias`` object."""
     if not location_name:
         raise ValueError("location_name is required")
+    mask = field_mask or "places.displayName,places.formattedAddress,places.id"
+    request = [location_name, mask] + ([location_bias] if location_bias else [])
+    return _google_flight.do(
+        Codec.dumps_canonical(request),
+        lambda: recorded_call(
+            "places", Codec.dumps_canonical(request),
+            lambda: _google_text_search_place_upstream(location_name, api_key, mask, location_bias),
+        ),
+        timeout=SINGLEFLIGHT_TIMEOUT_SECONDS,
+    )
+
+
+def _google_text_search_place_upstream(
+    location_name: str, api_key: Optional[str], mask: str, location_bias: Optional[dict] = None
+) -> dict:
     key = api_key or os.getenv("GOOGLE_MAPS_API_KEY")
     if not key:
         raise ValueError("Google Maps API key is required")
-    mask = field_mask or "places.displayName,places.formattedAddress,places.id"
-
-    body = json.dumps({"textQuery": location_name}).encode("utf-8")
+    query = {"textQuery": location_name}
+    if location_bias:
+        query["locationBias"] = location_bias
+    body = Codec.dumps_bytes(query)
     req = Request(
         TEXT_SEARCH_URL,
         data=body,
@@ -33,9 +79,10 @@ def google_text_search_place(
         method="POST",
     )
 
-    with urlopen(req, timeout=15) as response:
-        payload = response.read().decode("utf-8")
-    return json.loads(payload)
+    with get_limiter("google").acquire():
+        with urlopen(req, timeout=15) as response:
+            payload = response.read()
+    return Codec.loads(payload)
 
 
 def flickr_photo_search_internal(
@@ -44,9 +91,28 @@ def flickr_photo_search_internal(
     per_page: int = 10,
     page: int = 1,
     extras: Optional[str] = None,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
 ) -> dict:
     if not location_name:
         raise ValueError("location_name is required")
+    return recorded_call(
+        "flickr", Codec.dumps_canonical([location_name, per_page, page, extras]),
+        lambda: _flickr_photo_search_upstream(
+            location_name, api_key, per_page, page, extras, priority, cancel_token),
+        cancel_token,
+    )
+
+
+def _flickr_photo_search_upstream(
+    location_name: str,
+    api_key: Optional[str],
+    per_page: int,
+    page: int,
+    extras: Optional[str],
+    priority: RequestPriority,
+    cancel_token: Optional[CancelToken],
+) -> dict:
     key = api_key or os.getenv("FLICKR_API_KEY")
     if not key:
         raise ValueError("Flickr API key is required")
@@ -66,9 +132,13 @@ def flickr_photo_search_internal(
     url = f"{FLICKR_REST_URL}?{urlencode(params)}"
     req = Request(url, headers={"Accept": "application/json"})
 
-    with urlopen(req, timeout=15) as response:
-        payload = response.read().decode("utf-8")
-    return json.loads(payload)
+    with get_limiter("flickr").acquire(priority=priority, cancel_token=cancel_token):
+        check_cancelled(cancel_token)
+        # urlopen can't be interrupted; its timeout bounds how late we notice.
+        with urlopen(req, timeout=time_budget(cancel_token, 15)) as response:
+            payload = response.read()
+    check_cancelled(cancel_token)
+    return Codec.loads(payload)
 
 
 def flickr_photo_search(
@@ -77,6 +147,63 @@ def flickr_photo_search(
     per_page: int = 10,
     page: int = 1,
     extras: Optional[str] = None,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> dict:
+    cached = _image_search_cache.get(image_search_cache_key(location_name, per_page, page, extras))
+    if cached is not None:
+        return {"urls": _proxied(cached)}
+    # The key leaves out priority so prefetch and chat share one search; if a
+    # low-priority leader is shed, SingleFlight re-runs followers with their own.
+    result = _flickr_flight.do(
+        (location_name, per_page, page, extras),
+        lambda: _flickr_photo_search_urls(
+            location_name, api_key, per_page, page, extras, priority, cancel_token),
+        timeout=SINGLEFLIGHT_TIMEOUT_SECONDS,
+        cancel_token=cancel_token,
+    )
+    # Each caller gets its own list; the shared result must stay untouched.
+    return {"urls": list(result["urls"])}
+
+
+def image_search_cache_key(
+    location_name: str, per_page: int = 10, page: int = 1, extras: Optional[str] = None
+) -> str:
+    # Entries hold Flickr's own URLs, so IMAGE_PROXY_BASE_URL isn't part of the key.
+    return Codec.dumps_canonical(
+        ["flickr", " ".join(location_name.lower().split()), per_page, page, extras])
+
+
+def _proxied(urls: List[str]) -> List[str]:
+    """Cached Flickr URLs rewritten for the current proxy setting (a fresh list)."""
+    return [proxy_url(url) for url in urls]
+
+
+def image_search_age(location_name: str, per_page: int = 10) -> Optional[float]:
+    entry = _image_search_cache.get_entry(image_search_cache_key(location_name, per_page))
+    return None if entry is None else entry[1]
+
+
+def refresh_image_search(location_name: str, per_page: int = 10) -> List[str]:
+    """Re-run a photo search at background priority and replace the cached URLs."""
+    try:
+        return _flickr_photo_search_urls(
+            location_name, None, per_page, 1, None, RequestPriority.BACKGROUND,
+        )["urls"]
+    except ValueError as exc:
+        # The cached URLs stay until they expire; the next cycle tries again.
+        print(f"[ImageFetcher] refresh failed for '{location_name}': {exc}")
+        return []
+
+
+def _flickr_photo_search_urls(
+    location_name: str,
+    api_key: Optional[str],
+    per_page: int,
+    page: int,
+    extras: Optional[str],
+    priority: RequestPriority,
+    cancel_token: Optional[CancelToken] = None,
 ) -> dict:
     # Expected output:
     # {"urls":["https://live.staticflickr.com/65535/54957725380_f703109d69_c.jpg","https://live.staticflickr.com/65535/54863632112_b5b8d1f8a5_c.jpg","https://live.staticflickr.com/65535/54551507602_b09c89abb3_c.jpg","https://live.staticflickr.com/65535/54551507357_2840bce8b4_c.jpg","https://live.staticflickr.com/65535/54429358144_5f50f7169a_c.jpg","https://live.staticflickr.com/65535/54393752838_33d359d099_c.jpg","https://live.staticflickr.com/65535/54392643712_4e4f0c0808_c.jpg","https://live.staticflickr.com/65535/54392643607_c7ee1ea4e6_c.jpg","https://live.staticflickr.com/65535/54393752478_5e638b5456_c.jpg","https://live.staticflickr.com/65535/54393752218_ffca740775_c.jpg"]}
@@ -86,7 +213,13 @@ def flickr_photo_search(
         per_page=per_page,
         page=page,
         extras=extras,
+        priority=priority,
+        cancel_token=cancel_token,
     )
+    # Bad keys and rate limits come back as HTTP 200 with {"stat": "fail"}.
+    if not isinstance(result, dict) or result.get("stat") != "ok":
+        message = result.get("message") if isinstance(result, dict) else None
+        raise ValueError(f"flickr_search_failed: {message or 'unexpected response'}")
     photos = result.get("photos", {}).get("photo", [])
     urls = []
     for photo in photos:
@@ -94,6 +227,10 @@ def flickr_photo_search(
         photo_id = photo.get("id")
         secret = photo.get("secret")
         if server and photo_id and secret:
-            urls.append(
-                f"https://live.staticflickr.com/{server}/{photo_id}_{secret}_c.jpg")
+            urls.append(f"https://live.staticflickr.com/{server}/{photo_id}_{secret}_c.jpg")
+    # An empty answer isn't worth remembering for a day; the next search retries.
+    if urls:
+        _image_search_cache.set(image_search_cache_key(location_name, per_page, page, extras), urls)
+    urls = _proxied(urls)
+    prerender_variants(urls)
     return {"urls": urls}
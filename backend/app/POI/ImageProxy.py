@@ -0,0 +1,106 @@
+import os
+import re
+import threading
+from typing import Optional
+from urllib.request import Request, urlopen
+
+from Cache import ContentCache
+from Common import SINGLEFLIGHT_TIMEOUT_SECONDS, RequestPriority, SingleFlight, get_limiter
+
+# Absolute origin of this backend as seen by clients, e.g. "http://127.0.0.1:5000".
+# When unset, POI payloads keep the original Flickr URLs.
+IMAGE_PROXY_BASE_URL = os.getenv("IMAGE_PROXY_BASE_URL", "").rstrip("/")
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "images"),
+)
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# https://live.staticflickr.com/{server}/{photo_id}_{secret}_{size}.jpg
+_FLICKR_URL_RE = re.compile(
+    r"^https://live\.staticflickr\.com/(\d+)/(\d+)_([0-9a-f]+)_([a-z0-9])\.jpg$")
+# Proxy ids encode everything needed to rebuild the upstream URL, so the
+# proxy can only ever fetch Flickr static images.
+_IMAGE_ID_RE = re.compile(r"^(\d{1,10})-(\d{1,20})_([0-9a-f]{4,32})_([a-z0-9])$")
+
+_image_flight = SingleFlight("image_proxy")
+_cache: Optional[ContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ContentCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContentCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, name="images")
+        return _cache
+
+
+def image_id_from_url(url: str) -> Optional[str]:
+    match = _FLICKR_URL_RE.match(url)
+    if match is None:
+        return None
+    server, photo_id, secret, size = match.groups()
+    return f"{server}-{photo_id}_{secret}_{size}"
+
+
+def upstream_url(image_id: str) -> Optional[str]:
+    """Flickr URL for a proxy id, or None if the id is malformed."""
+    match = _IMAGE_ID_RE.match(image_id)
+    if match is None:
+        return None
+    server, photo_id, secret, size = match.groups()
+    return f"https://live.staticflickr.com/{server}/{photo_id}_{secret}_{size}.jpg"
+
+
+def image_id_from_proxy_url(url: str) -> Optional[str]:
+    """Proxy id of a URL produced by ``proxy_url``, or None for any other URL."""
+    prefix = f"{IMAGE_PROXY_BASE_URL}/images/"
+    if not IMAGE_PROXY_BASE_URL or not url.startswith(prefix):
+        return None
+    image_id = url[len(prefix):]
+    return image_id if _IMAGE_ID_RE.match(image_id) else None
+
+
+def proxy_url(url: str) -> str:
+    """Rewrite a Flickr image URL to this backend's /images route when enabled."""
+    if not IMAGE_PROXY_BASE_URL:
+        return url
+    image_id = image_id_from_url(url)
+    if image_id is None:
+        return url
+    return f"{IMAGE_PROXY_BASE_URL}/images/{image_id}"
+
+
+def get_image_path(image_id: str, priority: RequestPriority = RequestPriority.INTERACTIVE) -> str:
+    """Local path of the image, downloading it on a miss.
+
+    Concurrent misses for the same id share one upstream download.
+    Raises ValueError for an invalid id.
+    """
+    url = upstream_url(image_id)
+    if url is None:
+        raise ValueError(f"invalid_image_id: {image_id}")
+    path = get_image_cache().path(image_id)
+    if path is not None:
+        return path
+    return _image_flight.do(
+        image_id,
+        lambda: _download(image_id, url, priority),
+        timeout=SINGLEFLIGHT_TIMEOUT_SECONDS,
+    )
+
+
+def _download(image_id: str, url: str, priority: RequestPriority) -> str:
+    req = Request(url, headers={"Accept": "image/*"})
+    with get_limiter("flickr_static").acquire(priority):
+        with urlopen(req, timeout=15) as response:
+            content_type = response.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                raise ValueError(f"upstream_not_image: {content_type}")
+            data = response.read(IMAGE_MAX_BYTES + 1)
+    if len(data) > IMAGE_MAX_BYTES:
+        raise ValueError(f"upstream_image_too_large: {image_id}")
+    print(f"[ImageProxy] cached {image_id}: {len(data)} bytes")
+    return get_image_cache().put(image_id, data)
@@ -1,14 +1,46 @@
-import json
 import os
-from typing import Any, Dict, Optional
-
-from openai import OpenAI
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from Cache import TieredCache
+from Capture import recorded_call, recorded_stream
+from Common import (
+    OPENAI_CALL_SITES,
+    CancelToken,
+    Codec,
+    OperationCancelled,
+    SINGLEFLIGHT_TIMEOUT_SECONDS,
+    RequestPriority,
+    SingleFlight,
+    estimate_tokens,
+    check_cancelled,
+    get_client,
+    get_limiter,
+    time_budget,
+)
 from POI.ImageFetcher import flickr_photo_search
-from POI.POIModel import POIModel
+from POI.Gazetteer import lookup_destination
+from POI.PlaceResolver import resolve_places
+from POI.POIModel import POIModel, SinglePOIWithCost
+from POI.StreamingParser import POIStreamParser
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
-_openai_client = OpenAI()  # reads OPENAI_API_KEY from env
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "4"))
+POI_CACHE_SIZE = int(os.getenv("POI_CACHE_SIZE", "512"))
+POI_CACHE_TTL_SECONDS = float(os.getenv("POI_CACHE_TTL_SECONDS", str(6 * 3600)))
+POI_CACHE_DIR = os.getenv(
+    "POI_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "pois"),
+)
+_poi_flight = SingleFlight("poi_agent")
+# Validated agent answers (no images or place ids), keyed by model + normalized query.
+_poi_cache = TieredCache(
+    "poi_results", max_entries=POI_CACHE_SIZE, ttl_seconds=POI_CACHE_TTL_SECONDS,
+    directory=POI_CACHE_DIR,
+)
+_image_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_FETCH_WORKERS, thread_name_prefix="poi-images"
+)
 
 POI_SYSTEM_PROMPT = """\
 You are a travel Points of Interest (POI) discovery assistant.
@@ -33,69 +65,281 @@ Focus on popular, well-known, and highly-rated places.
 """
 
 
-def _call_poi_agent(poi: str, number_of_poi: Optional[int] = None) -> str:
-    user_message = poi
-    if number_of_poi is not None:
-        user_message = f"{poi}, return {number_of_poi} results"
-    response = _openai_client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {"role": "system", "content": POI_SYSTEM_PROMPT},
-            {"role": "user", "content": user_message},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.7,
+def _normalize_query(poi: str) -> str:
+    return " ".join(poi.lower().split())
+
+
+def poi_cache_key(poi: str, number_of_poi: Optional[int] = None) -> str:
+    return Codec.dumps_canonical([OPENAI_MODEL, _normalize_query(poi), number_of_poi])
+
+
+def get_cached_pois(poi: str, number_of_poi: Optional[int] = None) -> Optional[POIModel]:
+    """A fresh model from the POI result cache, or None."""
+    cached = _poi_cache.get(poi_cache_key(poi, number_of_poi))
+    if cached is None:
+        return None
+    poi_model, errors = POIModel.decode(cached, require_images=False)
+    return None if errors else poi_model
+
+
+def poi_cache_age(poi: str, number_of_poi: Optional[int] = None) -> Optional[float]:
+    entry = _poi_cache.get_entry(poi_cache_key(poi, number_of_poi))
+    return None if entry is None else entry[1]
+
+
+def _store_pois(poi: str, number_of_poi: Optional[int], pois: List[Dict[str, Any]]) -> None:
+    if pois:
+        _poi_cache.set(poi_cache_key(poi, number_of_poi), pois)
+
+
+def _call_poi_agent(
+    poi: str,
+    number_of_poi: Optional[int] = None,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> str:
+    key = (OPENAI_MODEL, _normalize_query(poi), number_of_poi)
+    return _poi_flight.do(
+        key,
+        lambda: recorded_call(
+            "poi", _poi_user_message(poi, number_of_poi),
+            lambda: _call_poi_agent_upstream(poi, number_of_poi, priority, cancel_token),
+            cancel_token,
+        ),
+        timeout=SINGLEFLIGHT_TIMEOUT_SECONDS,
+        cancel_token=cancel_token,
     )
+
+
+def _poi_user_message(poi: str, number_of_poi: Optional[int] = None) -> str:
+    if number_of_poi is not None:
+        return f"{poi}, return {number_of_poi} results"
+    return poi
+
+
+def _timeout_option(cancel_token: Optional[CancelToken]) -> Dict[str, float]:
+    # The turn deadline can shorten the call site's timeout, never lengthen it.
+    if cancel_token is None or cancel_token.deadline is None:
+        return {}
+    return {"timeout": time_budget(cancel_token, OPENAI_CALL_SITES["poi"][0])}
+
+
+def _call_poi_agent_upstream(
+    poi: str,
+    number_of_poi: Optional[int] = None,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> str:
+    user_message = _poi_user_message(poi, number_of_poi)
+    tokens = estimate_tokens(POI_SYSTEM_PROMPT, user_message, completion_tokens=3000)
+    limiter = get_limiter("openai")
+    with limiter.acquire(priority=priority, tokens=tokens, cancel_token=cancel_token) as permit:
+        response = get_client("openai.poi").chat.completions.create(
+            **_timeout_option(cancel_token),
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": POI_SYSTEM_PROMPT},
+                {"role": "user", "content": user_message},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.7,
+        )
+        permit.record_tokens(getattr(response.usage, "total_tokens", None))
+    # The blocking call can't be interrupted; drop its answer if the turn is gone.
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
     output_text = response.choices[0].message.content or ""
     print(f"[POIAgent] response received: {output_text}")
     return output_text
 
 
-def _send_to_poi_agent(
+def _stream_poi_agent_upstream(
     poi: str,
     number_of_poi: Optional[int] = None,
-    images_per_poi: Optional[int] = None,
-    skip_images: bool = False,
-) -> POIModel:
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> Iterator[str]:
+    """Yield completion text chunks as the agent generates them.
+
+    Not routed through single-flight: a follower can't join a stream midway.
+    Cancelling ``cancel_token`` closes the HTTP stream, so a pending read
+    returns immediately instead of waiting for the next token.
+    """
+    user_message = _poi_user_message(poi, number_of_poi)
+    tokens = estimate_tokens(POI_SYSTEM_PROMPT, user_message, completion_tokens=3000)
+    limiter = get_limiter("openai")
+    with limiter.acquire(priority=priority, tokens=tokens, cancel_token=cancel_token) as permit:
+        stream = get_client("openai.poi").chat.completions.create(
+            **_timeout_option(cancel_token),
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": POI_SYSTEM_PROMPT},
+                {"role": "user", "content": user_message},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        unregister = cancel_token.on_cancel(stream.close) if cancel_token is not None else None
+        try:
+            for chunk in stream:
+                check_cancelled(cancel_token)
+                if chunk.usage is not None:
+                    permit.record_tokens(chunk.usage.total_tokens)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as exc:
+            # Closing the stream from another thread surfaces as a read error.
+            if cancel_token is not None and cancel_token.cancelled and not isinstance(
+                    exc, OperationCancelled):
+                raise OperationCancelled(cancel_token.reason) from exc
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+            stream.close()
+    check_cancelled(cancel_token)
+
+
+def stream_poi(
+    poi: str,
+    number_of_poi: Optional[int] = None,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> Iterator[SinglePOIWithCost]:
+    """Yield validated POIs one at a time while the agent is still generating.
+
+    Each object in the ``pois`` array is decoded as soon as it is complete;
+    invalid objects are skipped rather than failing the whole response. If
+    nothing could be extracted incrementally (e.g. the agent returned a
+    single object instead of an array), the full text is decoded at the end.
+    Destinations in the gazetteer or the POI result cache skip the agent.
+    A cancelled turn stops the stream and caches nothing.
+    """
+    cached = lookup_destination(poi, number_of_poi) or get_cached_pois(poi, number_of_poi)
+    if cached is not None:
+        yield from cached.items
+        return
+
+    parser = POIStreamParser()
+    # Snapshots taken before yielding: callers attach images/places to the items later.
+    streamed: List[Dict[str, Any]] = []
+    chunks = recorded_stream(
+        "poi", _poi_user_message(poi, number_of_poi),
+        lambda: _stream_poi_agent_upstream(poi, number_of_poi, priority, cancel_token),
+        cancel_token,
+    )
+    for chunk in chunks:
+        for data in parser.feed(chunk):
+            poi_model, errors = POIModel.decode([data], require_images=False)
+            if errors:
+                print(f"[POIAgent] skipping streamed POI: {errors}")
+                continue
+            item = poi_model.items[0]
+            item.poi.place_id = None
+            streamed.append(item.to_dict())
+            yield item
+
+    if streamed:
+        print(f"[POIAgent] streamed {len(streamed)} POIs")
+        _store_pois(poi, number_of_poi, streamed)
+        return
+
+    try:
+        payload = Codec.loads(parser.text)
+    except Codec.DecodeError as exc:
+        raise ValueError(f"poi_agent_failed: agent_response_not_json: {exc}") from exc
+    poi_model, errors = POIModel.decode(payload, require_images=False)
+    if errors:
+        raise ValueError(f"poi_agent_failed: {'; '.join(errors)}")
+    print(f"[POIAgent] decoded {len(poi_model.items)} POIs after stream")
+    for item in poi_model.items:
+        item.poi.place_id = None
+    _store_pois(poi, number_of_poi, poi_model.to_list())
+    yield from poi_model.items
+
+
+def _request_pois(
+    poi: str,
+    number_of_poi: Optional[int] = None,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> Tuple[Optional[POIModel], Optional[str]]:
+    """Ask the agent, validate, and cache the answer; returns (model, error)."""
     last_error = None
     for attempt in range(1, 2):
-        output_text = _call_poi_agent(poi, number_of_poi=number_of_poi)
+        output_text = _call_poi_agent(
+            poi, number_of_poi=number_of_poi, priority=priority, cancel_token=cancel_token)
         try:
-            items = json.loads(output_text)
-        except json.JSONDecodeError as exc:
+            items = Codec.loads(output_text)
+        except Codec.DecodeError as exc:
             last_error = f"agent_response_not_json: {exc}"
             continue
 
-        print(f"[POIAgent] parsed type={type(items).__name__}, keys={list(items.keys()) if isinstance(items, dict) else 'N/A'}")
-        normalized = POIModel._normalize_input(items)
-        print(f"[POIAgent] normalized={type(normalized).__name__}, len={len(normalized) if normalized else 'None'}")
-
-        errors = POIModel.validate_json(items, require_images=False)
+        poi_model, errors = POIModel.decode(items, require_images=False)
         if errors:
             last_error = "; ".join(errors)
             print(f"[POIAgent] validation errors: {errors}")
             continue
+        print(f"[POIAgent] decoded {len(poi_model.items)} POIs")
+        # Place ids only come from the resolver, never from the LLM.
+        for item in poi_model.items:
+            item.poi.place_id = None
+        _store_pois(poi, number_of_poi, poi_model.to_list())
+        return poi_model, None
+    return None, last_error
+
+
+def refresh_pois(poi: str, number_of_poi: Optional[int] = None) -> Optional[POIModel]:
+    """Re-ask the agent at background priority and replace the cached answer."""
+    poi_model, error = _request_pois(poi, number_of_poi, priority=RequestPriority.BACKGROUND)
+    if poi_model is None:
+        print(f"[POIAgent] refresh failed for '{poi}': {error}")
+    return poi_model
+
+
+def _send_to_poi_agent(
+    poi: str,
+    number_of_poi: Optional[int] = None,
+    images_per_poi: Optional[int] = None,
+    skip_images: bool = False,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> POIModel:
+    poi_model = get_cached_pois(poi, number_of_poi)
+    if poi_model is None:
+        poi_model, last_error = _request_pois(
+            poi, number_of_poi, priority=priority, cancel_token=cancel_token)
+        if poi_model is None:
+            print(f"[POIAgent] validation failed after retries: {last_error}")
+            return {"error": "poi_validation_failed", "details": last_error}
 
-        poi_model = POIModel.from_json(items, require_images=False)
-        if not skip_images:
-            for item in poi_model.items:
-                try:
-                    images = flickr_photo_search(
-                        item.poi.name, per_page=images_per_poi or 10
-                    )
-                    print(f"[POIAgent] flickr images for '{item.poi.name}': {images}")
-                except Exception as exc:
-                    print(f"[POIAgent] flickr error for '{item.poi.name}': {exc}")
+    if not skip_images:
+        for item in poi_model.items:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+                if cancel_token.expired:
+                    # Out of turn budget: the remaining POIs go without images.
                     item.poi.images = []
                     continue
-                urls = images.get("urls") if isinstance(images, dict) else None
-                item.poi.images = urls if isinstance(urls, list) else []
-
-        print("[POIAgent] POI data retrieving successful")
-        return poi_model
+            try:
+                images = flickr_photo_search(
+                    item.poi.name, per_page=images_per_poi or 10,
+                    priority=priority, cancel_token=cancel_token,
+                )
+                print(f"[POIAgent] flickr images for '{item.poi.name}': {images}")
+            except OperationCancelled:
+                raise
+            except Exception as exc:
+                print(f"[POIAgent] flickr error for '{item.poi.name}': {exc}")
+                item.poi.images = []
+                continue
+            urls = images.get("urls") if isinstance(images, dict) else None
+            item.poi.images = urls if isinstance(urls, list) else []
 
-    print(f"[POIAgent] validation failed after retries: {last_error}")
-    return {"error": "poi_validation_failed", "details": last_error}
+    print("[POIAgent] POI data retrieving successful")
+    return poi_model
 
 
 def add_poi(
@@ -104,6 +348,8 @@ def add_poi(
     number_of_poi: Optional[int] = None,
     images_per_poi: Optional[int] = None,
     skip_images: bool = False,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
 ) -> POIModel:
     try:
         existing_model = POIModel.from_json(
@@ -112,32 +358,55 @@ def add_poi(
     except ValueError as exc:
         raise ValueError(str(exc)) from exc
 
-    new_model = _send_to_poi_agent(
-        poi_name, number_of_poi=number_of_poi, images_per_poi=images_per_poi,
-        skip_images=skip_images,
-    )
-    if isinstance(new_model, dict):
-        raise ValueError(f"poi_agent_failed: {new_model}")
+    # Prebuilt destinations are served from disk; the agent only handles misses.
+    new_model = lookup_destination(poi_name, number_of_poi, images_per_poi)
+    if new_model is None:
+        new_model = _send_to_poi_agent(
+            poi_name, number_of_poi=number_of_poi, images_per_poi=images_per_poi,
+            skip_images=skip_images, priority=priority, cancel_token=cancel_token,
+        )
+        if isinstance(new_model, dict):
+            raise ValueError(f"poi_agent_failed: {new_model}")
+        resolve_places(new_model.items, poi_name, cancel_token)
 
     combined = existing_model.items + new_model.items
     return POIModel(combined)
 
 
+def _fetch_image_urls(
+    poi_name: str, images_per_poi: int = 10, cancel_token: Optional[CancelToken] = None
+) -> List[str]:
+    if cancel_token is not None and cancel_token.cancelled:
+        return []
+    try:
+        images = flickr_photo_search(
+            poi_name, per_page=images_per_poi,
+            priority=RequestPriority.PREFETCH, cancel_token=cancel_token,
+        )
+        urls = images.get("urls") if isinstance(images, dict) else []
+        if not isinstance(urls, list):
+            urls = []
+        print(f"[POIAgent] streamed images for '{poi_name}': {len(urls)} urls")
+    except Exception as exc:
+        print(f"[POIAgent] flickr error for '{poi_name}': {exc}")
+        urls = []
+    return urls
+
+
+def start_image_fetch(
+    poi_name: str, images_per_poi: int = 10, cancel_token: Optional[CancelToken] = None
+) -> Future:
+    """Look up a POI's images in the background; the future resolves to a URL list.
+
+    Once ``cancel_token`` fires the lookup resolves to an empty list.
+    """
+    return _image_executor.submit(_fetch_image_urls, poi_name, images_per_poi, cancel_token)
+
+
 def fetch_poi_images_stream(poi_model: POIModel, images_per_poi: int = 10):
     """Generator that yields (poi_name, image_urls) tuples one POI at a time."""
     for item in poi_model.items:
-        try:
-            images = flickr_photo_search(
-                item.poi.name, per_page=images_per_poi
-            )
-            urls = images.get("urls") if isinstance(images, dict) else []
-            if not isinstance(urls, list):
-                urls = []
-            print(f"[POIAgent] streamed images for '{item.poi.name}': {len(urls)} urls")
-        except Exception as exc:
-            print(f"[POIAgent] flickr error for '{item.poi.name}': {exc}")
-            urls = []
-        yield (item.poi.name, urls)
+        yield (item.poi.name, _fetch_image_urls(item.poi.name, images_per_poi))
 
 
 def remove_poi(existing_poi: Any, poi_name: str) -> POIModel:
@@ -1,8 +1,11 @@
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
+from Common import Codec
+from POI.Thumbnails import images_payload
+
 
 class POIType(Enum):
     RESTAURANT = "restaurant"
@@ -30,8 +33,10 @@ class SinglePOI:
     opening_hours: Optional[str] = None
     address: Optional[str] = None
     special_instructions: Optional[str] = None
+    place_id: Optional[str] = None
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, variants: bool = False) -> Dict[str, Any]:
+        """``variants`` adds thumbnail URLs to ``images``; only clients need them."""
         data: Dict[str, Any] = {
             "name": self.name,
             "description": self.description,
@@ -44,8 +49,10 @@ class SinglePOI:
             data["address"] = self.address
         if self.special_instructions:
             data["special_instructions"] = self.special_instructions
+        if self.place_id:
+            data["place_id"] = self.place_id
         if self.images is not None:
-            data["images"] = {"urls": self.images}
+            data["images"] = images_payload(self.images) if variants else {"urls": self.images}
         return data
 
 
@@ -54,8 +61,8 @@ class SinglePOIWithCost:
     poi: SinglePOI
     cost: str = ""
 
-    def to_dict(self) -> Dict[str, Any]:
-        data = self.poi.to_dict()
+    def to_dict(self, variants: bool = False) -> Dict[str, Any]:
+        data = self.poi.to_dict(variants)
         data["cost"] = self.cost
         return data
 
@@ -64,8 +71,11 @@ class POIModel:
     def __init__(self, items: List[SinglePOIWithCost]) -> None:
         self.items = items
 
-    def to_list(self) -> List[Dict[str, Any]]:
-        return [item.to_dict() for item in self.items]
+    def to_list(self, variants: bool = False) -> List[Dict[str, Any]]:
+        return [item.to_dict(variants) for item in self.items]
+
+    def to_json_bytes(self) -> bytes:
+        return Codec.dumps_bytes(self.to_list())
 
     @staticmethod
     def _normalize_input(data: Any) -> Optional[List[Dict[str, Any]]]:
@@ -87,141 +97,130 @@ class POIModel:
         return None
 
     @classmethod
-    def from_json(
+    def decode(
         cls, data: Any, require_images: bool = True, allow_empty: bool = False
-    ) -> "POIModel":
+    ) -> Tuple[Optional["POIModel"], List[str]]:
+        """Validate and build in one traversal.
+
+        Returns ``(model, [])`` on success or ``(None, errors)`` with every
+        problem found, so callers never walk the input twice.
+        """
         items_data = cls._normalize_input(data)
         if items_data is None:
-            raise ValueError("invalid_poi_input")
+            return None, ["invalid_poi_input"]
         if not items_data and not allow_empty:
-            raise ValueError("poi list is empty")
+            return None, ["poi list is empty"]
 
+        errors: List[str] = []
         items: List[SinglePOIWithCost] = []
         for idx, item in enumerate(items_data):
-            if not isinstance(item, dict):
-                raise ValueError(f"items[{idx}] must be an object")
-
-            name = item.get("name")
-            if not isinstance(name, str) or not name:
-                raise ValueError(f"items[{idx}].name is required")
-
-            description = item.get("description")
-            if not isinstance(description, str) or not description:
-                raise ValueError(f"items[{idx}].description is required")
-
-            geo = item.get("geo_coordinate")
-            if not isinstance(geo, dict):
-                raise ValueError(
-                    f"items[{idx}].geo_coordinate must be an object")
-            lat = geo.get("lat")
-            lng = geo.get("lng")
-            if not isinstance(lat, (int, float)):
-                raise ValueError(
-                    f"items[{idx}].geo_coordinate.lat must be a number"
-                )
-            if not isinstance(lng, (int, float)):
-                raise ValueError(
-                    f"items[{idx}].geo_coordinate.lng must be a number"
-                )
-
-            images: Optional[List[str]] = None
-            if "images" in item and isinstance(item["images"], dict):
-                urls = item["images"].get("urls")
-                if isinstance(urls, list):
-                    valid_urls = [
-                        url for url in urls if isinstance(url, str) and _is_valid_url(url)
-                    ]
-                    images = valid_urls
-            if require_images and images is None:
-                raise ValueError(f"items[{idx}].images.urls is required")
-
-            opening_hours = item.get("opening_hours")
-            if opening_hours is not None and not isinstance(opening_hours, str):
-                opening_hours = None
-
-            address = item.get("address")
-            if address is not None and not isinstance(address, str):
-                address = None
-
-            special_instructions = item.get("special_instructions")
-            if special_instructions is not None and not isinstance(
-                special_instructions, str
-            ):
-                special_instructions = None
-
-            poi_type_raw = item.get("poi_type")
-            if poi_type_raw is None:
-                poi_type = POIType.TOURIST_DESTINATION
-            else:
-                try:
-                    poi_type = POIType(poi_type_raw)
-                except ValueError:
-                    poi_type = POIType.TOURIST_DESTINATION
-
-            cost_raw = item.get("cost")
-            cost = cost_raw if isinstance(cost_raw, str) else ""
-
-            items.append(
-                SinglePOIWithCost(
-                    poi=SinglePOI(
-                        name=name,
-                        description=description,
-                        geo_coordinate=GeoCoordinate(lat=lat, lng=lng),
-                        poi_type=poi_type,
-                        images=images,
-                        opening_hours=opening_hours,
-                        address=address,
-                        special_instructions=special_instructions,
-                    ),
-                    cost=cost,
-                )
-            )
-        return cls(items)
+            decoded = _decode_item(item, idx, require_images, errors)
+            if decoded is not None:
+                items.append(decoded)
+        if errors:
+            return None, errors
+        return cls(items), errors
+
+    @classmethod
+    def from_json(
+        cls, data: Any, require_images: bool = True, allow_empty: bool = False
+    ) -> "POIModel":
+        model, errors = cls.decode(data, require_images=require_images, allow_empty=allow_empty)
+        if errors:
+            raise ValueError(errors[0])
+        return model
 
     @classmethod
     def validate_json(
         cls, data: Any, require_images: bool = True, allow_empty: bool = False
     ) -> List[str]:
-        errors: List[str] = []
-        items = cls._normalize_input(data)
-        if items is None:
-            return ["poi must be a list or object with results/poi list"]
-        if not items and not allow_empty:
-            return ["poi list is empty"]
-
-        for idx, item in enumerate(items):
-            if not isinstance(item, dict):
-                errors.append(f"items[{idx}] must be an object")
-                continue
-            name = item.get("name")
-            description = item.get("description")
-            geo = item.get("geo_coordinate")
-            if not isinstance(name, str) or not name:
-                errors.append(f"items[{idx}].name is required")
-            if not isinstance(description, str) or not description:
-                errors.append(f"items[{idx}].description is required")
-            if not isinstance(geo, dict):
-                errors.append(f"items[{idx}].geo_coordinate must be an object")
-            else:
-                lat = geo.get("lat")
-                lng = geo.get("lng")
-                if not isinstance(lat, (int, float)):
-                    errors.append(
-                        f"items[{idx}].geo_coordinate.lat must be a number")
-                if not isinstance(lng, (int, float)):
-                    errors.append(
-                        f"items[{idx}].geo_coordinate.lng must be a number")
-            if require_images:
-                images = item.get("images")
-                if not isinstance(images, dict):
-                    errors.append(f"items[{idx}].images must be an object")
-                else:
-                    urls = images.get("urls")
-                    if not isinstance(urls, list):
-                        errors.append(
-                            f"items[{idx}].images.urls must be an array")
-
-        return errors
+        return cls.decode(data, require_images=require_images, allow_empty=allow_empty)[1]
+
+
+def _decode_item(
+    item: Any, idx: int, require_images: bool, errors: List[str]
+) -> Optional[SinglePOIWithCost]:
+    """Decode one POI, appending any problems to ``errors`` (None if there were any)."""
+    if not isinstance(item, dict):
+        errors.append(f"items[{idx}] must be an object")
+        return None
+    error_count = len(errors)
+
+    name = item.get("name")
+    if not isinstance(name, str) or not name:
+        errors.append(f"items[{idx}].name is required")
+
+    description = item.get("description")
+    if not isinstance(description, str) or not description:
+        errors.append(f"items[{idx}].description is required")
+
+    geo = item.get("geo_coordinate")
+    lat = lng = None
+    if not isinstance(geo, dict):
+        errors.append(f"items[{idx}].geo_coordinate must be an object")
+    else:
+        lat = geo.get("lat")
+        lng = geo.get("lng")
+        if not isinstance(lat, (int, float)):
+            errors.append(f"items[{idx}].geo_coordinate.lat must be a number")
+        if not isinstance(lng, (int, float)):
+            errors.append(f"items[{idx}].geo_coordinate.lng must be a number")
+
+    images: Optional[List[str]] = None
+    images_raw = item.get("images")
+    urls = images_raw.get("urls") if isinstance(images_raw, dict) else None
+    if require_images and not isinstance(urls, list):
+        errors.append(f"items[{idx}].images.urls is required")
+
+    if len(errors) > error_count:
+        return None
+
+    # URLs are only filtered for items that will be built.
+    if isinstance(urls, list):
+        images = [url for url in urls if isinstance(url, str) and _is_valid_url(url)]
+
+    opening_hours = item.get("opening_hours")
+    if opening_hours is not None and not isinstance(opening_hours, str):
+        opening_hours = None
+
+    address = item.get("address")
+    if address is not None and not isinstance(address, str):
+        address = None
+
+    special_instructions = item.get("special_instructions")
+    if special_instructions is not None and not isinstance(special_instructions, str):
+        special_instructions = None
+
+    place_id = item.get("place_id")
+    if place_id is not None and not isinstance(place_id, str):
+        place_id = None
+
+    poi_type_raw = item.get("poi_type")
+    if poi_type_raw is None:
+        poi_type = POIType.TOURIST_DESTINATION
+    else:
+        try:
+            poi_type = POIType(poi_type_raw)
+        except ValueError:
+            poi_type = POIType.TOURIST_DESTINATION
+
+    cost_raw = item.get("cost")
+    cost = cost_raw if isinstance(cost_raw, str) else ""
+
+    return SinglePOIWithCost(
+        poi=SinglePOI(
+            name=name,
+            description=description,
+            geo_coordinate=GeoCoordinate(lat=lat, lng=lng),
+            poi_type=poi_type,
+            images=images,
+            opening_hours=opening_hours,
+            address=address,
+            special_instructions=special_instructions,
+            place_id=place_id,
+        ),
+        cost=cost,
+    )
 
 
 def _is_valid_url(value: str) -> bool:
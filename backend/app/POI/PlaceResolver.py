@@ -0,0 +1,209 @@
+import hashlib
+import math
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from typing import Any, Dict, List, Optional
+
+from Cache import TieredCache
+from Capture import has_recordings
+from Common import CancelToken, metrics, time_budget
+from POI.ImageFetcher import google_text_search_place
+from POI.POIModel import GeoCoordinate, SinglePOIWithCost
+
+PLACE_FIELD_MASK = "places.id,places.displayName,places.formattedAddress,places.location"
+PLACE_RESOLVER_WORKERS = int(os.getenv("PLACE_RESOLVER_WORKERS", "4"))
+PLACE_CACHE_SIZE = int(os.getenv("PLACE_CACHE_SIZE", "2048"))
+PLACE_CACHE_TTL_SECONDS = float(os.getenv("PLACE_CACHE_TTL_SECONDS", str(30 * 86400)))
+# "No match" answers expire sooner so a transient upstream gap doesn't stick.
+PLACE_NEGATIVE_TTL_SECONDS = float(os.getenv("PLACE_NEGATIVE_TTL_SECONDS", "86400"))
+# Searches are biased to a circle around the LLM's coordinates (API max 50 km),
+# and a match farther than PLACE_MAX_DISTANCE_KM from them is not applied.
+PLACE_BIAS_RADIUS_METERS = float(os.getenv("PLACE_BIAS_RADIUS_METERS", "20000"))
+PLACE_MAX_DISTANCE_KM = float(os.getenv("PLACE_MAX_DISTANCE_KM", "25"))
+PLACE_CACHE_DIR = os.getenv(
+    "PLACE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "places"),
+)
+
+# How often resolve_places checks whether the turn was cancelled while it waits.
+_CANCEL_POLL_SECONDS = 0.2
+
+_place_cache = TieredCache(
+    "places", max_entries=PLACE_CACHE_SIZE, ttl_seconds=PLACE_CACHE_TTL_SECONDS,
+    directory=PLACE_CACHE_DIR,
+)
+_executor = ThreadPoolExecutor(
+    max_workers=PLACE_RESOLVER_WORKERS, thread_name_prefix="place-resolver"
+)
+
+
+def place_query(name: str, destination: Optional[str] = None, address: Optional[str] = None) -> str:
+    """Search text: the POI name qualified by its destination (or the LLM's address).
+
+    A bare "Central Park" or "Old Town" matches whichever one Google ranks first.
+    """
+    context = destination or address
+    if context and context.lower() not in name.lower():
+        return f"{name}, {context}"
+    return name
+
+
+def _known(near: Optional[GeoCoordinate]) -> bool:
+    return near is not None and (near.lat, near.lng) != (0, 0)
+
+
+def place_cache_key(query: str, near: Optional[GeoCoordinate] = None) -> str:
+    normalized = " ".join(query.lower().split())
+    if _known(near):
+        # ~11 km cells: the same name near the same spot shares an answer.
+        normalized += f"@{round(near.lat, 1)},{round(near.lng, 1)}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(min(1.0, a)))
+
+
+def resolver_enabled() -> bool:
+    return bool(os.getenv("GOOGLE_MAPS_API_KEY")) or has_recordings("places")
+
+
+def resolve_place(
+    name: str,
+    destination: Optional[str] = None,
+    near: Optional[GeoCoordinate] = None,
+    address: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """Verified place for a POI: ``{place_id, lat, lng, address}`` or None.
+
+    The search is qualified by ``destination`` (or ``address``) and biased
+    towards ``near``, the LLM's coordinates. A match more than
+    PLACE_MAX_DISTANCE_KM from ``near`` is treated as no match. Answers
+    (including "no match") are cached in memory and in the shared tier by
+    query and ~11 km cell. Upstream errors are not cached.
+    """
+    query = place_query(name, destination, address)
+    key = place_cache_key(query, near)
+    cached = _place_cache.get(key)
+    if isinstance(cached, dict):
+        metrics.incr("places.cache_hits")
+        return _near_enough(cached.get("place"), near)
+
+    metrics.incr("places.cache_misses")
+    location_bias = None
+    if _known(near):
+        location_bias = {"circle": {
+            "center": {"latitude": near.lat, "longitude": near.lng},
+            "radius": PLACE_BIAS_RADIUS_METERS,
+        }}
+    response = google_text_search_place(
+        query, field_mask=PLACE_FIELD_MASK, location_bias=location_bias)
+    place = _first_place(response)
+    ttl = PLACE_CACHE_TTL_SECONDS if place is not None else PLACE_NEGATIVE_TTL_SECONDS
+    entry = {"place": place}
+    _place_cache.set(key, entry, ttl_seconds=ttl)
+    return _near_enough(place, near)
+
+
+def _near_enough(
+    place: Optional[Dict[str, Any]], near: Optional[GeoCoordinate]
+) -> Optional[Dict[str, Any]]:
+    if place is None or not _known(near):
+        return place
+    distance = distance_km(near.lat, near.lng, place["lat"], place["lng"])
+    if distance > PLACE_MAX_DISTANCE_KM:
+        print(f"[PlaceResolver] rejected {place['place_id']}: {distance:.0f} km from the POI")
+        metrics.incr("places.rejected_far")
+        return None
+    return place
+
+
+def _first_place(response: Any) -> Optional[Dict[str, Any]]:
+    places = response.get("places") if isinstance(response, dict) else None
+    if not isinstance(places, list) or not places or not isinstance(places[0], dict):
+        return None
+    place = places[0]
+    location = place.get("location") or {}
+    lat = location.get("latitude")
+    lng = location.get("longitude")
+    if not isinstance(place.get("id"), str) or not isinstance(lat, (int, float)) \
+            or not isinstance(lng, (int, float)):
+        return None
+    address = place.get("formattedAddress")
+    return {
+        "place_id": place["id"],
+        "lat": lat,
+        "lng": lng,
+        "address": address if isinstance(address, str) else None,
+    }
+
+
+def start_place_resolution(item: SinglePOIWithCost, destination: Optional[str] = None) -> Future:
+    """Resolve in the background; the future yields the place or None (never raises)."""
+    return _executor.submit(
+        _resolve_quietly, item.poi.name, destination, item.poi.geo_coordinate, item.poi.address)
+
+
+def _resolve_quietly(
+    name: str,
+    destination: Optional[str],
+    near: Optional[GeoCoordinate],
+    address: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    try:
+        return resolve_place(name, destination, near, address)
+    except Exception as exc:
+        print(f"[PlaceResolver] lookup failed for '{name}': {exc}")
+        metrics.incr("places.errors")
+        return None
+
+
+def apply_place(item: SinglePOIWithCost, place: Optional[Dict[str, Any]]) -> bool:
+    """Overwrite LLM-provided location fields with the verified place.
+
+    ``resolve_place`` has already dropped matches far from the LLM's coordinates.
+    """
+    if place is None:
+        return False
+    item.poi.place_id = place["place_id"]
+    item.poi.geo_coordinate = GeoCoordinate(lat=place["lat"], lng=place["lng"])
+    if place.get("address"):
+        item.poi.address = place["address"]
+    return True
+
+
+def resolve_places(
+    items: List[SinglePOIWithCost],
+    destination: Optional[str] = None,
+    cancel_token: Optional[CancelToken] = None,
+) -> int:
+    """Resolve every item without a place id concurrently; returns how many were resolved.
+
+    Items that already carry a ``place_id`` (from an earlier turn) are left as is.
+    A cancelled ``cancel_token`` raises OperationCancelled; once its deadline
+    passes, lookups still running are dropped and those items keep the LLM's
+    location.
+    """
+    if not resolver_enabled():
+        return 0
+    pending = [
+        (item, start_place_resolution(item, destination))
+        for item in items if not item.poi.place_id
+    ]
+    resolved = 0
+    for item, future in pending:
+        while not future.done() and not (cancel_token is not None and cancel_token.expired):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            wait_futures([future], timeout=time_budget(cancel_token, _CANCEL_POLL_SECONDS))
+        if not future.done():
+            future.cancel()
+            metrics.incr("places.dropped")
+            continue
+        resolved += apply_place(item, future.result())
+    print(f"[PlaceResolver] resolved {resolved}/{len(pending)} POIs")
+    return resolved
@@ -0,0 +1,89 @@
+from typing import Any, List
+
+from Common import Codec
+
+
+class POIStreamParser:
+    """Incrementally extracts the elements of the POI array from streamed JSON text.
+
+    Accepts either ``{"pois": [{...}, ...]}`` (any wrapper key: the first
+    array directly inside the top-level object is used) or a bare top-level
+    array. Each element object is decoded as soon as its closing brace
+    arrives; nothing else is parsed until ``text`` is read at the end.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[str] = []
+        self._current: List[str] = []
+        self._stack: List[str] = []
+        self._array_depth = -1
+        self._object_start = -1
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far, for a full-document fallback parse."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume a chunk; return the element objects completed by it."""
+        self._chunks.append(chunk)
+        completed: List[Any] = []
+        segment_start = 0
+        for pos, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if (
+                    char == "["
+                    and self._array_depth < 0
+                    and (not self._stack or self._stack == ["{"])
+                ):
+                    self._array_depth = len(self._stack) + 1
+                elif (
+                    char == "{"
+                    and self._array_depth > 0
+                    and len(self._stack) == self._array_depth
+                ):
+                    self._object_start = pos
+                    segment_start = pos
+                    self._current = []
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if (
+                    char == "}"
+                    and self._object_start >= 0
+                    and len(self._stack) == self._array_depth
+                ):
+                    self._current.append(chunk[segment_start:pos + 1])
+                    completed.extend(self._decode_current())
+                    self._object_start = -1
+                elif char == "]" and len(self._stack) == self._array_depth - 1:
+                    # Target array closed; anything after it is ignored.
+                    self._array_depth = 0
+
+        if self._object_start >= 0:
+            self._current.append(chunk[segment_start:])
+            self._object_start = 0
+        return completed
+
+    def _decode_current(self) -> List[Any]:
+        text = "".join(self._current)
+        self._current = []
+        try:
+            return [Codec.loads(text)]
+        except Codec.DecodeError as exc:
+            print(f"[POIStreamParser] skipping undecodable element: {exc}")
+            return []
@@ -0,0 +1,171 @@
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from Common import RequestPriority, metrics
+from POI.ImageProxy import (
+    IMAGE_PROXY_BASE_URL,
+    get_image_cache,
+    get_image_path,
+    image_id_from_proxy_url,
+)
+
+# Optional dependency. Only its presence is checked here; the import itself
+# happens in the worker processes that render variants.
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+THUMBNAIL_WIDTHS: Tuple[int, ...] = tuple(
+    int(width) for width in os.getenv("THUMBNAIL_WIDTHS", "160,320,800").split(",") if width.strip()
+)
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_MAX_PENDING = int(os.getenv("THUMBNAIL_MAX_PENDING", "256"))
+# Download and render variants as soon as a photo search returns new images,
+# instead of waiting for the first /images request. Only the first few photos
+# of each search (the ones a POI card shows first) and a bounded number at a
+# time; the rest render on their first ?w= request.
+THUMBNAIL_PRERENDER = os.getenv("THUMBNAIL_PRERENDER", "1") != "0"
+THUMBNAIL_PRERENDER_PER_SEARCH = int(os.getenv("THUMBNAIL_PRERENDER_PER_SEARCH", "1"))
+THUMBNAIL_PRERENDER_MAX_PENDING = int(os.getenv("THUMBNAIL_PRERENDER_MAX_PENDING", "32"))
+# Workers are started from a threaded server process; forking it could copy
+# locks held by other threads, so they come from a clean forkserver (or spawn).
+THUMBNAIL_START_METHOD = os.getenv(
+    "THUMBNAIL_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+# Variants are only advertised when they can be both generated and served.
+THUMBNAILS_ENABLED = PILLOW_AVAILABLE and bool(IMAGE_PROXY_BASE_URL) and bool(THUMBNAIL_WIDTHS)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending: set = set()
+_lock = threading.Lock()
+_prerender_executor: Optional[ThreadPoolExecutor] = None
+_prerendering: set = set()
+
+
+def variant_key(image_id: str, width: int) -> str:
+    return f"{image_id}.w{width}.webp"
+
+
+def images_payload(urls: List[str]) -> Dict[str, Any]:
+    """The ``images`` field for a POI: URLs plus, per URL, a width -> variant URL map."""
+    data: Dict[str, Any] = {"urls": urls}
+    if THUMBNAILS_ENABLED:
+        data["variants"] = [
+            {str(width): f"{url}?w={width}" for width in THUMBNAIL_WIDTHS}
+            if image_id_from_proxy_url(url) is not None else {}
+            for url in urls
+        ]
+    return data
+
+
+def schedule_variants(image_id: str, original_path: str) -> None:
+    """Queue variant generation for a cached original; never blocks the caller."""
+    if not THUMBNAILS_ENABLED:
+        return
+    cache = get_image_cache()
+    if all(cache.contains(variant_key(image_id, width)) for width in THUMBNAIL_WIDTHS):
+        return
+    with _lock:
+        if image_id in _pending:
+            return
+        if len(_pending) >= THUMBNAIL_MAX_PENDING:
+            metrics.incr("thumbnails.dropped")
+            return
+        _pending.add(image_id)
+        metrics.set_gauge("thumbnails.pending", len(_pending))
+        future = _get_executor().submit(
+            _render_variants, original_path, THUMBNAIL_WIDTHS, THUMBNAIL_QUALITY)
+    future.add_done_callback(lambda done: _store_variants(image_id, done))
+
+
+def prerender_variants(urls: List[str]) -> None:
+    """Fetch the first proxied ``urls`` and queue their variants, in the background.
+
+    Runs at PREFETCH priority, so the image limiter sheds it before any
+    client request. At most THUMBNAIL_PRERENDER_PER_SEARCH photos per call
+    and THUMBNAIL_PRERENDER_MAX_PENDING overall are prerendered.
+    """
+    if not (THUMBNAILS_ENABLED and THUMBNAIL_PRERENDER):
+        return
+    global _prerender_executor
+    cache = get_image_cache()
+    for url in urls[:THUMBNAIL_PRERENDER_PER_SEARCH]:
+        image_id = image_id_from_proxy_url(url)
+        if image_id is None:
+            continue
+        if cache.contains(variant_key(image_id, THUMBNAIL_WIDTHS[-1])):
+            continue
+        with _lock:
+            if image_id in _prerendering:
+                continue
+            if len(_prerendering) >= THUMBNAIL_PRERENDER_MAX_PENDING:
+                metrics.incr("thumbnails.prerender_dropped")
+                continue
+            _prerendering.add(image_id)
+            if _prerender_executor is None:
+                _prerender_executor = ThreadPoolExecutor(
+                    max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail-prerender")
+            _prerender_executor.submit(_prerender, image_id)
+
+
+def _prerender(image_id: str) -> None:
+    try:
+        schedule_variants(image_id, get_image_path(image_id, RequestPriority.PREFETCH))
+    except Exception as exc:
+        print(f"[Thumbnails] prerender skipped for {image_id}: {exc}")
+        metrics.incr("thumbnails.prerender_failed")
+    finally:
+        with _lock:
+            _prerendering.discard(image_id)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    # Caller holds _lock.
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context(THUMBNAIL_START_METHOD),
+        )
+    return _executor
+
+
+def _store_variants(image_id: str, future: Future) -> None:
+    try:
+        variants = future.result()
+        cache = get_image_cache()
+        for width, data in variants.items():
+            cache.put(variant_key(image_id, width), data)
+        metrics.incr("thumbnails.generated", len(variants))
+    except Exception as exc:
+        print(f"[Thumbnails] failed for {image_id}: {exc}")
+        metrics.incr("thumbnails.failed")
+    finally:
+        with _lock:
+            _pending.discard(image_id)
+            metrics.set_gauge("thumbnails.pending", len(_pending))
+
+
+def _render_variants(path: str, widths: Tuple[int, ...], quality: int) -> Dict[int, bytes]:
+    """Runs in a worker process: decode once, downscale to each width (never upscale)."""
+    from PIL import Image
+
+    with Image.open(path) as source:
+        source.load()
+        image = source.convert("RGB")
+    variants: Dict[int, bytes] = {}
+    for width in sorted(widths, reverse=True):
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            # Each step resizes from the previous (larger) variant, which is cheaper.
+            image = image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+        variants[width] = buffer.getvalue()
+    return variants
@@ -0,0 +1,83 @@
+import hashlib
+import os
+from typing import Any, List, Optional, Tuple
+
+from Cache import TieredCache
+from Common import Codec
+from POI.POIModel import POIModel
+from Planner.PlanOptionModel import PlanOptionModel
+from Planner.RequirementModel import RequirementModel
+
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "256"))
+PLAN_CACHE_TTL_SECONDS = float(os.getenv("PLAN_CACHE_TTL_SECONDS", "86400"))
+PLAN_CACHE_DIR = os.getenv(
+    "PLAN_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "plans"),
+)
+COORDINATE_PRECISION = 5
+
+_plan_cache = TieredCache(
+    "plans", max_entries=PLAN_CACHE_SIZE, ttl_seconds=PLAN_CACHE_TTL_SECONDS,
+    directory=PLAN_CACHE_DIR,
+)
+
+
+def _normalize_text(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+def _canonical_pois(poi_model: POIModel) -> List[Tuple[str, float, float]]:
+    # Only identity fields: images, descriptions and costs don't change the plan input
+    # enough to warrant a new LLM call, and images arrive after the first plan anyway.
+    pois = {
+        (
+            _normalize_text(item.poi.name),
+            round(float(item.poi.geo_coordinate.lat), COORDINATE_PRECISION),
+            round(float(item.poi.geo_coordinate.lng), COORDINATE_PRECISION),
+        )
+        for item in poi_model.items
+    }
+    return sorted(pois)
+
+
+def _canonical_requirements(requirement_model: RequirementModel) -> List[Tuple[str, str]]:
+    requirements = {
+        (item.priority.value, _normalize_text(item.description))
+        for item in requirement_model.items
+    }
+    return sorted(requirements)
+
+
+def plan_cache_key(
+    poi_model: POIModel, requirement_model: RequirementModel, model_name: str
+) -> str:
+    canonical = {
+        "model": model_name,
+        "pois": _canonical_pois(poi_model),
+        "requirements": _canonical_requirements(requirement_model),
+    }
+    encoded = Codec.dumps_canonical(canonical)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def get_cached_plan(key: str) -> Optional[PlanOptionModel]:
+    data: Any = _plan_cache.get(key)
+    if data is None:
+        return None
+    try:
+        return PlanOptionModel.from_json(data)
+    except ValueError as exc:
+        print(f"[PlanCache] dropping unreadable entry {key}: {exc}")
+        _plan_cache.delete(key)
+        return None
+
+
+def store_plan(key: str, plan_model: PlanOptionModel) -> None:
+    if not plan_model.items:
+        # Empty results are parse failures, not answers.
+        return
+    _plan_cache.set(key, plan_model.to_list())
+
+
+def clear_plan_cache() -> None:
+    _plan_cache.clear()
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from Common import Codec
 from POI.POIModel import SinglePOIWithCost, POIModel
 
 # Example valid input for from_json:
@@ -156,6 +157,9 @@ class PlanOptionModel:
     def to_list(self) -> List[Dict[str, Any]]:
         return [item.to_dict() for item in self.items]
 
+    def to_json_bytes(self) -> bytes:
+        return Codec.dumps_bytes(self.to_list())
+
     @staticmethod
     def _normalize_input(data: Any) -> Optional[List[Dict[str, Any]]]:
         if isinstance(data, list):
@@ -167,76 +171,96 @@ class PlanOptionModel:
         return None
 
     @classmethod
-    def from_json(cls, data: Any, allow_empty: bool = False) -> "PlanOptionModel":
+    def decode(
+        cls, data: Any, allow_empty: bool = False
+    ) -> Tuple[Optional["PlanOptionModel"], List[str]]:
+        """Validate and build in one traversal: ``(model, [])`` or ``(None, errors)``."""
         options_data = cls._normalize_input(data)
         if options_data is None:
-            raise ValueError("invalid_plan_option_input")
+            return None, ["invalid_plan_option_input"]
         if not options_data and not allow_empty:
-            raise ValueError("options list is empty")
+            return None, ["options list is empty"]
 
+        errors: List[str] = []
         items: List[SinglePlanOption] = []
         for idx, option in enumerate(options_data):
-            items.append(_parse_option(option, idx))
-        return cls(items)
+            decoded = _decode_option(option, idx, errors)
+            if decoded is not None:
+                items.append(decoded)
+        if errors:
+            return None, errors
+        return cls(items), errors
 
     @classmethod
-    def validate_json(cls, data: Any, allow_empty: bool = False) -> List[str]:
-        errors: List[str] = []
-        options = cls._normalize_input(data)
-        if options is None:
-            return ["options must be a list or object with options list"]
-        if not options and not allow_empty:
-            return ["options list is empty"]
+    def from_json(cls, data: Any, allow_empty: bool = False) -> "PlanOptionModel":
+        model, errors = cls.decode(data, allow_empty=allow_empty)
+        if errors:
+            raise ValueError(errors[0])
+        return model
 
-        for idx, option in enumerate(options):
-            errors.extend(_validate_option(option, idx))
-        return errors
+    @classmethod
+    def validate_json(cls, data: Any, allow_empty: bool = False) -> List[str]:
+        return cls.decode(data, allow_empty=allow_empty)[1]
 
 
 # ---------------------------------------------------------------------------
-# Parsing helpers (from_json path – raise on first error)
+# Decoding helpers – each appends problems to ``errors`` and returns None if
+# its subtree had any, so one pass both validates and builds.
 # ---------------------------------------------------------------------------
 
 
-def _parse_option(option: Any, idx: int) -> SinglePlanOption:
+def _decode_option(option: Any, idx: int, errors: List[str]) -> Optional[SinglePlanOption]:
     if not isinstance(option, dict):
-        raise ValueError(f"options[{idx}] must be an object")
+        errors.append(f"options[{idx}] must be an object")
+        return None
+    error_count = len(errors)
 
     overall_cost = option.get("overall_cost")
     if not isinstance(overall_cost, str) or not overall_cost:
-        raise ValueError(f"options[{idx}].overall_cost is required")
+        errors.append(f"options[{idx}].overall_cost is required")
 
     general_notes = option.get("general_notes")
     if not isinstance(general_notes, str) or not general_notes:
-        raise ValueError(f"options[{idx}].general_notes is required")
+        errors.append(f"options[{idx}].general_notes is required")
 
+    days: List[Day] = []
     days_data = option.get("days")
     if not isinstance(days_data, list) or not days_data:
-        raise ValueError(f"options[{idx}].days must be a non-empty list")
-
-    days: List[Day] = []
-    for d_idx, day_data in enumerate(days_data):
-        days.append(_parse_day(day_data, idx, d_idx))
+        errors.append(f"options[{idx}].days must be a non-empty list")
+    else:
+        for d_idx, day_data in enumerate(days_data):
+            day = _decode_day(day_data, idx, d_idx, errors)
+            if day is not None:
+                days.append(day)
 
+    if len(errors) > error_count:
+        return None
     return SinglePlanOption(days=days, overall_cost=overall_cost, general_notes=general_notes)
 
 
-def _parse_day(day_data: Any, opt_idx: int, day_idx: int) -> Day:
+def _decode_day(day_data: Any, opt_idx: int, day_idx: int, errors: List[str]) -> Optional[Day]:
     prefix = f"options[{opt_idx}].days[{day_idx}]"
     if not isinstance(day_data, dict):
-        raise ValueError(f"{prefix} must be an object")
+        errors.append(f"{prefix} must be an object")
+        return None
+    error_count = len(errors)
 
     highlight = day_data.get("highlight")
     if not isinstance(highlight, str) or not highlight:
-        raise ValueError(f"{prefix}.highlight is required")
+        errors.append(f"{prefix}.highlight is required")
 
+    blocks: List[Block] = []
     blocks_data = day_data.get("blocks")
     if not isinstance(blocks_data, list) or not blocks_data:
-        raise ValueError(f"{prefix}.blocks must be a non-empty list")
+        errors.append(f"{prefix}.blocks must be a non-empty list")
+    else:
+        for b_idx, block_data in enumerate(blocks_data):
+            block = _decode_block(block_data, opt_idx, day_idx, b_idx, errors)
+            if block is not None:
+                blocks.append(block)
 
-    blocks: List[Block] = []
-    for b_idx, block_data in enumerate(blocks_data):
-        blocks.append(_parse_block(block_data, opt_idx, day_idx, b_idx))
+    if len(errors) > error_count:
+        return None
 
     lodging = day_data.get("lodging")
     if lodging is not None and not isinstance(lodging, str):
@@ -245,38 +269,50 @@ def _parse_day(day_data: Any, opt_idx: int, day_idx: int) -> Day:
     return Day(highlight=highlight, blocks=blocks, lodging=lodging)
 
 
-def _parse_block(block_data: Any, opt_idx: int, day_idx: int, block_idx: int) -> Block:
+def _decode_block(
+    block_data: Any, opt_idx: int, day_idx: int, block_idx: int, errors: List[str]
+) -> Optional[Block]:
     prefix = f"options[{opt_idx}].days[{day_idx}].blocks[{block_idx}]"
     if not isinstance(block_data, dict):
-        raise ValueError(f"{prefix} must be an object")
+        errors.append(f"{prefix} must be an object")
+        return None
+    error_count = len(errors)
 
     time = block_data.get("time")
     if not isinstance(time, str) or not time:
-        raise ValueError(f"{prefix}.time is required")
+        errors.append(f"{prefix}.time is required")
 
     description = block_data.get("description")
     if not isinstance(description, str) or not description:
-        raise ValueError(f"{prefix}.description is required")
+        errors.append(f"{prefix}.description is required")
 
     pois: Optional[List[SinglePOIWithCost]] = None
     pois_data = block_data.get("pois")
     if pois_data is not None:
         if not isinstance(pois_data, list):
-            raise ValueError(f"{prefix}.pois must be a list")
-        poi_model = POIModel.from_json(pois_data, require_images=False, allow_empty=True)
-        pois = poi_model.items
+            errors.append(f"{prefix}.pois must be a list")
+        else:
+            poi_model, poi_errors = POIModel.decode(
+                pois_data, require_images=False, allow_empty=True)
+            if poi_model is not None:
+                pois = poi_model.items
+            for err in poi_errors:
+                errors.append(f"{prefix}.pois: {err}")
 
     transportation: Optional[Transportation] = None
     transport_data = block_data.get("transportation")
     if transport_data is not None:
-        transportation = _parse_transportation(transport_data, prefix)
+        transportation = _decode_transportation(transport_data, prefix, errors)
 
+    if len(errors) > error_count:
+        return None
     return Block(time=time, description=description, pois=pois, transportation=transportation)
 
 
-def _parse_transportation(data: Any, prefix: str) -> Transportation:
+def _decode_transportation(data: Any, prefix: str, errors: List[str]) -> Optional[Transportation]:
     if not isinstance(data, dict):
-        raise ValueError(f"{prefix}.transportation must be an object")
+        errors.append(f"{prefix}.transportation must be an object")
+        return None
 
     duration_raw = data.get("duration")
     duration = duration_raw if isinstance(duration_raw, str) and duration_raw else None
@@ -288,98 +324,8 @@ def _parse_transportation(data: Any, prefix: str) -> Transportation:
     cost_raw = data.get("cost")
     if cost_raw is not None:
         if not isinstance(cost_raw, (int, float)):
-            raise ValueError(f"{prefix}.transportation.cost must be a number")
+            errors.append(f"{prefix}.transportation.cost must be a number")
+            return None
         cost = cost_raw
 
     return Transportation(duration=duration, method=method, cost=cost)
-
-
-# ---------------------------------------------------------------------------
-# Validation helpers (validate_json path – collect all errors)
-# ---------------------------------------------------------------------------
-
-
-def _validate_option(option: Any, idx: int) -> List[str]:
-    errors: List[str] = []
-    if not isinstance(option, dict):
-        return [f"options[{idx}] must be an object"]
-
-    overall_cost = option.get("overall_cost")
-    if not isinstance(overall_cost, str) or not overall_cost:
-        errors.append(f"options[{idx}].overall_cost is required")
-
-    general_notes = option.get("general_notes")
-    if not isinstance(general_notes, str) or not general_notes:
-        errors.append(f"options[{idx}].general_notes is required")
-
-    days_data = option.get("days")
-    if not isinstance(days_data, list) or not days_data:
-        errors.append(f"options[{idx}].days must be a non-empty list")
-    else:
-        for d_idx, day_data in enumerate(days_data):
-            errors.extend(_validate_day(day_data, idx, d_idx))
-
-    return errors
-
-
-def _validate_day(day_data: Any, opt_idx: int, day_idx: int) -> List[str]:
-    errors: List[str] = []
-    prefix = f"options[{opt_idx}].days[{day_idx}]"
-    if not isinstance(day_data, dict):
-        return [f"{prefix} must be an object"]
-
-    highlight = day_data.get("highlight")
-    if not isinstance(highlight, str) or not highlight:
-        errors.append(f"{prefix}.highlight is required")
-
-    blocks_data = day_data.get("blocks")
-    if not isinstance(blocks_data, list) or not blocks_data:
-        errors.append(f"{prefix}.blocks must be a non-empty list")
-    else:
-        for b_idx, block_data in enumerate(blocks_data):
-            errors.extend(_validate_block(block_data, opt_idx, day_idx, b_idx))
-
-    return errors
-
-
-def _validate_block(block_data: Any, opt_idx: int, day_idx: int, block_idx: int) -> List[str]:
-    errors: List[str] = []
-    prefix = f"options[{opt_idx}].days[{day_idx}].blocks[{block_idx}]"
-    if not isinstance(block_data, dict):
-        return [f"{prefix} must be an object"]
-
-    time = block_data.get("time")
-    if not isinstance(time, str) or not time:
-        errors.append(f"{prefix}.time is required")
-
-    description = block_data.get("description")
-    if not isinstance(description, str) or not description:
-        errors.append(f"{prefix}.description is required")
-
-    pois_data = block_data.get("pois")
-    if pois_data is not None:
-        if not isinstance(pois_data, list):
-            errors.append(f"{prefix}.pois must be a list")
-        else:
-            poi_errors = POIModel.validate_json(
-                pois_data, require_images=False, allow_empty=True)
-            for err in poi_errors:
-                errors.append(f"{prefix}.pois: {err}")
-
-    transport_data = block_data.get("transportation")
-    if transport_data is not None:
-        errors.extend(_validate_transportation(transport_data, prefix))
-
-    return errors
-
-
-def _validate_transportation(data: Any, prefix: str) -> List[str]:
-    errors: List[str] = []
-    if not isinstance(data, dict):
-        return [f"{prefix}.transportation must be an object"]
-
-    cost = data.get("cost")
-    if cost is not None and not isinstance(cost, (int, float)):
-        errors.append(f"{prefix}.transportation.cost must be a number")
-
-    return errors
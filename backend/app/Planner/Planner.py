@@ -1,15 +1,29 @@
-import json
+import hashlib
 import os
 from typing import Optional
 
-from openai import OpenAI
-
+from Capture import recorded_call
+from Common import (
+    OPENAI_CALL_SITES,
+    SINGLEFLIGHT_TIMEOUT_SECONDS,
+    CancelToken,
+    Codec,
+    OperationCancelled,
+    RequestPriority,
+    SingleFlight,
+    check_cancelled,
+    estimate_tokens,
+    get_client,
+    get_limiter,
+    time_budget,
+)
 from POI.POIModel import POIModel
 from Planner.RequirementModel import RequirementModel
 from Planner.PlanOptionModel import PlanOptionModel
+from Planner.PlanCache import get_cached_plan, plan_cache_key, store_plan
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
-_openai_client = OpenAI()  # reads OPENAI_API_KEY from env
+_planner_flight = SingleFlight("planner_agent")
 
 PLANNER_SYSTEM_PROMPT = """\
 You are a travel itinerary planner. Given a list of POIs and requirements, generate detailed day-by-day itinerary options.
@@ -35,6 +49,7 @@ Return a JSON object with an "options" array. Each option has:
 Rules:
 - Generate 2-3 itinerary options with different styles (e.g. budget, balanced, premium).
 - Respect all requirements (budget, duration, preferences).
+- "constraints", when present, holds the budget, trip length in days and dates read from the requirements; treat them as hard limits.
 - Schedule POIs logically by proximity and opening hours.
 - Include meals, rest, and travel time between locations.
 - Use the provided POIs; do not invent new ones unless needed for meals or lodging.
@@ -46,35 +61,115 @@ def plan(
     poi_model: POIModel,
     requirement_model: RequirementModel,
     existing_plan: Optional[PlanOptionModel] = None,
+    use_cache: bool = True,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
 ) -> PlanOptionModel:
+    # The cache key deliberately ignores existing_plan: a plan generated for the
+    # same POIs + requirements is a valid answer regardless of the previous one,
+    # which is what lets "toggle a requirement off and back on" hit the cache.
+    cache_key = plan_cache_key(poi_model, requirement_model, OPENAI_MODEL)
+    if use_cache:
+        cached = cached_plan(poi_model, requirement_model)
+        if cached is not None:
+            print(f"[Planner] plan cache hit: {cache_key}")
+            return cached
+
     payload = {
         "poi": poi_model.to_list(),
         "requirements": requirement_model.to_list(),
     }
+    constraints = requirement_model.constraints().to_dict()
+    if constraints:
+        payload["constraints"] = constraints
     if existing_plan is not None:
         payload["options"] = existing_plan.to_list()
 
-    message = json.dumps(payload, ensure_ascii=True)
-    print(f"[Planner] sending to agent: {message}")
-    output_text = _call_planner_agent(message)
-    print(f"[Planner] raw response: {output_text}")
+    message = Codec.dumps(payload)
+    print(f"[Planner] sending to agent: {len(message)} chars")
+    output_text = _call_planner_agent(message, priority, cancel_token)
+    print(f"[Planner] raw response: {len(output_text)} chars")
 
     try:
-        response_data = json.loads(output_text)
-        return PlanOptionModel.from_json(response_data)
-    except (json.JSONDecodeError, ValueError) as exc:
+        response_data = Codec.loads(output_text)
+        plan_model = PlanOptionModel.from_json(response_data)
+    except ValueError as exc:
         print(f"[Planner] failed to parse response: {exc}")
         return PlanOptionModel(items=[])
 
+    store_plan(cache_key, plan_model)
+    return plan_model
+
+
+def cached_plan(
+    poi_model: POIModel, requirement_model: RequirementModel
+) -> Optional[PlanOptionModel]:
+    """The cached plan for these POIs and requirements, without calling the agent."""
+    return get_cached_plan(plan_cache_key(poi_model, requirement_model, OPENAI_MODEL))
 
-def _call_planner_agent(message: str) -> str:
-    response = _openai_client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {"role": "system", "content": PLANNER_SYSTEM_PROMPT},
-            {"role": "user", "content": message},
-        ],
-        response_format={"type": "json_object"},
-        temperature=0.7,
+
+def _call_planner_agent(
+    message: str,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> str:
+    key = (OPENAI_MODEL, hashlib.sha256(message.encode("utf-8")).hexdigest())
+    return _planner_flight.do(
+        key,
+        lambda: recorded_call(
+            "planner", message,
+            lambda: _call_planner_agent_upstream(message, priority, cancel_token),
+            cancel_token,
+        ),
+        timeout=SINGLEFLIGHT_TIMEOUT_SECONDS,
+        cancel_token=cancel_token,
     )
-    return response.choices[0].message.content or ""
+
+
+def _call_planner_agent_upstream(
+    message: str,
+    priority: RequestPriority = RequestPriority.INTERACTIVE,
+    cancel_token: Optional[CancelToken] = None,
+) -> str:
+    # Streamed so a cancelled turn can close the connection mid-generation
+    # instead of paying for (and waiting on) the rest of a long plan.
+    tokens = estimate_tokens(PLANNER_SYSTEM_PROMPT, message, completion_tokens=6000)
+    parts = []
+    limiter = get_limiter("openai")
+    with limiter.acquire(priority=priority, tokens=tokens, cancel_token=cancel_token) as permit:
+        timeout_option = {}
+        if cancel_token is not None and cancel_token.deadline is not None:
+            # The turn deadline can shorten the call site's timeout, never lengthen it.
+            timeout_option["timeout"] = time_budget(cancel_token, OPENAI_CALL_SITES["planner"][0])
+        stream = get_client("openai.planner").chat.completions.create(
+            **timeout_option,
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": PLANNER_SYSTEM_PROMPT},
+                {"role": "user", "content": message},
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        unregister = cancel_token.on_cancel(stream.close) if cancel_token is not None else None
+        try:
+            for chunk in stream:
+                check_cancelled(cancel_token)
+                if chunk.usage is not None:
+                    permit.record_tokens(chunk.usage.total_tokens)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+        except Exception as exc:
+            if cancel_token is not None and cancel_token.cancelled and not isinstance(
+                    exc, OperationCancelled):
+                raise OperationCancelled(cancel_token.reason) from exc
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+            stream.close()
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    return "".join(parts)
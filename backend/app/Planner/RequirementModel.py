@@ -1,6 +1,10 @@
-from dataclasses import dataclass
+import difflib
+import re
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from Common import Codec
 
 
 class Priority(Enum):
@@ -9,11 +13,161 @@ class Priority(Enum):
     AVOID = "avoid"
 
 
+# Fuzzy removal: a needle matches a requirement when all of its words are
+# in it and either name something specific ("park") or cover at least this
+# share of its words, or when the whole descriptions are this similar.
+MIN_WORD_COVERAGE = 0.5
+MIN_SIMILARITY = 0.85
+
+_STOPWORDS = frozenset(
+    "a an and any at avoid be for i in it is my no not of on or our please prefer "
+    "preferred should the to want we with".split()
+)
+# Words that don't narrow a budget or length to part of the trip: "Total
+# budget $3000" and "3 day trip" are about the whole trip, "Flights under
+# $800" and "Spend 2 days in Kyoto" are not.
+_TRIP_WORDS = frozenset(
+    "about above around at below budget cap cost costs day days duration entire exactly "
+    "have holiday itinerary just keep least length less limit long max maximum more most "
+    "must need night nights only over overall plan spend spending stay than total travel "
+    "trip under up vacation week weeks whole within".split()
+)
+_CURRENCIES = {
+    "$": "USD", "usd": "USD", "dollar": "USD", "dollars": "USD",
+    "€": "EUR", "eur": "EUR", "euro": "EUR", "euros": "EUR",
+    "£": "GBP", "gbp": "GBP", "pound": "GBP", "pounds": "GBP",
+    "¥": "JPY", "jpy": "JPY", "yen": "JPY",
+}
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fourteen": 14,
+}
+_MONTHS = {
+    name: number for number, names in enumerate((
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"),
+        ("dec", "december"),
+    ), 1) for name in names
+}
+
+_COUNT = r"\b(\d+|" + "|".join(_NUMBER_WORDS) + r")"
+_DURATION_RE = re.compile(_COUNT + r"[\s-]*(day|night|week)s?\b")
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?)\s*(k)?"
+_BUDGET_RE = re.compile(
+    r"([$€£¥]|\b(?:usd|eur|gbp|jpy)\b)\s*" + _AMOUNT + r"\b"
+    r"|\b" + _AMOUNT + r"\s*([$€£¥]|(?:usd|eur|gbp|jpy|dollars?|euros?|pounds?|yen)\b)"
+)
+# "$100 per day", "€50/night", "100 USD a person", "daily budget of $80": not a trip total.
+_PER_UNIT_AFTER_RE = re.compile(
+    r"\s*(?:per|a|an|each|/)\s*(?:day|night|person|pp|head|meal|week|hour|ticket|room)s?\b"
+    r"|\s*(?:pp|p\.p\.)(?!\w)"
+)
+_PER_UNIT_BEFORE_RE = re.compile(r"\b(?:daily|nightly|per[- ](?:day|night|person))\b[\w\s]{0,20}$")
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_MONTH = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_DAY_MONTH_RE = re.compile(
+    r"\b(?:(\d{1,2})(?:st|nd|rd|th)?\s+(" + _MONTH + r")\b\.?"
+    r"|(" + _MONTH + r")\b\.?\s+(\d{1,2})(?:st|nd|rd|th)?\b)(?:,?\s+(\d{4}))?"
+)
+
+
+def normalize_description(description: str) -> str:
+    """Index key: case, punctuation and thousands separators don't matter."""
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", description.casefold())
+    return " ".join(re.findall(r"[$€£¥]?\w+(?:\.\d+)?", text))
+
+
+def _content_words(key: str) -> set:
+    return {word for word in key.split() if word not in _STOPWORDS}
+
+
+def _specific_words(words: set) -> set:
+    """Words naming a thing or place, not a number, currency or trip-size word."""
+    return {
+        word for word in words
+        if word not in _TRIP_WORDS and word not in _NUMBER_WORDS and word not in _CURRENCIES
+        and not any(char.isdigit() for char in word)
+    }
+
+
+@dataclass
+class Constraints:
+    """Typed values read from requirement text; None or empty when not stated."""
+
+    duration_days: Optional[int] = None
+    budget_amount: Optional[float] = None
+    budget_currency: Optional[str] = None
+    dates: List[str] = field(default_factory=list)  # ISO dates, "--MM-DD" without a year
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            name: value for name, value in (
+                ("duration_days", self.duration_days),
+                ("budget_amount", self.budget_amount),
+                ("budget_currency", self.budget_currency),
+                ("dates", self.dates),
+            ) if value
+        }
+
+
+def _count(raw: str) -> int:
+    return int(raw) if raw.isdigit() else _NUMBER_WORDS[raw]
+
+
+def _amount(digits: str, thousands: Optional[str]) -> float:
+    amount = float(digits.replace(",", ""))
+    return amount * 1000 if thousands else amount
+
+
+def _iso_date(year: Optional[str], month: int, day: str) -> Optional[str]:
+    if not 1 <= int(day) <= 31:
+        return None
+    return f"{year}-{month:02d}-{int(day):02d}" if year else f"--{month:02d}-{int(day):02d}"
+
+
+def extract_constraints(description: str) -> Constraints:
+    text = description.casefold()
+    constraints = Constraints()
+    duration = _DURATION_RE.search(text)
+    if duration:
+        count, unit = _count(duration.group(1)), duration.group(2)
+        # "4 nights" is a 5-day trip
+        constraints.duration_days = count * 7 if unit == "week" else count + (unit == "night")
+    for budget in _BUDGET_RE.finditer(text):
+        if _PER_UNIT_AFTER_RE.match(text, budget.end()) or \
+                _PER_UNIT_BEFORE_RE.search(text[:budget.start()]):
+            continue
+        if budget.group(1):
+            symbol, digits, thousands = budget.group(1), budget.group(2), budget.group(3)
+        else:
+            digits, thousands, symbol = budget.group(4), budget.group(5), budget.group(6)
+        constraints.budget_amount = _amount(digits, thousands)
+        constraints.budget_currency = _CURRENCIES[symbol.strip()]
+        break
+    for match in _ISO_DATE_RE.finditer(text):
+        date = _iso_date(match.group(1), int(match.group(2)), match.group(3))
+        if date and 1 <= int(match.group(2)) <= 12:
+            constraints.dates.append(date)
+    for match in _DAY_MONTH_RE.finditer(text):
+        day, month = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+        date = _iso_date(match.group(5), _MONTHS[month], day)
+        if date:
+            constraints.dates.append(date)
+    return constraints
+
+
 @dataclass
 class Requirement:
     description: str
     priority: Priority
 
+    def __post_init__(self) -> None:
+        self.key = normalize_description(self.description)
+        self.constraints = extract_constraints(self.description)
+        # A budget or length for the whole trip rather than one part of it.
+        self.trip_level = not _specific_words(_content_words(self.key))
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "description": self.description,
@@ -40,12 +194,162 @@ class Requirement:
 
 
 class RequirementModel:
+    """Requirements indexed by normalized description.
+
+    Duplicates keep the first. ``add`` can also replace the requirement
+    setting the trip's total budget or length; building a model (``from_json``)
+    never does, so client state comes back as it was sent.
+    """
+
     def __init__(self, items: List[Requirement]) -> None:
-        self.items = items
+        self.items: List[Requirement] = []
+        self._index: Dict[str, Requirement] = {}
+        for item in items:
+            self._insert(item, replace=False)
+
+    def __contains__(self, description: str) -> bool:
+        return normalize_description(description) in self._index
+
+    def add(self, description: str, priority: Priority = Priority.PREFERRED) -> bool:
+        """Add a requirement unless it's already there; False for a duplicate.
+
+        Besides the same normalized text, a rewording that states the same
+        budget, length or dates ("under $3,000" after "Budget under $3000")
+        counts as a duplicate. Either way the existing priority is kept.
+
+        A new total budget or trip length ("under $5000" after "Budget under
+        $3000", "5 day trip" after "3 day trip") takes the old one's place,
+        so the planner never sees two contradicting limits. Scoped amounts
+        ("Flights under $800", "Spend 2 days in Kyoto") are added alongside.
+        """
+        return self._insert(Requirement(description=description, priority=priority), replace=True)
+
+    def _insert(self, item: Requirement, replace: bool) -> bool:
+        if self._duplicate_of(item) is not None:
+            return False
+        replaced = self._conflicting(item) if replace else None
+        if replaced is not None:
+            self._index.pop(replaced.key, None)
+            self.items[next(idx for idx, other in enumerate(self.items) if other is replaced)] = item
+        else:
+            self.items.append(item)
+        self._index[item.key] = item
+        return True
+
+    def _conflicting(self, item: Requirement) -> Optional[Requirement]:
+        if item.priority == Priority.AVOID or not item.trip_level:
+            return None
+        found = item.constraints
+        for other in self.items:
+            if other.priority == Priority.AVOID or not other.trip_level:
+                continue
+            if found.budget_amount and other.constraints.budget_amount:
+                return other
+            if found.duration_days and other.constraints.duration_days:
+                return other
+        return None
+
+    def _duplicate_of(self, item: Requirement) -> Optional[Requirement]:
+        existing = self._index.get(item.key)
+        typed = item.constraints.to_dict()
+        if existing is not None or not typed:
+            return existing
+        words = _content_words(item.key)
+        for other in self.items:
+            if other.constraints.to_dict() != typed:
+                continue
+            other_words = _content_words(other.key)
+            if words <= other_words or other_words <= words:
+                return other
+        return None
+
+    def remove(self, description: str) -> List[Requirement]:
+        """Remove the requirements ``description`` refers to; returns them.
+
+        An exact (normalized) match wins. Otherwise the closest requirements
+        whose words contain all of the description's (see MIN_WORD_COVERAGE,
+        MIN_SIMILARITY) go, so "hostels" removes "Avoid staying in hostels"
+        and "park" removes "Must visit at least one national park", but "day"
+        doesn't remove "3 day trip". Failing that, a description
+        naming a budget, duration or dates removes the requirements that set it.
+        """
+        key = normalize_description(description)
+        if key in self._index:
+            removed = [self._index[key]]
+        else:
+            removed = self._closest(key) or self._by_constraint(key)
+        self._discard(removed)
+        return removed
+
+    def constraints(self) -> Constraints:
+        """The trip's typed constraints.
+
+        For budget and length the latest whole-trip requirement wins; scoped
+        ones ("Spend 2 days in Kyoto") only count when nothing else sets it.
+        """
+        merged = Constraints()
+        ordered = [item for item in self.items if not item.trip_level] + [
+            item for item in self.items if item.trip_level]
+        for item in ordered:
+            if item.priority == Priority.AVOID:
+                continue
+            found = item.constraints
+            if found.duration_days:
+                merged.duration_days = found.duration_days
+            if found.budget_amount:
+                merged.budget_amount = found.budget_amount
+                merged.budget_currency = found.budget_currency
+            merged.dates.extend(date for date in found.dates if date not in merged.dates)
+        merged.dates.sort(key=lambda date: date.lstrip("-"))
+        return merged
+
+    def _discard(self, items: List[Requirement]) -> None:
+        if not items:
+            return
+        for item in items:
+            self._index.pop(item.key, None)
+        gone = {id(item) for item in items}
+        self.items = [item for item in self.items if id(item) not in gone]
+
+    def _closest(self, key: str) -> List[Requirement]:
+        needle = _content_words(key)
+        best: Tuple[float, List[Requirement]] = (0.0, [])
+        for item in self.items:
+            words = _content_words(item.key)
+            score = difflib.SequenceMatcher(None, key, item.key).ratio()
+            if score < MIN_SIMILARITY:
+                if not needle or not needle <= words:
+                    continue
+                # "park" names what to drop; "day" alone is too vague to.
+                if len(needle) / len(words) < MIN_WORD_COVERAGE and not _specific_words(needle):
+                    continue
+                score = len(needle) / len(words)
+            if score > best[0]:
+                best = (score, [item])
+            elif score == best[0]:
+                best[1].append(item)
+        return best[1]
+
+    def _by_constraint(self, key: str) -> List[Requirement]:
+        words = set(key.split())
+        wanted = extract_constraints(key)
+        budget = bool(wanted.budget_amount) or bool(words & {"budget", "cost", "price", "spend"})
+        duration = bool(wanted.duration_days) or bool(
+            words & {"duration", "length", "days", "nights", "weeks", "long"})
+        dates = bool(wanted.dates) or bool(words & {"date", "dates", "when"})
+        return [
+            item for item in self.items
+            if (budget and item.constraints.budget_amount)
+            or (duration and item.constraints.duration_days)
+            or (dates and item.constraints.dates)
+        ]
 
     def to_list(self) -> List[Dict[str, Any]]:
         return [item.to_dict() for item in self.items]
 
+    def to_json_bytes(self) -> bytes:
+        return Codec.dumps_bytes(self.to_list())
+
     @staticmethod
     def _normalize_input(data: Any) -> Optional[List[Dict[str, Any]]]:
         if isinstance(data, list):
@@ -92,14 +396,20 @@ class RequirementModel:
 
         return cls(items)
 
+    @staticmethod
+    def add_requirement(
+        existing_model: "RequirementModel", description: str,
+        priority: Priority = Priority.PREFERRED,
+    ) -> "RequirementModel":
+        updated = RequirementModel(existing_model.items)
+        updated.add(description, priority)
+        return updated
+
     @staticmethod
     def remove_requirement(existing_model: "RequirementModel", description: str) -> "RequirementModel":
-        needle = description.lower()
-        filtered = [
-            item for item in existing_model.items
-            if needle not in item.description.lower()
-        ]
-        return RequirementModel(filtered)
+        updated = RequirementModel(existing_model.items)
+        updated.remove(description)
+        return updated
 
     @classmethod
     def validate_json(cls, data: Any, allow_empty: bool = False) -> List[str]:
@@ -1 +1 @@
-from .Planner import plan
+from .Planner import cached_plan, plan
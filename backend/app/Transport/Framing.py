@@ -0,0 +1,88 @@
+import zlib
+from typing import Any, Dict, Optional, Union
+
+from Common import Codec
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+# Listed in order of server preference.
+SUPPORTED_ENCODINGS = ("msgpack", "json") if msgpack is not None else ("json",)
+SUPPORTED_COMPRESSIONS = ("deflate",)
+
+Frame = Union[str, bytes]
+
+
+class FrameCodec:
+    """Encodes outgoing frames for one connection.
+
+    ``json`` without compression produces text frames (the default protocol);
+    every other combination produces binary frames. ``deflate`` is a raw
+    DEFLATE stream with context takeover, flushed per frame, which mirrors
+    permessage-deflate for clients whose WebSocket library can't negotiate
+    the extension itself.
+    """
+
+    def __init__(self, encoding: str = "json", compression: Optional[str] = None) -> None:
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"unsupported_encoding: {encoding}")
+        if compression is not None and compression not in SUPPORTED_COMPRESSIONS:
+            raise ValueError(f"unsupported_compression: {compression}")
+        self.encoding = encoding
+        self.compression = compression
+        self._compressor = (
+            zlib.compressobj(wbits=-zlib.MAX_WBITS) if compression == "deflate" else None
+        )
+
+    def encode(self, frame: Dict[str, Any]) -> Frame:
+        if self.encoding == "msgpack":
+            data = msgpack.packb(frame, use_bin_type=True)
+        elif self._compressor is None:
+            return Codec.dumps(frame)
+        else:
+            data = Codec.dumps_bytes(frame)
+        if self._compressor is None:
+            return data
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"type": "framing", "encoding": self.encoding, "compression": self.compression}
+
+
+class FrameDecoder:
+    """Client-side counterpart of FrameCodec; keeps the inflate context across frames."""
+
+    def __init__(self, encoding: str = "json", compression: Optional[str] = None) -> None:
+        self.encoding = encoding
+        self._decompressor = (
+            zlib.decompressobj(wbits=-zlib.MAX_WBITS) if compression == "deflate" else None
+        )
+
+    def decode(self, data: Frame) -> Dict[str, Any]:
+        if self._decompressor is not None:
+            data = self._decompressor.decompress(data)
+        if self.encoding == "msgpack":
+            return msgpack.unpackb(data, raw=False)
+        return Codec.loads(data)
+
+
+def negotiate(requested: Any) -> Optional[FrameCodec]:
+    """Pick framing from a client's ``framing`` request, or None for plain JSON text.
+
+    ``requested`` looks like ``{"encoding": ["msgpack", "json"], "compression": ["deflate"]}``;
+    each list is in client preference order and unsupported entries are skipped.
+    """
+    if not isinstance(requested, dict):
+        return None
+    encodings = requested.get("encoding") or ["json"]
+    compressions = requested.get("compression") or []
+    if isinstance(encodings, str):
+        encodings = [encodings]
+    if isinstance(compressions, str):
+        compressions = [compressions]
+
+    encoding = next((name for name in encodings if name in SUPPORTED_ENCODINGS), "json")
+    compression = next((name for name in compressions if name in SUPPORTED_COMPRESSIONS), None)
+    return FrameCodec(encoding, compression)
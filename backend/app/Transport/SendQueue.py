@@ -0,0 +1,189 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from Common import Codec, metrics
+
+# Full-state snapshots: only the newest unsent one matters.
+COALESCE_LATEST = {"pois", "requirements", "plan"}
+# Frames that may be merged into one batch frame (opt-in) or, when the queue
+# is full, folded into a queued snapshot. They are never dropped: images that
+# finish after the last pois snapshot exist only in these frames.
+BATCHABLE = {"poi_images"}
+
+SEND_QUEUE_MAX_FRAMES = 64
+SEND_QUEUE_PUT_TIMEOUT_SECONDS = 30.0
+
+
+class SendQueueClosed(ConnectionError):
+    """The writer stopped (client gone or send failed); no more frames are accepted."""
+
+
+class SendQueue:
+    """Bounded per-connection outbox drained by a dedicated writer thread.
+
+    Producers call ``put`` and return immediately; a slow socket only delays
+    the writer. Superseded state snapshots are replaced in place by the latest one,
+    and when ``batch_images`` is set, consecutive ``poi_images`` frames are
+    sent as a single ``poi_images_batch`` frame. When the queue is full,
+    unversioned image frames are folded into the queued ``pois`` snapshot
+    (or, with ``batch_images``, merged into one batch frame); if that frees
+    nothing the producer waits up to ``put_timeout`` before the connection
+    is treated as dead (``stalled``).
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Any], None],
+        encode: Callable[[Dict[str, Any]], Any] = Codec.dumps,
+        max_frames: int = SEND_QUEUE_MAX_FRAMES,
+        batch_images: bool = False,
+        put_timeout: float = SEND_QUEUE_PUT_TIMEOUT_SECONDS,
+    ) -> None:
+        self._send = send
+        self._encode = encode
+        self.max_frames = max_frames
+        self.batch_images = batch_images
+        self.put_timeout = put_timeout
+        self._frames: Deque[Dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self.stalled = False
+        self.error: Optional[BaseException] = None
+        self._writer = threading.Thread(target=self._run, name="ws-send-queue", daemon=True)
+
+    def start(self) -> "SendQueue":
+        metrics.add_gauge("ws.connections", 1)
+        self._writer.start()
+        return self
+
+    def put(self, frame: Dict[str, Any]) -> None:
+        with self._cond:
+            if self.error is not None or self._closing:
+                raise SendQueueClosed(str(self.error) if self.error else "send queue closed")
+
+            frame_type = frame.get("type")
+            if frame_type in COALESCE_LATEST:
+                # Replace in place: frames queued after the stale snapshot (e.g.
+                # poi_images for a POI it introduced) must not overtake the new one.
+                for idx, queued in enumerate(self._frames):
+                    if queued.get("type") == frame_type:
+                        self._frames[idx] = frame
+                        metrics.incr("ws.send_queue.coalesced")
+                        self._cond.notify_all()
+                        return
+
+            if len(self._frames) >= self.max_frames:
+                self._compact_images()
+
+            if len(self._frames) >= self.max_frames:
+                ready = self._cond.wait_for(
+                    lambda: len(self._frames) < self.max_frames or self.error is not None,
+                    timeout=self.put_timeout,
+                )
+                if self.error is not None or not ready:
+                    self.stalled = self.error is None
+                    raise SendQueueClosed("send queue stalled: client is not reading")
+
+            self._frames.append(frame)
+            self._adjust_depth(1)
+            metrics.incr("ws.send_queue.enqueued")
+            self._cond.notify_all()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush what is queued, then stop the writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._writer.is_alive():
+            self._writer.join(timeout)
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._frames)
+
+    def _compact_images(self) -> None:
+        # Versioned (protocol 2) frames are part of a delta chain and stay as they are.
+        images = [
+            queued for queued in self._frames
+            if queued.get("type") in BATCHABLE and "version" not in queued
+        ]
+        snapshot_idx = next(
+            (idx for idx, queued in enumerate(self._frames)
+             if queued.get("type") == "pois" and "version" not in queued),
+            None,
+        )
+        if snapshot_idx is not None:
+            snapshot = self._frames[snapshot_idx]
+            entries = list(snapshot.get("data") or [])
+            positions = {entry.get("name"): idx for idx, entry in enumerate(entries)
+                         if isinstance(entry, dict)}
+            folded = []
+            for frame in images:
+                data = frame.get("data") or {}
+                idx = positions.get(data.get("name"))
+                if idx is not None:
+                    entries[idx] = {**entries[idx], "images": data.get("images")}
+                    folded.append(frame)
+            if folded:
+                self._frames[snapshot_idx] = {**snapshot, "data": entries}
+                self._remove(folded)
+                images = [frame for frame in images if all(frame is not f for f in folded)]
+                metrics.incr("ws.send_queue.folded", len(folded))
+        if self.batch_images and len(images) > 1:
+            # Placed where the last one was: images may arrive later, never
+            # ahead of the snapshot that introduced their POI.
+            batch = {"type": "poi_images_batch", "data": [frame.get("data") for frame in images]}
+            last = next(idx for idx, queued in enumerate(self._frames) if queued is images[-1])
+            self._frames[last] = batch
+            self._remove(images[:-1])
+            metrics.incr("ws.send_queue.batched", len(images))
+
+    def _remove(self, frames: list) -> None:
+        gone = {id(frame) for frame in frames}
+        self._frames = deque(queued for queued in self._frames if id(queued) not in gone)
+        self._adjust_depth(-len(frames))
+
+    def _adjust_depth(self, delta: int) -> None:
+        metrics.add_gauge("ws.send_queue.depth", delta)
+
+    def _next_frame(self) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._frames or self._closing)
+            if not self._frames:
+                return None
+            frame = self._frames.popleft()
+            self._adjust_depth(-1)
+            if self.batch_images and frame.get("type") in BATCHABLE:
+                first = last = frame
+                batch = [frame.get("data")]
+                while self._frames and self._frames[0].get("type") in BATCHABLE:
+                    last = self._frames.popleft()
+                    batch.append(last.get("data"))
+                    self._adjust_depth(-1)
+                if len(batch) > 1:
+                    metrics.incr("ws.send_queue.batched", len(batch))
+                frame = {"type": "poi_images_batch", "data": batch}
+                if "version" in last:
+                    frame["base_version"] = first.get("base_version")
+                    frame["version"] = last["version"]
+            self._cond.notify_all()
+            return frame
+
+    def _run(self) -> None:
+        try:
+            while True:
+                frame = self._next_frame()
+                if frame is None:
+                    return
+                self._send(self._encode(frame))
+                metrics.incr("ws.send_queue.sent")
+        except Exception as exc:
+            print(f"[SendQueue] writer stopped: {exc}")
+            with self._cond:
+                self.error = exc
+                self._adjust_depth(-len(self._frames))
+                self._frames.clear()
+                self._cond.notify_all()
+        finally:
+            metrics.add_gauge("ws.connections", -1)
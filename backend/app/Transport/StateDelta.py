@@ -0,0 +1,177 @@
+import copy
+import hashlib
+import os
+import uuid
+from typing import Any, Dict, List, Optional
+
+from Cache import TieredCache
+
+# Protocol 1 sends full snapshots; protocol 2 sends deltas against a versioned session state.
+DELTA_PROTOCOL_VERSION = 2
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+
+# Shared across workers when CACHE_BACKEND is sqlite/redis; never served from a stale local copy.
+_sessions = TieredCache(
+    "sessions", max_entries=SESSION_CACHE_SIZE, ttl_seconds=SESSION_TTL_SECONDS,
+    cache_locally=False,
+)
+
+
+def _stable_id(text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def poi_id(poi: Dict[str, Any]) -> str:
+    # Names are already the POI identity (remove_poi and poi_images match on them).
+    return _stable_id(str(poi.get("name", "")))
+
+
+def requirement_id(requirement: Dict[str, Any]) -> str:
+    return _stable_id(str(requirement.get("description", "")))
+
+
+def _with_id(item: Dict[str, Any], item_id: str) -> Dict[str, Any]:
+    data = dict(item)
+    data["id"] = item_id
+    return data
+
+
+def load_session(session_id: str, state_version: Any) -> Optional[Dict[str, Any]]:
+    """Return the stored session state if the client is at the same version, else None."""
+    session = _sessions.get(session_id)
+    if session is None or session.get("version") != state_version:
+        return None
+    return copy.deepcopy(session)
+
+
+def fresh_state(session_id: str, pois: Any, requirements: Any, plan: Any) -> Dict[str, Any]:
+    """Session state rebuilt from a full client upload after a version mismatch."""
+    stored = _sessions.get(session_id) or {}
+    return {
+        # Versions keep increasing within a session so stale clients always mismatch.
+        "version": stored.get("version", 0),
+        "pois": pois if isinstance(pois, list) else [],
+        "requirements": requirements if isinstance(requirements, list) else [],
+        "plan": plan if isinstance(plan, list) else [],
+    }
+
+
+def save_session(session_id: str, state: Dict[str, Any]) -> None:
+    _sessions.set(session_id, copy.deepcopy(state))
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class DeltaEncoder:
+    """Turns full-snapshot updates into protocol-2 frames for one session.
+
+    ``state`` is what the client holds. Unless ``in_sync`` (the client's
+    version matched the stored session) the first frame of each kind is a
+    full snapshot tagged with a version; every later frame is a delta carrying
+    ``base_version`` and ``version``. The client applies frames
+    in order and must resync with a full request if ``base_version`` doesn't
+    match its own version.
+    """
+
+    def __init__(self, session_id: str, state: Dict[str, Any], in_sync: bool) -> None:
+        self.session_id = session_id
+        self.state = state
+        self._snapshot_sent = {"pois", "requirements", "plan"} if in_sync else set()
+
+    def encode(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        kind = update.get("type")
+        if kind == "pois":
+            return self._encode_list(kind, update.get("data") or [], poi_id)
+        if kind == "requirements":
+            return self._encode_list(kind, update.get("data") or [], requirement_id)
+        if kind == "plan":
+            return self._encode_plan(update.get("data") or [])
+        if kind == "poi_images":
+            return self._encode_images(update)
+        if kind == "done":
+            save_session(self.session_id, self.state)
+            return {**update, "session_id": self.session_id, "version": self.state["version"]}
+        return update
+
+    def _bump(self) -> Dict[str, int]:
+        base_version = self.state["version"]
+        self.state["version"] = base_version + 1
+        return {"base_version": base_version, "version": self.state["version"]}
+
+    def _encode_list(self, kind: str, items: List[Dict[str, Any]], id_of) -> Dict[str, Any]:
+        previous = {id_of(item): item for item in self.state[kind]}
+        self.state[kind] = items
+        if kind not in self._snapshot_sent:
+            self._snapshot_sent.add(kind)
+            versions = self._bump()
+            return {
+                "type": kind,
+                "data": [_with_id(item, id_of(item)) for item in items],
+                "version": versions["version"],
+            }
+
+        current = {id_of(item): item for item in items}
+        added = [_with_id(item, item_id) for item_id, item in current.items() if item_id not in previous]
+        changed = [
+            _with_id(item, item_id)
+            for item_id, item in current.items()
+            if item_id in previous and previous[item_id] != item
+        ]
+        removed = [item_id for item_id in previous if item_id not in current]
+        return {
+            "type": f"{kind}_delta",
+            **self._bump(),
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "order": list(current.keys()),
+        }
+
+    def _encode_plan(self, options: List[Dict[str, Any]]) -> Dict[str, Any]:
+        previous = self.state["plan"]
+        self.state["plan"] = options
+        if "plan" not in self._snapshot_sent:
+            self._snapshot_sent.add("plan")
+            return {"type": "plan", "data": options, "version": self._bump()["version"]}
+
+        changed = []
+        for index, option in enumerate(options):
+            old = previous[index] if index < len(previous) else {}
+            if option == old:
+                continue
+            fields = {
+                key: value for key, value in option.items()
+                if key != "days" and old.get(key) != value
+            }
+            old_days = old.get("days") or []
+            days = option.get("days") or []
+            changed_days = {
+                str(d_idx): day for d_idx, day in enumerate(days)
+                if d_idx >= len(old_days) or old_days[d_idx] != day
+            }
+            changed.append({
+                "index": index,
+                "fields": fields,
+                "removed_fields": [key for key in old if key != "days" and key not in option],
+                "days": changed_days,
+                "day_count": len(days),
+            })
+        return {
+            "type": "plan_delta",
+            **self._bump(),
+            "option_count": len(options),
+            "changed": changed,
+        }
+
+    def _encode_images(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        data = update.get("data") or {}
+        pois = self.state["pois"]
+        for idx, poi in enumerate(pois):
+            if poi.get("name") == data.get("name"):
+                pois[idx] = {**poi, "images": data.get("images")}
+                break
+        return {**update, **self._bump()}
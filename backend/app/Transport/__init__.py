@@ -0,0 +1,3 @@
+from .Framing import FrameCodec, FrameDecoder, negotiate
+from .SendQueue import SendQueue, SendQueueClosed
+from .StateDelta import DELTA_PROTOCOL_VERSION, DeltaEncoder, fresh_state, load_session, new_session_id
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from Common import RateLimitExceeded, RequestPriority, get_limiter, metrics
+from POI.Gazetteer import lookup_destination
+from POI.ImageFetcher import IMAGE_SEARCH_TTL_SECONDS, image_search_age, refresh_image_search
+from POI.POIAgent import POI_CACHE_TTL_SECONDS, get_cached_pois, poi_cache_age, refresh_pois
+
+WARMER_ENABLED = os.getenv("WARMER_ENABLED", "0") == "1"
+WARMER_INTERVAL_SECONDS = float(os.getenv("WARMER_INTERVAL_SECONDS", "300"))
+WARMER_TOP_N = int(os.getenv("WARMER_TOP_N", "20"))
+# Entries older than this fraction of their TTL are refreshed ahead of expiry.
+WARMER_REFRESH_FRACTION = float(os.getenv("WARMER_REFRESH_FRACTION", "0.75"))
+WARMER_HALF_LIFE_SECONDS = float(os.getenv("WARMER_HALF_LIFE_SECONDS", str(24 * 3600)))
+WARMER_MAX_TRACKED = int(os.getenv("WARMER_MAX_TRACKED", "1000"))
+WARMER_IMAGES_PER_POI = 10  # matches the orchestrator's image lookups
+
+
+class DestinationTracker:
+    """Exponentially decayed request counts per destination.
+
+    A request adds 1 to the destination's score; scores halve every
+    ``half_life_seconds`` so yesterday's spike gives way to today's traffic.
+    """
+
+    def __init__(self, half_life_seconds: float, max_tracked: int) -> None:
+        self.half_life_seconds = half_life_seconds
+        self.max_tracked = max_tracked
+        self._scores: Dict[str, Tuple[float, float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated_at) / self.half_life_seconds)
+
+    def record(self, name: str) -> None:
+        key = " ".join(name.lower().split())
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            score, updated_at, _ = self._scores.get(key, (0.0, now, name))
+            self._scores[key] = (self._decayed(score, updated_at, now) + 1.0, now, name)
+            if len(self._scores) > self.max_tracked:
+                coldest = min(
+                    self._scores,
+                    key=lambda k: self._decayed(self._scores[k][0], self._scores[k][1], now),
+                )
+                del self._scores[coldest]
+
+    def top(self, count: int) -> List[str]:
+        now = time.time()
+        with self._lock:
+            ranked = sorted(
+                self._scores.values(),
+                key=lambda entry: self._decayed(entry[0], entry[1], now),
+                reverse=True,
+            )
+        return [name for _, _, name in ranked[:count]]
+
+
+class Warmer:
+    """Keeps POI lists and image searches for trending destinations warm.
+
+    Every ``interval_seconds`` the top destinations are checked; cache
+    entries that are missing or close to expiry are refreshed at BACKGROUND
+    priority, paced by the ``warmer`` rate budget so interactive requests
+    keep first claim on the upstream limiters.
+    """
+
+    def __init__(self, tracker: DestinationTracker, interval_seconds: float, top_n: int) -> None:
+        self.tracker = tracker
+        self.interval_seconds = interval_seconds
+        self.top_n = top_n
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Warmer":
+        self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as exc:
+                print(f"[Warmer] cycle failed: {exc}")
+
+    @staticmethod
+    def _stale(age: Optional[float], ttl_seconds: float) -> bool:
+        return age is None or age >= ttl_seconds * WARMER_REFRESH_FRACTION
+
+    def run_once(self) -> Dict[str, int]:
+        budget = get_limiter("warmer")
+        stats = {"destinations": 0, "pois_refreshed": 0, "images_refreshed": 0}
+        try:
+            for name in self.tracker.top(self.top_n):
+                if lookup_destination(name) is not None:
+                    continue  # served from the gazetteer, nothing expires
+                stats["destinations"] += 1
+                if self._stale(poi_cache_age(name), POI_CACHE_TTL_SECONDS):
+                    with budget.acquire(priority=RequestPriority.BACKGROUND):
+                        poi_model = refresh_pois(name)
+                    stats["pois_refreshed"] += 1
+                else:
+                    poi_model = get_cached_pois(name)
+                if poi_model is None:
+                    continue
+                for item in poi_model.items:
+                    age = image_search_age(item.poi.name, WARMER_IMAGES_PER_POI)
+                    if self._stale(age, IMAGE_SEARCH_TTL_SECONDS):
+                        with budget.acquire(priority=RequestPriority.BACKGROUND):
+                            refresh_image_search(item.poi.name, WARMER_IMAGES_PER_POI)
+                        stats["images_refreshed"] += 1
+        except RateLimitExceeded as exc:
+            # Out of budget for this cycle; the rest waits for the next one.
+            print(f"[Warmer] stopping cycle early: {exc}")
+        metrics.incr("warmer.cycles")
+        metrics.incr("warmer.pois_refreshed", stats["pois_refreshed"])
+        metrics.incr("warmer.images_refreshed", stats["images_refreshed"])
+        print(f"[Warmer] cycle done: {stats}")
+        return stats
+
+
+_tracker = DestinationTracker(WARMER_HALF_LIFE_SECONDS, WARMER_MAX_TRACKED)
+_warmer: Optional[Warmer] = None
+
+
+def record_destination(name: str) -> None:
+    """Count a Points_Of_Interest add request towards the trending list."""
+    _tracker.record(name)
+
+
+def start_warmer() -> Optional[Warmer]:
+    """Start the background warmer once per process if WARMER_ENABLED=1."""
+    global _warmer
+    if WARMER_ENABLED and _warmer is None:
+        _warmer = Warmer(_tracker, WARMER_INTERVAL_SECONDS, WARMER_TOP_N).start()
+        print(f"[Warmer] started: top {WARMER_TOP_N} every {WARMER_INTERVAL_SECONDS:.0f}s")
+    return _warmer
@@ -0,0 +1 @@
+from .Warmer import record_destination, start_warmer
@@ -1,18 +1,64 @@
-import json
+import os
+import threading
+import time
+from typing import Optional
 
-from flask import Flask, request
+from flask import Flask, Response, request, send_file
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from flask_sock import Sock
 
+from Capture import capture_enabled, pseudonym, start_turn
+from Common import CancelToken, Codec, metrics
 from POI.ImageFetcher import flickr_photo_search
+from POI.ImageProxy import get_image_cache, get_image_path, upstream_url
 from POI.POIAgent import add_poi
-from Orchestrator import analyze_intents, analyze_intents_stream
+from POI.Thumbnails import THUMBNAIL_WIDTHS, schedule_variants, variant_key
+from Jobs import JobQueueFull, get_job_queue
+from Orchestrator import (
+    analyze_intents,
+    analyze_intents_stream,
+    collect_stream_result,
+    parse_batch,
+    run_batch,
+    summarize,
+    turn_deadline_seconds,
+)
 from Planner import plan
 from Planner.RequirementModel import RequirementModel
+from Transport import (
+    DELTA_PROTOCOL_VERSION,
+    DeltaEncoder,
+    SendQueue,
+    SendQueueClosed,
+    fresh_state,
+    load_session,
+    negotiate,
+    new_session_id,
+)
+from Warmer import start_warmer
+
+
+class CodecJSONProvider(JSONProvider):
+    """Routes Flask request parsing and dict responses through Common.Codec."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return Codec.dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return Codec.loads(s)
+
+
+IMAGE_MAX_AGE_SECONDS = 365 * 24 * 3600
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app)
+# send_file already uses the server's wsgi.file_wrapper (sendfile) when offered;
+# behind nginx/Apache, X-Sendfile hands the whole transfer to the front server.
+app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE", "0") == "1"
 CORS(app)
 sock = Sock(app)
+start_warmer()
 
 
 @app.get("/health")
@@ -20,6 +66,65 @@ def health_check() -> tuple[dict, int]:
     return {"status": "ok"}, 200
 
 
+@app.get("/metrics")
+def metrics_snapshot() -> tuple[dict, int]:
+    return metrics.snapshot(), 200
+
+
+@app.get("/images/<image_id>")
+def image_proxy(image_id: str):
+    """Serve a Flickr photo from the local cache, fetching it once on a miss."""
+    if upstream_url(image_id) is None:
+        return {"error": "invalid_image_id"}, 404
+    width = request.args.get("w", type=int)
+    if width is not None:
+        if width not in THUMBNAIL_WIDTHS:
+            return {"error": "unsupported_width", "widths": list(THUMBNAIL_WIDTHS)}, 404
+        variant = get_image_cache().path(variant_key(image_id, width))
+        if variant is not None:
+            try:
+                response = send_file(
+                    variant, mimetype="image/webp", etag=f"{image_id}.w{width}",
+                    max_age=IMAGE_MAX_AGE_SECONDS, conditional=True,
+                )
+            except FileNotFoundError:
+                # Evicted since the lookup; the original below stands in.
+                metrics.incr("images.evicted_before_send")
+            else:
+                response.cache_control.public = True
+                response.cache_control.immutable = True
+                return response
+    for attempt in range(2):
+        try:
+            path = get_image_path(image_id)
+        except Exception as exc:
+            return {"error": "image_fetch_failed", "details": str(exc)}, 502
+        try:
+            response = _send_original(image_id, path, width)
+        except FileNotFoundError:
+            # A concurrent insert evicted it between lookup and open: fetch it again, once.
+            metrics.incr("images.evicted_before_send")
+            if attempt:
+                return {"error": "image_fetch_failed", "details": "evicted"}, 502
+            continue
+        schedule_variants(image_id, path)
+        return response
+
+
+def _send_original(image_id: str, path: str, width: Optional[int]):
+    if width is not None:
+        # Variant not generated yet: serve the original briefly so the URL can upgrade later.
+        return send_file(path, mimetype="image/jpeg", max_age=60, conditional=True)
+    # Ids are content-addressed by Flickr's secret, so the bytes never change.
+    response = send_file(
+        path, mimetype="image/jpeg", etag=image_id, max_age=IMAGE_MAX_AGE_SECONDS,
+        conditional=True,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 @app.post("/chat")
 def chat() -> tuple[dict, int]:
     payload = request.get_json(silent=True) or {}
@@ -29,43 +134,235 @@ def chat() -> tuple[dict, int]:
     existing_pois = payload.get("pois")
     existing_requirements = payload.get("requirements")
     existing_plan = payload.get("plan")
+    try:
+        deadline_seconds = turn_deadline_seconds(payload.get("deadline_seconds"))
+    except ValueError as exc:
+        return {"error": str(exc)}, 400
+    if payload.get("async") or request.args.get("async") == "1":
+        # Run on the job workers; the client polls /jobs/<id> or streams /ws/jobs/<id>
+        turn = start_turn("http_async", payload)
+        try:
+            job = get_job_queue().submit(
+                lambda cancel_token: analyze_intents_stream(
+                    message, existing_pois, existing_requirements, existing_plan,
+                    cancel_token=cancel_token, deadline_seconds=deadline_seconds),
+                collect_stream_result,
+            )
+        except JobQueueFull as exc:
+            if turn is not None:
+                turn.finish("error", "job_queue_full")
+            return {"error": "job_queue_full", "details": str(exc)}, 503
+        if turn is not None:
+            turn.finish("queued")
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}",
+            "stream_url": f"/ws/jobs/{job.id}",
+        }, 202
+    turn = start_turn("http", payload)
     try:
         intents_payload = analyze_intents(
             message,
             existing_pois=existing_pois,
             existing_requirements=existing_requirements,
             existing_plan=existing_plan,
+            deadline_seconds=deadline_seconds,
         )
     except Exception as exc:
+        if turn is not None:
+            turn.finish("error", str(exc))
         return {"error": "intent_request_failed", "details": str(exc)}, 502
+    if turn is not None:
+        turn.finish("ok")
     return intents_payload, 200
 
 
+@app.post("/chat/batch")
+def chat_batch():
+    """Run many independent ``/chat`` items (message + state) with bounded concurrency.
+
+    Body: ``{"items": [{"id", "message", "pois", "requirements", "plan",
+    "deadline_seconds"}, ...], "concurrency": N}``. Returns all results in
+    item order, or with ``?stream=1`` (or ``Accept: application/x-ndjson``)
+    one NDJSON line per item as it finishes, then a ``summary`` line.
+    """
+    payload = request.get_json(silent=True) or {}
+    try:
+        items, concurrency = parse_batch(payload)
+    except ValueError as exc:
+        return {"error": str(exc)}, 400
+    started = time.perf_counter()
+    if request.args.get("stream") == "1" or request.accept_mimetypes.best == "application/x-ndjson":
+        def lines():
+            results = []
+            for entry in run_batch(items, concurrency):
+                results.append(entry)
+                yield Codec.dumps(entry) + "\n"
+            yield Codec.dumps({"summary": summarize(results, time.perf_counter() - started)}) + "\n"
+
+        return Response(lines(), mimetype="application/x-ndjson")
+    results = sorted(run_batch(items, concurrency), key=lambda entry: entry["index"])
+    return {"results": results, "summary": summarize(results, time.perf_counter() - started)}, 200
+
+
 @sock.route('/ws/chat')
 def ws_chat(ws):
-    """WebSocket endpoint for streaming chat responses."""
+    """WebSocket endpoint for streaming chat responses.
+
+    While a turn runs the connection is watched: a disconnect cancels it, and
+    a new message supersedes it. The old turn ends with a ``cancelled`` frame
+    and the new message is handled next on the same connection.
+    """
+    # Groups superseding messages with the turn they replaced (CAPTURE_PATH only).
+    connection_id = pseudonym() if capture_enabled() else None
+    data = ws.receive()
+    while data is not None:
+        data = _run_chat_turn(ws, data, connection_id)
+
+
+def _watch_connection(ws, cancel_token: CancelToken, next_message: list) -> None:
+    """Cancel the running turn when the client disconnects or sends another message."""
     try:
-        # Receive message from client
         data = ws.receive()
-        payload = json.loads(data)
+    except Exception:
+        data = None
+    if data is None:
+        cancel_token.cancel("disconnected")
+        return
+    next_message.append(data)
+    cancel_token.cancel("superseded")
+
+
+def _run_chat_turn(ws, data, connection_id=None):
+    """Handle one chat message; returns the message that superseded it, if any."""
+    outbox = None
+    turn = None
+    cancel_token = CancelToken()
+    next_message: list = []
+    try:
+        payload = Codec.loads(data)
         message = payload.get("message", "")
 
         if not message:
-            ws.send(json.dumps({"type": "error", "message": "message is required"}))
-            return
+            ws.send(Codec.dumps({"type": "error", "message": "message is required"}))
+            return None
+        turn = start_turn("ws", payload, connection_id)
 
         existing_pois = payload.get("pois")
         existing_requirements = payload.get("requirements")
         existing_plan = payload.get("plan")
 
+        # Protocol 2: deltas against the session state the client says it holds
+        encoder = None
+        if payload.get("protocol") == DELTA_PROTOCOL_VERSION:
+            session_id = payload.get("session_id") or new_session_id()
+            session = load_session(session_id, payload.get("state_version"))
+            if session is not None:
+                existing_pois = session["pois"]
+                existing_requirements = session["requirements"]
+                existing_plan = session["plan"]
+                encoder = DeltaEncoder(session_id, session, in_sync=True)
+            else:
+                encoder = DeltaEncoder(
+                    session_id,
+                    fresh_state(session_id, existing_pois, existing_requirements, existing_plan),
+                    in_sync=False,
+                )
+
+        # Optional binary/compressed framing; the ack is the last plain JSON text frame
+        codec = negotiate(payload.get("framing"))
+        if codec is not None:
+            ws.send(Codec.dumps(codec.describe()))
+
+        # Frames go through a bounded outbox so a slow client never stalls the pipeline
+        outbox = SendQueue(
+            ws.send,
+            encode=codec.encode if codec is not None else Codec.dumps,
+            batch_images=bool(payload.get("batch_images")),
+        ).start()
+
+        threading.Thread(
+            target=_watch_connection, args=(ws, cancel_token, next_message),
+            name="ws-chat-watch", daemon=True,
+        ).start()
+
         # Call streaming version of analyze_intents
-        for update in analyze_intents_stream(message, existing_pois, existing_requirements, existing_plan):
-            ws.send(json.dumps(update))
+        for update in analyze_intents_stream(
+                message, existing_pois, existing_requirements, existing_plan,
+                cancel_token=cancel_token, deadline_seconds=payload.get("deadline_seconds")):
+            if turn is not None:
+                turn.frame(update)
+            outbox.put(encoder.encode(update) if encoder is not None else update)
 
-    except json.JSONDecodeError as exc:
-        ws.send(json.dumps({"type": "error", "message": f"Invalid JSON: {str(exc)}"}))
+    except Codec.DecodeError as exc:
+        ws.send(Codec.dumps({"type": "error", "message": f"Invalid JSON: {str(exc)}"}))
     except Exception as exc:
-        ws.send(json.dumps({"type": "error", "message": str(exc)}))
+        if turn is not None:
+            turn.finish("error", str(exc))
+        if outbox is not None and (outbox.error is not None or outbox.stalled):
+            # Another put would only wait out the stall again.
+            print(f"[ws_chat] client went away: {outbox.error or exc}")
+            return None
+        if outbox is not None:
+            try:
+                outbox.put({"type": "error", "message": str(exc)})
+            except SendQueueClosed as closed:
+                print(f"[ws_chat] error frame not sent: {closed}")
+        else:
+            ws.send(Codec.dumps({"type": "error", "message": str(exc)}))
+    finally:
+        # Stops anything still running for this turn (e.g. after a send failure).
+        cancel_token.cancel("finished")
+        if outbox is not None:
+            outbox.close()
+        if turn is not None:
+            turn.finish()
+    return next_message[0] if next_message else None
+
+
+@app.get("/jobs/<job_id>")
+def job_status(job_id: str) -> tuple[dict, int]:
+    """Status and, once finished, the result of an async /chat job.
+
+    ``?since=N`` also returns the progress frames from position N on.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return {"error": "job_not_found"}, 404
+    data = job.to_dict()
+    since = request.args.get("since", type=int)
+    if since is not None:
+        data["updates"] = job.updates_since(max(since, 0))[0]
+    return data, 200
+
+
+@app.delete("/jobs/<job_id>")
+def cancel_job(job_id: str) -> tuple[dict, int]:
+    """Cancel a queued or running async job; a finished job is returned unchanged."""
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        return {"error": "job_not_found"}, 404
+    return job.to_dict(), 202 if not job.finished else 200
+
+
+@sock.route('/ws/jobs/<job_id>')
+def ws_job(ws, job_id):
+    """Replays a job's frames from ``?from=N`` (default 0), then streams new ones until it ends."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        ws.send(Codec.dumps({"type": "error", "message": "job_not_found"}))
+        return
+    cursor = max(request.args.get("from", 0, type=int), 0)
+    while True:
+        updates, finished = job.updates_since(cursor, timeout=15)
+        for update in updates:
+            ws.send(Codec.dumps({**update, "seq": cursor}))
+            cursor += 1
+        if finished:
+            break
+    if job.error and not (job.updates and job.updates[-1].get("type") == "error"):
+        ws.send(Codec.dumps({"type": "error", "message": job.error}))
 
 
 # curl -X POST http://127.0.0.1:5000/testpoi -H "Content-Type: application/json" -d '{"poi_name":"Seattle", "poi":{"poi":[]}}'
@@ -82,7 +379,7 @@ def testpoi() -> tuple[dict, int]:
         return {"error": "poi_name is required"}, 400
     try:
         result = add_poi(existing_poi, poi_name,
-                         number_of_poi=3, images_per_poi=3).to_list()
+                         number_of_poi=3, images_per_poi=3).to_list(variants=True)
     except Exception as exc:
         return {"error": "poi_add_failed", "details": str(exc)}, 502
     return {"poi": result}, 200
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Per-operation latency of each shared cache tier, and hit rate across worker processes.
+
+    python benchmarks/bench_cache_backends.py [--iterations 2000] [--workers 4]
+    python redis_standin.py --port 6390 &    # then add --redis redis://127.0.0.1:6390/0
+
+The hit-rate part replays the same skewed key stream split over --workers
+processes: with memory-only caches every worker misses on its own, with a
+shared tier each key is computed once.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import payloads
+
+
+def tiers(workdir: str, redis_url):
+    from Cache import DiskCache, RedisCache, SQLiteCache
+
+    result = {
+        "disk": lambda: DiskCache(os.path.join(workdir, "disk"), ttl_seconds=600),
+        "sqlite": lambda: SQLiteCache(os.path.join(workdir, "shared.sqlite3"), "bench", 600),
+    }
+    if redis_url:
+        result["redis"] = lambda: RedisCache(redis_url, f"bench_{os.getpid()}", 600)
+    return result
+
+
+def latency(make_tier, value, iterations: int) -> tuple:
+    tier = make_tier()
+    keys = [f"{idx:064x}" for idx in range(iterations)]
+    start = time.perf_counter()
+    for key in keys:
+        tier.set(key, value)
+    write_us = (time.perf_counter() - start) / iterations * 1e6
+    start = time.perf_counter()
+    for key in keys:
+        tier.get(key)
+    read_us = (time.perf_counter() - start) / iterations * 1e6
+    tier.clear()
+    return write_us, read_us
+
+
+def _worker(backend: str, env: dict, keys: list, results) -> None:
+    os.environ.update(env, CACHE_BACKEND=backend)
+    from Cache import TieredCache
+
+    cache = TieredCache(env["BENCH_NAMESPACE"], max_entries=10_000, ttl_seconds=600,
+                        directory=env["BENCH_DISK_DIR"])
+    hits = 0
+    for key in keys:
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache.set(key, {"pois": key})
+    results.put(hits)
+
+
+def hit_rate(backend: str, env: dict, workers: int, requests: int) -> float:
+    rng = random.Random(7)
+    # Zipf-like popularity: a few destinations dominate, like real traffic.
+    names = [f"destination-{rank}" for rank in range(1, 2001)]
+    stream = rng.choices(names, weights=[1.0 / rank for rank in range(1, 2001)], k=requests)
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(backend, env, stream[idx::workers], results))
+        for idx in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    hits = sum(results.get() for _ in procs)
+    for proc in procs:
+        proc.join()
+    return hits / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--redis", default=None, metavar="URL",
+                        help="Also measure a Redis-protocol server at URL")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-cache-")
+    try:
+        value = {"stored_at": time.time(), "value": payloads.make_pois(15)}
+        print(f"{'tier':<8}{'set us/op':>12}{'get us/op':>12}   (15-POI entry)")
+        for name, make_tier in tiers(workdir, args.redis).items():
+            write_us, read_us = latency(make_tier, value, args.iterations)
+            print(f"{name:<8}{write_us:>12.1f}{read_us:>12.1f}")
+
+        env = {
+            "CACHE_SQLITE_PATH": os.path.join(workdir, "hits.sqlite3"),
+            "BENCH_DISK_DIR": os.path.join(workdir, "hits-disk"),
+            # Fresh namespace so a long-running Redis doesn't carry hits over between runs.
+            "BENCH_NAMESPACE": f"bench_hits_{os.getpid()}_{int(time.time())}",
+        }
+        if args.redis:
+            env["CACHE_REDIS_URL"] = args.redis
+        backends = ["memory", "disk", "sqlite"] + (["redis"] if args.redis else [])
+        print(f"\nHit rate, {args.requests} requests over {args.workers} workers")
+        for backend in backends:
+            print(f"{backend:<8}{hit_rate(backend, env, args.workers, args.requests):>10.1%}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Compare the stdlib json module with the active Common.Codec backend on large payloads.
+
+    python benchmarks/bench_codec.py [--iterations 100]
+    JSON_BACKEND=stdlib python benchmarks/bench_codec.py   # force the fallback
+"""
+
+import argparse
+import json
+import time
+
+import payloads
+
+from Common import Codec
+from Planner.PlanOptionModel import PlanOptionModel
+from POI.POIModel import POIModel
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    n = args.iterations
+
+    cases = {
+        "pois x40": payloads.make_pois(40),
+        "pois x400": payloads.make_pois(400),
+        "plan 3x10": payloads.make_plan(),
+        "plan 3x30": payloads.make_plan(days=30),
+    }
+    print(f"Codec backend: {Codec.BACKEND}\n")
+    print(f"{'payload':<12}{'bytes':>10}{'json dumps':>12}{'codec dumps':>13}"
+          f"{'json loads':>12}{'codec loads':>13}   (us/op)")
+    for name, data in cases.items():
+        encoded = Codec.dumps_bytes(data)
+        text = json.dumps(data, ensure_ascii=True)
+        print(f"{name:<12}{len(encoded):>10}"
+              f"{timed(lambda: json.dumps(data, ensure_ascii=True), n):>12.1f}"
+              f"{timed(lambda: Codec.dumps_bytes(data), n):>13.1f}"
+              f"{timed(lambda: json.loads(text), n):>12.1f}"
+              f"{timed(lambda: Codec.loads(encoded), n):>13.1f}")
+
+    print("\nModel objects (to_list + encode)")
+    poi_model = POIModel.from_json(payloads.make_pois(400), require_images=False)
+    plan_model = PlanOptionModel.from_json(payloads.make_plan())
+    for name, model in (("POIModel x400", poi_model), ("PlanOptionModel", plan_model)):
+        stdlib_us = timed(lambda: json.dumps(model.to_list(), ensure_ascii=True).encode("utf-8"), n)
+        codec_us = timed(model.to_json_bytes, n)
+        print(f"{name:<18} stdlib {stdlib_us:>10.1f} us   to_json_bytes {codec_us:>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Single-pass decode vs the old validate_json + from_json pattern on 1k-item inputs.
+
+The two-pass column runs the pre-decode code kept in two_pass_decode.py;
+today's validate_json/from_json both wrap decode, so timing them would
+just measure decode twice.
+
+    python benchmarks/bench_decode.py [--items 1000] [--iterations 20]
+"""
+
+import argparse
+import time
+
+import payloads
+from two_pass_decode import TwoPassPlanOptionModel, TwoPassPOIModel
+
+from Planner.PlanOptionModel import PlanOptionModel
+from POI.POIModel import POIModel
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+def two_pass_pois(data):
+    if not TwoPassPOIModel.validate_json(data, require_images=False):
+        return TwoPassPOIModel.from_json(data, require_images=False)
+    return None
+
+
+def two_pass_plan(data):
+    if not TwoPassPlanOptionModel.validate_json(data):
+        return TwoPassPlanOptionModel.from_json(data)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    n = args.iterations
+
+    pois = {"pois": payloads.make_pois(args.items, images=5)}
+    # About --items blocks, spread over 10 options x 10 days
+    plan = {"options": payloads.make_plan(options=10, days=10, blocks=max(1, args.items // 100))}
+    broken = {"pois": [dict(poi, geo_coordinate={"lat": "x"}) for poi in pois["pois"]]}
+
+    print(f"{'case':<34}{'two-pass ms':>12}{'decode ms':>12}")
+    print(f"{'POIModel, ' + str(args.items) + ' valid':<34}"
+          f"{timed(lambda: two_pass_pois(pois), n):>12.2f}"
+          f"{timed(lambda: POIModel.decode(pois, require_images=False), n):>12.2f}")
+    print(f"{'POIModel, ' + str(args.items) + ' invalid (all errors)':<34}"
+          f"{timed(lambda: TwoPassPOIModel.validate_json(broken, require_images=False), n):>12.2f}"
+          f"{timed(lambda: POIModel.decode(broken, require_images=False), n):>12.2f}")
+    print(f"{'PlanOptionModel, ' + str(args.items) + ' blocks':<34}"
+          f"{timed(lambda: two_pass_plan(plan), n):>12.2f}"
+          f"{timed(lambda: PlanOptionModel.decode(plan), n):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Bytes on the wire and encode/decode CPU per frame type for each /ws/chat framing.
+
+    python benchmarks/bench_framing.py [--iterations 200]
+"""
+
+import argparse
+import time
+
+import payloads  # noqa: F401 — puts app/ on sys.path
+
+from Transport.Framing import SUPPORTED_ENCODINGS, FrameCodec, FrameDecoder
+
+
+def measure(frame: dict, encoding: str, compression, iterations: int) -> tuple:
+    # Fresh codec per frame type so compression context doesn't carry over between types.
+    codec = FrameCodec(encoding, compression)
+    decoder = FrameDecoder(encoding, compression)
+
+    encoded = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encoded.append(codec.encode(frame))
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for data in encoded:
+        decoder.decode(data)
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+
+    # The first frame is the honest size: later identical frames compress against history.
+    first = encoded[0]
+    size = len(first.encode("utf-8") if isinstance(first, str) else first)
+    return size, encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    variants = [(encoding, compression)
+                for encoding in SUPPORTED_ENCODINGS for compression in (None, "deflate")]
+    frames = payloads.make_frames()
+
+    print(f"{'frame':<14}{'framing':<18}{'bytes':>10}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+    for name, frame in frames.items():
+        baseline = None
+        for encoding, compression in sorted(variants, key=lambda v: (v[0] != "json", v[1] is not None)):
+            size, encode_us, decode_us = measure(frame, encoding, compression, args.iterations)
+            baseline = baseline or size
+            label = f"{encoding}+{compression}" if compression else encoding
+            print(f"{name:<14}{label:<18}{size:>10}{size / baseline:>8.2f}{encode_us:>12.1f}{decode_us:>12.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
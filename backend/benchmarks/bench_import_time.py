@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Cold import time of the backend app, from ``python -X importtime``.
+
+    python benchmarks/bench_import_time.py [--runs 5] [--top 15] [--budget-ms 600]
+
+Each run imports ``app`` in a fresh interpreter with OPENAI_API_KEY unset, so
+it also checks that startup needs no credentials. Upstream SDKs (openai,
+ollama) and Pillow are built or imported on first use, not at import; the
+report flags any of them that show up. With --budget-ms the script exits
+non-zero when the median total exceeds the budget, for use in CI.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+import payloads  # noqa: F401  (puts app/ on sys.path)
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+DEFERRED_MODULES = ("openai", "ollama", "httpx", "PIL")
+
+
+def import_profile() -> dict:
+    """``{module: cumulative_us}`` for one cold ``import app``."""
+    env = dict(os.environ)
+    env.pop("OPENAI_API_KEY", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise SystemExit(f"import app failed:\n{tail}")
+    profile = {}
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    runs = [import_profile() for _ in range(args.runs)]
+    totals_ms = sorted(run["app"] / 1000 for run in runs)
+    median_ms = statistics.median(totals_ms)
+    print(f"import app: median {median_ms:.0f} ms, min {totals_ms[0]:.0f} ms "
+          f"over {args.runs} runs")
+
+    last = runs[-1]
+    print(f"\n{'cumulative ms':>14}  top-level module")
+    top_level = {name: us for name, us in last.items() if "." not in name and name != "app"}
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{us / 1000:>14.1f}  {name}")
+
+    eager = [name for name in DEFERRED_MODULES if name in last]
+    print("\ndeferred SDKs imported at startup: " + (", ".join(eager) if eager else "none"))
+
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"over budget: {median_ms:.0f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
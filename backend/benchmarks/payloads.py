@@ -0,0 +1,83 @@
+"""Synthetic, realistically sized payloads shared by the benchmark scripts."""
+
+import os
+import sys
+
+# Benchmarks import backend modules the same way app.py does (app/ on sys.path).
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+
+def make_poi(idx: int, images: int = 10) -> dict:
+    return {
+        "name": f"Point of Interest {idx}",
+        "description": f"A well-known place number {idx} with a long enough description "
+                       "to look like what the POI agent returns for real destinations.",
+        "geo_coordinate": {"lat": 35.0 + idx * 0.001, "lng": 139.0 + idx * 0.001},
+        "poi_type": "tourist_destination",
+        "opening_hours": "9:00 AM - 5:00 PM",
+        "address": f"{idx} Example Street, Shibuya-ku, Tokyo 150-0002, Japan",
+        "special_instructions": "Arrive early to avoid the crowds; cash only at the gate.",
+        "cost": "¥1,000",
+        "images": {
+            "urls": [
+                f"https://live.staticflickr.com/65535/5495772{idx:04d}{n}_f703109d69_c.jpg"
+                for n in range(images)
+            ]
+        },
+    }
+
+
+def make_pois(count: int = 40, images: int = 10) -> list:
+    return [make_poi(idx, images=images) for idx in range(count)]
+
+
+def make_plan(options: int = 3, days: int = 10, blocks: int = 5) -> list:
+    plan = []
+    for o_idx in range(options):
+        plan_days = []
+        for d_idx in range(days):
+            plan_blocks = []
+            for b_idx in range(blocks):
+                plan_blocks.append({
+                    "time": f"{9 + b_idx * 2}:00 - {10 + b_idx * 2}:30",
+                    "description": f"Option {o_idx} day {d_idx} block {b_idx}: visit and explore",
+                    "pois": [{
+                        "name": f"Point of Interest {(d_idx * blocks + b_idx) % 40}",
+                        "description": "Embedded POI summary as produced by the planner agent.",
+                        "geo_coordinate": {"lat": 35.0 + b_idx * 0.01, "lng": 139.0 + d_idx * 0.01},
+                        "poi_type": "tourist_destination",
+                        "cost": "",
+                    }],
+                    "transportation": {"duration": "20 minutes", "method": "subway", "cost": 3.5},
+                })
+            plan_days.append({
+                "highlight": f"Day {d_idx} highlight for option {o_idx}",
+                "lodging": "Hotel in Shinjuku",
+                "blocks": plan_blocks,
+            })
+        plan.append({
+            "overall_cost": f"${4000 + o_idx * 1500}",
+            "general_notes": f"Option {o_idx}: a balanced itinerary with culture, food and rest.",
+            "days": plan_days,
+        })
+    return plan
+
+
+def make_frames() -> dict:
+    """One representative frame per WebSocket frame type."""
+    pois = make_pois()
+    return {
+        "intents": {"type": "intents", "data": [
+            {"intent": "Points_Of_Interest", "action": "add", "value": "Tokyo"},
+            {"intent": "Schedule_Requirement", "action": "add", "value": "10 day trip"},
+        ]},
+        "pois": {"type": "pois", "data": pois},
+        "requirements": {"type": "requirements", "data": [
+            {"description": "10 day trip", "priority": "preferred"},
+            {"description": "Budget under $6000 total", "priority": "must_have"},
+        ]},
+        "plan": {"type": "plan", "data": make_plan()},
+        "poi_images": {"type": "poi_images", "data": {"name": pois[0]["name"], "images": pois[0]["images"]}},
+    }
@@ -0,0 +1,384 @@
+"""Frozen copy of the validate_json + from_json code that POIModel.decode and
+PlanOptionModel.decode replaced; bench_decode.py uses it as the baseline.
+
+Not imported by the app. Only the parsing methods are copied; the models and
+_normalize_input are the live ones, which the single-pass change left as is.
+"""
+
+from typing import Any, List, Optional
+from urllib.parse import urlparse
+
+import payloads  # noqa: F401  (puts app/ on sys.path)
+
+from Planner.PlanOptionModel import Block, Day, PlanOptionModel, SinglePlanOption, Transportation
+from POI.POIModel import (
+    GeoCoordinate,
+    POIModel,
+    POIType,
+    SinglePOI,
+    SinglePOIWithCost,
+)
+
+
+class TwoPassPOIModel(POIModel):
+    @classmethod
+    def from_json(
+        cls, data: Any, require_images: bool = True, allow_empty: bool = False
+    ) -> "POIModel":
+        items_data = cls._normalize_input(data)
+        if items_data is None:
+            raise ValueError("invalid_poi_input")
+        if not items_data and not allow_empty:
+            raise ValueError("poi list is empty")
+
+        items: List[SinglePOIWithCost] = []
+        for idx, item in enumerate(items_data):
+            if not isinstance(item, dict):
+                raise ValueError(f"items[{idx}] must be an object")
+
+            name = item.get("name")
+            if not isinstance(name, str) or not name:
+                raise ValueError(f"items[{idx}].name is required")
+
+            description = item.get("description")
+            if not isinstance(description, str) or not description:
+                raise ValueError(f"items[{idx}].description is required")
+
+            geo = item.get("geo_coordinate")
+            if not isinstance(geo, dict):
+                raise ValueError(
+                    f"items[{idx}].geo_coordinate must be an object")
+            lat = geo.get("lat")
+            lng = geo.get("lng")
+            if not isinstance(lat, (int, float)):
+                raise ValueError(
+                    f"items[{idx}].geo_coordinate.lat must be a number"
+                )
+            if not isinstance(lng, (int, float)):
+                raise ValueError(
+                    f"items[{idx}].geo_coordinate.lng must be a number"
+                )
+
+            images: Optional[List[str]] = None
+            if "images" in item and isinstance(item["images"], dict):
+                urls = item["images"].get("urls")
+                if isinstance(urls, list):
+                    valid_urls = [
+                        url for url in urls if isinstance(url, str) and _is_valid_url(url)
+                    ]
+                    images = valid_urls
+            if require_images and images is None:
+                raise ValueError(f"items[{idx}].images.urls is required")
+
+            opening_hours = item.get("opening_hours")
+            if opening_hours is not None and not isinstance(opening_hours, str):
+                opening_hours = None
+
+            address = item.get("address")
+            if address is not None and not isinstance(address, str):
+                address = None
+
+            special_instructions = item.get("special_instructions")
+            if special_instructions is not None and not isinstance(
+                special_instructions, str
+            ):
+                special_instructions = None
+
+            poi_type_raw = item.get("poi_type")
+            if poi_type_raw is None:
+                poi_type = POIType.TOURIST_DESTINATION
+            else:
+                try:
+                    poi_type = POIType(poi_type_raw)
+                except ValueError:
+                    poi_type = POIType.TOURIST_DESTINATION
+
+            cost_raw = item.get("cost")
+            cost = cost_raw if isinstance(cost_raw, str) else ""
+
+            items.append(
+                SinglePOIWithCost(
+                    poi=SinglePOI(
+                        name=name,
+                        description=description,
+                        geo_coordinate=GeoCoordinate(lat=lat, lng=lng),
+                        poi_type=poi_type,
+                        images=images,
+                        opening_hours=opening_hours,
+                        address=address,
+                        special_instructions=special_instructions,
+                    ),
+                    cost=cost,
+                )
+            )
+        return cls(items)
+
+    @classmethod
+    def validate_json(
+        cls, data: Any, require_images: bool = True, allow_empty: bool = False
+    ) -> List[str]:
+        errors: List[str] = []
+        items = cls._normalize_input(data)
+        if items is None:
+            return ["poi must be a list or object with results/poi list"]
+        if not items and not allow_empty:
+            return ["poi list is empty"]
+
+        for idx, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.append(f"items[{idx}] must be an object")
+                continue
+            name = item.get("name")
+            description = item.get("description")
+            geo = item.get("geo_coordinate")
+            if not isinstance(name, str) or not name:
+                errors.append(f"items[{idx}].name is required")
+            if not isinstance(description, str) or not description:
+                errors.append(f"items[{idx}].description is required")
+            if not isinstance(geo, dict):
+                errors.append(f"items[{idx}].geo_coordinate must be an object")
+            else:
+                lat = geo.get("lat")
+                lng = geo.get("lng")
+                if not isinstance(lat, (int, float)):
+                    errors.append(
+                        f"items[{idx}].geo_coordinate.lat must be a number")
+                if not isinstance(lng, (int, float)):
+                    errors.append(
+                        f"items[{idx}].geo_coordinate.lng must be a number")
+            if require_images:
+                images = item.get("images")
+                if not isinstance(images, dict):
+                    errors.append(f"items[{idx}].images must be an object")
+                else:
+                    urls = images.get("urls")
+                    if not isinstance(urls, list):
+                        errors.append(
+                            f"items[{idx}].images.urls must be an array")
+
+        return errors
+
+
+def _is_valid_url(value: str) -> bool:
+    parsed = urlparse(value)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+class TwoPassPlanOptionModel(PlanOptionModel):
+    @classmethod
+    def from_json(cls, data: Any, allow_empty: bool = False) -> "PlanOptionModel":
+        options_data = cls._normalize_input(data)
+        if options_data is None:
+            raise ValueError("invalid_plan_option_input")
+        if not options_data and not allow_empty:
+            raise ValueError("options list is empty")
+
+        items: List[SinglePlanOption] = []
+        for idx, option in enumerate(options_data):
+            items.append(_parse_option(option, idx))
+        return cls(items)
+
+    @classmethod
+    def validate_json(cls, data: Any, allow_empty: bool = False) -> List[str]:
+        errors: List[str] = []
+        options = cls._normalize_input(data)
+        if options is None:
+            return ["options must be a list or object with options list"]
+        if not options and not allow_empty:
+            return ["options list is empty"]
+
+        for idx, option in enumerate(options):
+            errors.extend(_validate_option(option, idx))
+        return errors
+
+
+# ---------------------------------------------------------------------------
+# Parsing helpers (from_json path – raise on first error)
+# ---------------------------------------------------------------------------
+
+
+def _parse_option(option: Any, idx: int) -> SinglePlanOption:
+    if not isinstance(option, dict):
+        raise ValueError(f"options[{idx}] must be an object")
+
+    overall_cost = option.get("overall_cost")
+    if not isinstance(overall_cost, str) or not overall_cost:
+        raise ValueError(f"options[{idx}].overall_cost is required")
+
+    general_notes = option.get("general_notes")
+    if not isinstance(general_notes, str) or not general_notes:
+        raise ValueError(f"options[{idx}].general_notes is required")
+
+    days_data = option.get("days")
+    if not isinstance(days_data, list) or not days_data:
+        raise ValueError(f"options[{idx}].days must be a non-empty list")
+
+    days: List[Day] = []
+    for d_idx, day_data in enumerate(days_data):
+        days.append(_parse_day(day_data, idx, d_idx))
+
+    return SinglePlanOption(days=days, overall_cost=overall_cost, general_notes=general_notes)
+
+
+def _parse_day(day_data: Any, opt_idx: int, day_idx: int) -> Day:
+    prefix = f"options[{opt_idx}].days[{day_idx}]"
+    if not isinstance(day_data, dict):
+        raise ValueError(f"{prefix} must be an object")
+
+    highlight = day_data.get("highlight")
+    if not isinstance(highlight, str) or not highlight:
+        raise ValueError(f"{prefix}.highlight is required")
+
+    blocks_data = day_data.get("blocks")
+    if not isinstance(blocks_data, list) or not blocks_data:
+        raise ValueError(f"{prefix}.blocks must be a non-empty list")
+
+    blocks: List[Block] = []
+    for b_idx, block_data in enumerate(blocks_data):
+        blocks.append(_parse_block(block_data, opt_idx, day_idx, b_idx))
+
+    lodging = day_data.get("lodging")
+    if lodging is not None and not isinstance(lodging, str):
+        lodging = None
+
+    return Day(highlight=highlight, blocks=blocks, lodging=lodging)
+
+
+def _parse_block(block_data: Any, opt_idx: int, day_idx: int, block_idx: int) -> Block:
+    prefix = f"options[{opt_idx}].days[{day_idx}].blocks[{block_idx}]"
+    if not isinstance(block_data, dict):
+        raise ValueError(f"{prefix} must be an object")
+
+    time = block_data.get("time")
+    if not isinstance(time, str) or not time:
+        raise ValueError(f"{prefix}.time is required")
+
+    description = block_data.get("description")
+    if not isinstance(description, str) or not description:
+        raise ValueError(f"{prefix}.description is required")
+
+    pois: Optional[List[SinglePOIWithCost]] = None
+    pois_data = block_data.get("pois")
+    if pois_data is not None:
+        if not isinstance(pois_data, list):
+            raise ValueError(f"{prefix}.pois must be a list")
+        poi_model = TwoPassPOIModel.from_json(pois_data, require_images=False, allow_empty=True)
+        pois = poi_model.items
+
+    transportation: Optional[Transportation] = None
+    transport_data = block_data.get("transportation")
+    if transport_data is not None:
+        transportation = _parse_transportation(transport_data, prefix)
+
+    return Block(time=time, description=description, pois=pois, transportation=transportation)
+
+
+def _parse_transportation(data: Any, prefix: str) -> Transportation:
+    if not isinstance(data, dict):
+        raise ValueError(f"{prefix}.transportation must be an object")
+
+    duration_raw = data.get("duration")
+    duration = duration_raw if isinstance(duration_raw, str) and duration_raw else None
+
+    method_raw = data.get("method")
+    method = method_raw if isinstance(method_raw, str) and method_raw else None
+
+    cost: Optional[float] = None
+    cost_raw = data.get("cost")
+    if cost_raw is not None:
+        if not isinstance(cost_raw, (int, float)):
+            raise ValueError(f"{prefix}.transportation.cost must be a number")
+        cost = cost_raw
+
+    return Transportation(duration=duration, method=method, cost=cost)
+
+
+# ---------------------------------------------------------------------------
+# Validation helpers (validate_json path – collect all errors)
+# ---------------------------------------------------------------------------
+
+
+def _validate_option(option: Any, idx: int) -> List[str]:
+    errors: List[str] = []
+    if not isinstance(option, dict):
+        return [f"options[{idx}] must be an object"]
+
+    overall_cost = option.get("overall_cost")
+    if not isinstance(overall_cost, str) or not overall_cost:
+        errors.append(f"options[{idx}].overall_cost is required")
+
+    general_notes = option.get("general_notes")
+    if not isinstance(general_notes, str) or not general_notes:
+        errors.append(f"options[{idx}].general_notes is required")
+
+    days_data = option.get("days")
+    if not isinstance(days_data, list) or not days_data:
+        errors.append(f"options[{idx}].days must be a non-empty list")
+    else:
+        for d_idx, day_data in enumerate(days_data):
+            errors.extend(_validate_day(day_data, idx, d_idx))
+
+    return errors
+
+
+def _validate_day(day_data: Any, opt_idx: int, day_idx: int) -> List[str]:
+    errors: List[str] = []
+    prefix = f"options[{opt_idx}].days[{day_idx}]"
+    if not isinstance(day_data, dict):
+        return [f"{prefix} must be an object"]
+
+    highlight = day_data.get("highlight")
+    if not isinstance(highlight, str) or not highlight:
+        errors.append(f"{prefix}.highlight is required")
+
+    blocks_data = day_data.get("blocks")
+    if not isinstance(blocks_data, list) or not blocks_data:
+        errors.append(f"{prefix}.blocks must be a non-empty list")
+    else:
+        for b_idx, block_data in enumerate(blocks_data):
+            errors.extend(_validate_block(block_data, opt_idx, day_idx, b_idx))
+
+    return errors
+
+
+def _validate_block(block_data: Any, opt_idx: int, day_idx: int, block_idx: int) -> List[str]:
+    errors: List[str] = []
+    prefix = f"options[{opt_idx}].days[{day_idx}].blocks[{block_idx}]"
+    if not isinstance(block_data, dict):
+        return [f"{prefix} must be an object"]
+
+    time = block_data.get("time")
+    if not isinstance(time, str) or not time:
+        errors.append(f"{prefix}.time is required")
+
+    description = block_data.get("description")
+    if not isinstance(description, str) or not description:
+        errors.append(f"{prefix}.description is required")
+
+    pois_data = block_data.get("pois")
+    if pois_data is not None:
+        if not isinstance(pois_data, list):
+            errors.append(f"{prefix}.pois must be a list")
+        else:
+            poi_errors = TwoPassPOIModel.validate_json(
+                pois_data, require_images=False, allow_empty=True)
+            for err in poi_errors:
+                errors.append(f"{prefix}.pois: {err}")
+
+    transport_data = block_data.get("transportation")
+    if transport_data is not None:
+        errors.extend(_validate_transportation(transport_data, prefix))
+
+    return errors
+
+
+def _validate_transportation(data: Any, prefix: str) -> List[str]:
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        return [f"{prefix}.transportation must be an object"]
+
+    cost = data.get("cost")
+    if cost is not None and not isinstance(cost, (int, float)):
+        errors.append(f"{prefix}.transportation.cost must be a number")
+
+    return errors
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Build the read-only POI gazetteer served by add_poi before the LLM is called.
+
+Entries come from prior agent results saved as JSON/JSONL
+(``{"name": ..., "aliases": [...], "pois": [...]}`` per destination), or are
+generated live through the POI agent with ``--generate``.
+
+    python build_gazetteer.py --from-json kyoto.json tokyo.jsonl
+    python build_gazetteer.py --append --generate "Kyoto" --generate "Lisbon"
+"""
+
+import argparse
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from Common import Codec  # noqa: E402
+from POI.Gazetteer import POI_GAZETTEER_PATH, build_gazetteer, read_gazetteer  # noqa: E402
+
+
+def load_entries(path: str) -> list:
+    with open(path, "rb") as handle:
+        raw = handle.read()
+    if path.endswith(".jsonl"):
+        data = [Codec.loads(line) for line in raw.splitlines() if line.strip()]
+    else:
+        data = Codec.loads(raw)
+    entries = data if isinstance(data, list) else [data]
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("name") or "pois" not in entry:
+            raise ValueError(f"{path}: each entry needs 'name' and 'pois'")
+    return entries
+
+
+def generate_entry(name: str, images_per_poi: int) -> dict:
+    from POI.POIAgent import add_poi  # needs OPENAI_API_KEY / FLICKR_API_KEY
+
+    poi_model = add_poi([], name, images_per_poi=images_per_poi)
+    return {"name": name, "aliases": [], "pois": poi_model.to_list()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the offline POI gazetteer")
+    parser.add_argument("--output", default=POI_GAZETTEER_PATH,
+                        help=f"Gazetteer file (default: {POI_GAZETTEER_PATH})")
+    parser.add_argument("--from-json", nargs="*", default=[], metavar="FILE",
+                        help="JSON or JSONL files of {name, aliases, pois} entries")
+    parser.add_argument("--generate", action="append", default=[], metavar="NAME",
+                        help="Ask the POI agent for a destination (repeatable)")
+    parser.add_argument("--images-per-poi", type=int, default=10,
+                        help="Images fetched per generated POI (default: 10)")
+    parser.add_argument("--append", action="store_true",
+                        help="Keep the destinations already in --output")
+    args = parser.parse_args()
+
+    # Later sources replace earlier entries with the same name.
+    entries = {}
+    if args.append and os.path.exists(args.output):
+        for entry in read_gazetteer(args.output):
+            entries[entry["name"]] = entry
+    for path in args.from_json:
+        for entry in load_entries(path):
+            entries[entry["name"]] = entry
+    for name in args.generate:
+        print(f"generating {name} ...")
+        entries[name] = generate_entry(name, args.images_per_poi)
+
+    if not entries:
+        parser.error("nothing to build: pass --from-json and/or --generate")
+    count = build_gazetteer(args.output, entries.values())
+    print(f"wrote {count} destinations to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Generate itineraries offline: add_poi + plan per destination across a process pool.
+
+Jobs come from CSV or JSONL. Each row names a ``destination`` and, optionally,
+an ``id``, ``requirements``, ``number_of_poi`` and ``images_per_poi``. In CSV,
+requirements are ``;``-separated, each optionally prefixed with its priority
+(``must_have: Budget under $3000; avoid: hostels``). In JSONL they are a list
+in the RequirementModel format. ``--requirement-sets`` crosses every
+destination with every set from a second file (``id`` + ``requirements``).
+
+    python bulk_generate.py destinations.csv -o itineraries.jsonl --workers 4
+    python bulk_generate.py cities.jsonl --requirement-sets budgets.jsonl -o out.jsonl
+
+One JSON line is written per job as it completes (``status``, ``pois``,
+validated plan ``options`` or ``error``). The output doubles as the
+checkpoint: rerunning skips jobs already in it, so an interrupted run
+resumes where it stopped. Needs OPENAI_API_KEY (and FLICKR_API_KEY for
+images); workers split the upstream rate limits between them and share
+caches through CACHE_BACKEND.
+"""
+
+import argparse
+import csv
+import hashlib
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from Common import Codec  # noqa: E402
+
+PRIORITIES = ("must_have", "preferred", "avoid")
+_defaults: dict = {}  # per worker, set by _init_worker
+
+
+def _csv_requirements(raw: str) -> list:
+    requirements = []
+    for part in (raw or "").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        priority, _, description = part.partition(":")
+        if description and priority.strip().lower() in PRIORITIES:
+            requirements.append({"description": description.strip(),
+                                 "priority": priority.strip().lower()})
+        else:
+            requirements.append({"description": part})
+    return requirements
+
+
+def read_rows(path: str) -> list:
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as handle:
+            rows = list(csv.DictReader(handle))
+        for row in rows:
+            row["requirements"] = _csv_requirements(row.get("requirements", ""))
+            for field in ("number_of_poi", "images_per_poi"):
+                row[field] = int(row[field]) if row.get(field) else None
+        return rows
+    with open(path, "rb") as handle:
+        return [Codec.loads(line) for line in handle if line.strip()]
+
+
+def _job_id(*parts) -> str:
+    return hashlib.sha256(Codec.dumps_canonical(list(parts)).encode("utf-8")).hexdigest()[:16]
+
+
+def load_jobs(inputs: list, requirement_sets_path=None) -> list:
+    """Jobs with stable ids (given, or derived from destination + requirements)."""
+    destinations = [row for path in inputs for row in read_rows(path)]
+    for idx, row in enumerate(destinations):
+        if not isinstance(row, dict) or not row.get("destination"):
+            raise ValueError(f"row {idx}: 'destination' is required")
+    sets = read_rows(requirement_sets_path) if requirement_sets_path else [None]
+    jobs = []
+    for row in destinations:
+        for requirement_set in sets:
+            requirements = list(row.get("requirements") or [])
+            job_id = row.get("id") or _job_id(row["destination"], requirements)
+            if requirement_set is not None:
+                requirements += requirement_set.get("requirements") or []
+                set_id = requirement_set.get("id") or _job_id(requirement_set.get("requirements"))
+                job_id = f"{job_id}:{set_id}"
+            jobs.append({
+                "id": str(job_id),
+                "destination": row["destination"],
+                "requirements": requirements,
+                "number_of_poi": row.get("number_of_poi"),
+                "images_per_poi": row.get("images_per_poi"),
+            })
+    return jobs
+
+
+def read_checkpoint(path: str, retry_failed: bool) -> set:
+    """Ids already written to ``path`` (only successful ones with ``retry_failed``)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb") as handle:
+        for line in handle:
+            try:
+                record = Codec.loads(line)
+            except Codec.DecodeError:
+                continue  # a line cut short by an interrupted run
+            # "ok" without options: written before empty plans counted as failures
+            succeeded = record.get("status") == "ok" and bool(record.get("options"))
+            if succeeded or not retry_failed:
+                done.add(record.get("id"))
+    return done
+
+
+def _init_worker(workers: int, defaults: dict) -> None:
+    from Common import split_rate_limits
+
+    split_rate_limits(workers)
+    _defaults.update(defaults)
+
+
+def generate(job: dict) -> dict:
+    """Runs in a worker process: POIs, then a validated plan, for one job."""
+    from Common import metrics
+    from Planner import plan
+    from Planner.RequirementModel import RequirementModel
+    from POI.POIAgent import add_poi
+
+    before = metrics.snapshot()["counters"]
+    started = time.perf_counter()
+    record = {"id": job["id"], "destination": job["destination"]}
+    try:
+        requirement_model = RequirementModel.from_json(job["requirements"], allow_empty=True)
+        poi_model = add_poi(
+            [], job["destination"],
+            number_of_poi=job.get("number_of_poi") or _defaults.get("number_of_poi"),
+            images_per_poi=job.get("images_per_poi") or _defaults.get("images_per_poi"),
+            skip_images=_defaults.get("skip_images", False),
+        )
+        plan_result = plan(poi_model, requirement_model)
+        if not plan_result.items:
+            # plan() answers an unparseable agent response with no options
+            raise ValueError("planner returned no valid options")
+        record.update(status="ok", requirements=requirement_model.to_list(),
+                      pois=poi_model.to_list(), options=plan_result.to_list())
+    except Exception as exc:
+        record.update(status="error", error=str(exc))
+    record["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    after = metrics.snapshot()["counters"]
+    record["counters"] = {
+        name: after[name] - before.get(name, 0) for name in after if after[name] != before.get(name, 0)
+    }
+    return record
+
+
+def cache_reuse(counters: dict) -> dict:
+    """``{cache: (hits, lookups)}`` from summed ``cache.<name>.hits/misses`` counters."""
+    reuse = {}
+    for name, value in counters.items():
+        parts = name.split(".")
+        if len(parts) == 3 and parts[0] == "cache" and parts[2] in ("hits", "misses"):
+            hits, lookups = reuse.get(parts[1], (0, 0))
+            reuse[parts[1]] = (hits + (value if parts[2] == "hits" else 0), lookups + value)
+    return reuse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="CSV or JSONL files of destinations")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results (and checkpoint)")
+    parser.add_argument("--requirement-sets", default=None, metavar="FILE",
+                        help="Cross every destination with each requirement set in FILE")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--number-of-poi", type=int, default=None)
+    parser.add_argument("--images-per-poi", type=int, default=3)
+    parser.add_argument("--skip-images", action="store_true")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Re-run jobs whose previous attempt failed")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after N new jobs")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.inputs, args.requirement_sets)
+    done = read_checkpoint(args.output, args.retry_failed)
+    seen = set(done)
+    pending = []
+    for job in jobs:
+        if job["id"] not in seen:
+            seen.add(job["id"])
+            pending.append(job)
+    pending = pending[:args.limit]
+    print(f"[bulk] {len(jobs)} jobs, {len(jobs) - len(pending)} already in {args.output}, "
+          f"{len(pending)} to run on {args.workers} workers")
+    if not pending:
+        return
+
+    defaults = {"number_of_poi": args.number_of_poi, "images_per_poi": args.images_per_poi,
+                "skip_images": args.skip_images}
+    counters: dict = {}
+    ok = failed = 0
+    started = time.perf_counter()
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker, initargs=(args.workers, defaults),
+    )
+    try:
+        futures = [executor.submit(generate, job) for job in pending]
+        with open(args.output, "ab") as output:
+            for count, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                for name, value in record.pop("counters").items():
+                    counters[name] = counters.get(name, 0) + value
+                output.write(Codec.dumps_bytes(record) + b"\n")
+                output.flush()
+                if record["status"] == "ok":
+                    ok += 1
+                else:
+                    failed += 1
+                detail = record["error"] if "error" in record else f"{len(record['options'])} options"
+                print(f"[bulk] {count}/{len(pending)} {record['destination']} ({record['id']}): "
+                      f"{record['status']} in {record['elapsed_ms'] / 1000:.1f}s - {detail}")
+    except KeyboardInterrupt:
+        print("[bulk] interrupted; rerun the same command to resume")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"\n[bulk] {ok} ok, {failed} failed in {elapsed:.1f}s "
+          f"({ok / max(elapsed / 60, 1e-9):.1f} itineraries/minute)")
+    for name, (hits, lookups) in sorted(cache_reuse(counters).items()):
+        print(f"[bulk] cache {name:<14} {hits}/{lookups} hits ({hits / lookups:.0%})")
+
+
+if __name__ == "__main__":
+    main()
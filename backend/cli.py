@@ -6,6 +6,7 @@ import json
 import sys
 import urllib.request
 import urllib.error
+import zlib
 
 try:
     import readline  # noqa: F401 — enables arrow-key history in input()
@@ -14,6 +15,11 @@ except ImportError:
 
 import websocket
 
+try:
+    import msgpack
+except ImportError:  # only needed for --encoding msgpack
+    msgpack = None
+
 
 # ---------------------------------------------------------------------------
 # ANSI colors (no third-party dependency)
@@ -38,11 +44,16 @@ class ConversationState:
         self.pois: list = []
         self.requirements: list = []
         self.plan: list = []
+        # Protocol 2 (delta) session tracking
+        self.session_id = None
+        self.version = None
 
     def reset(self):
         self.pois = []
         self.requirements = []
         self.plan = []
+        self.session_id = None
+        self.version = None
 
     def summary(self) -> str:
         lines = []
@@ -181,16 +192,102 @@ def display_error(message: str):
     print(f"\n{Color.RED}{Color.BOLD}[Error]{Color.RESET} {message}\n")
 
 
+class DeltaOutOfSync(Exception):
+    """A delta frame's base_version doesn't match local state."""
+
+
+def check_version(state: ConversationState, data: dict):
+    """Advance the local version, or fail if a frame was built on a different base."""
+    if "base_version" in data and data["base_version"] != state.version:
+        raise DeltaOutOfSync(
+            f"expected base_version {state.version}, got {data['base_version']}")
+    if "version" in data:
+        state.version = data["version"]
+
+
+def apply_list_delta(items: list, data: dict) -> list:
+    """Apply an added/removed/changed delta keyed by item id."""
+    by_id = {item.get("id"): item for item in items}
+    for item_id in data.get("removed", []):
+        by_id.pop(item_id, None)
+    for item in data.get("added", []) + data.get("changed", []):
+        by_id[item.get("id")] = item
+    return [by_id[item_id] for item_id in data.get("order", []) if item_id in by_id]
+
+
+def apply_plan_delta(options: list, data: dict) -> list:
+    """Apply per-option field and per-day changes to the local plan."""
+    options = options[: data.get("option_count", len(options))]
+    for change in data.get("changed", []):
+        index = change.get("index", 0)
+        while len(options) <= index:
+            options.append({"days": []})
+        option = dict(options[index])
+        option.update(change.get("fields", {}))
+        for key in change.get("removed_fields", []):
+            option.pop(key, None)
+        days = list(option.get("days", []))[: change.get("day_count", 0)]
+        for d_idx, day in change.get("days", {}).items():
+            d_idx = int(d_idx)
+            while len(days) <= d_idx:
+                days.append({})
+            days[d_idx] = day
+        option["days"] = days
+        options[index] = option
+    return options
+
+
+def merge_poi_images(state: ConversationState, img_data: dict):
+    """Merge a streamed image lookup into the matching POI in local state."""
+    poi_name = img_data.get("name", "")
+    images = img_data.get("images", {})
+    urls = images.get("urls", []) if isinstance(images, dict) else []
+    for poi in state.pois:
+        if poi.get("name") == poi_name:
+            poi["images"] = {"urls": urls}
+            break
+
+
+# ---------------------------------------------------------------------------
+# Frame decoding — mirrors the framing negotiated by the server
+# ---------------------------------------------------------------------------
+class FrameDecoder:
+    def __init__(self, encoding: str = "json", compression=None):
+        self.encoding = encoding
+        self.decompressor = (
+            zlib.decompressobj(wbits=-zlib.MAX_WBITS) if compression == "deflate" else None
+        )
+
+    def decode(self, raw) -> dict:
+        if self.decompressor is not None:
+            raw = self.decompressor.decompress(raw)
+        if self.encoding == "msgpack":
+            return msgpack.unpackb(raw, raw=False)
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+
+
 # ---------------------------------------------------------------------------
 # Send a message over WebSocket and stream updates
 # ---------------------------------------------------------------------------
-def send_message(ws_url: str, message: str, state: ConversationState):
+def send_message(ws_url: str, message: str, state: ConversationState, delta: bool = False,
+                 framing: dict = None):
     payload = {
         "message": message,
         "pois": state.pois,
         "requirements": state.requirements,
         "plan": state.plan,
+        "batch_images": True,
     }
+    if framing:
+        payload["framing"] = framing
+    if delta:
+        payload["protocol"] = 2
+        if state.session_id:
+            # Full state still goes up so the server can fall back to it on a version mismatch.
+            payload["session_id"] = state.session_id
+            payload["state_version"] = state.version
 
     try:
         ws = websocket.create_connection(ws_url, timeout=120)
@@ -200,16 +297,23 @@ def send_message(ws_url: str, message: str, state: ConversationState):
 
     try:
         ws.send(json.dumps(payload))
+        decoder = FrameDecoder()
 
         while True:
             raw = ws.recv()
             if not raw:
                 break
 
-            data = json.loads(raw)
+            data = decoder.decode(raw)
             msg_type = data.get("type")
+            check_version(state, data)
 
-            if msg_type == "intents":
+            if msg_type == "framing":
+                decoder = FrameDecoder(data.get("encoding", "json"), data.get("compression"))
+                print(f"  {Color.DIM}[Framing] {data.get('encoding')}"
+                      f" / {data.get('compression') or 'uncompressed'}{Color.RESET}")
+
+            elif msg_type == "intents":
                 display_intents(data.get("data", []))
 
             elif msg_type == "pois":
@@ -230,16 +334,28 @@ def send_message(ws_url: str, message: str, state: ConversationState):
             elif msg_type == "poi_images":
                 img_data = data.get("data", {})
                 display_poi_images(img_data)
-                # Merge images into existing POI state
-                poi_name = img_data.get("name", "")
-                images = img_data.get("images", {})
-                urls = images.get("urls", []) if isinstance(images, dict) else []
-                for poi in state.pois:
-                    if poi.get("name") == poi_name:
-                        poi["images"] = {"urls": urls}
-                        break
+                merge_poi_images(state, img_data)
+
+            elif msg_type == "poi_images_batch":
+                for img_data in data.get("data", []):
+                    display_poi_images(img_data)
+                    merge_poi_images(state, img_data)
+
+            elif msg_type == "pois_delta":
+                state.pois = apply_list_delta(state.pois, data)
+                display_pois(state.pois)
+
+            elif msg_type == "requirements_delta":
+                state.requirements = apply_list_delta(state.requirements, data)
+                display_requirements(state.requirements)
+
+            elif msg_type == "plan_delta":
+                state.plan = apply_plan_delta(state.plan, data)
+                display_plan(state.plan)
 
             elif msg_type == "done":
+                if data.get("session_id"):
+                    state.session_id = data["session_id"]
                 display_done()
                 break
 
@@ -248,8 +364,12 @@ def send_message(ws_url: str, message: str, state: ConversationState):
                 break
 
             else:
-                print(f"  {Color.DIM}[Unknown: {msg_type}] {raw[:200]}{Color.RESET}")
+                print(f"  {Color.DIM}[Unknown: {msg_type}] {str(data)[:200]}{Color.RESET}")
 
+    except DeltaOutOfSync as exc:
+        # Next turn re-uploads full state and receives full snapshots.
+        state.version = None
+        display_error(f"Delta out of sync ({exc}); will resync on next message")
     except websocket.WebSocketTimeoutException:
         display_error("WebSocket timed out waiting for response (120s)")
     except websocket.WebSocketConnectionClosedException:
@@ -306,8 +426,23 @@ def main():
     parser = argparse.ArgumentParser(description="TravelPlanner CLI test tool")
     parser.add_argument("--host", default="127.0.0.1", help="Backend host (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=5000, help="Backend port (default: 5000)")
+    parser.add_argument("--delta", action="store_true",
+                        help="Use protocol 2 (delta-encoded state updates)")
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json",
+                        help="Frame encoding to request (default: json)")
+    parser.add_argument("--compress", action="store_true",
+                        help="Request deflate-compressed binary frames")
     args = parser.parse_args()
 
+    if args.encoding == "msgpack" and msgpack is None:
+        parser.error("--encoding msgpack requires the msgpack package")
+    framing = None
+    if args.encoding != "json" or args.compress:
+        framing = {
+            "encoding": [args.encoding, "json"],
+            "compression": ["deflate"] if args.compress else [],
+        }
+
     base_url = f"http://{args.host}:{args.port}"
     ws_url = f"ws://{args.host}:{args.port}/ws/chat"
 
@@ -336,7 +471,7 @@ def main():
                 break
             continue
 
-        send_message(ws_url, user_input, state)
+        send_message(ws_url, user_input, state, delta=args.delta, framing=framing)
 
 
 if __name__ == "__main__":
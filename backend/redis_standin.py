@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""In-memory stand-in for a Redis server, for running CACHE_BACKEND=redis locally.
+
+Speaks enough RESP2 for Cache.RedisCache (PING, AUTH, SELECT, GET, SET with
+EX/PX, DEL, SCAN with MATCH, DBSIZE, FLUSHDB). Data lives in this process
+only; use a real Redis/Valkey server when workers run on several hosts.
+
+    python redis_standin.py --port 6379
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6379/0 gunicorn -w 4 app:app
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+_store = {}
+_lock = threading.Lock()
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode("utf-8")
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _live(key: bytes, now: float):
+    entry = _store.get(key)
+    if entry is not None and entry[1] is not None and entry[1] <= now:
+        del _store[key]
+        return None
+    return entry
+
+
+def execute(args: list):
+    command = args[0].upper()
+    now = time.time()
+    with _lock:
+        if command in (b"PING", b"AUTH", b"SELECT"):
+            return "PONG" if command == b"PING" else "OK"
+        if command == b"GET":
+            entry = _live(args[1], now)
+            return entry[0] if entry else None
+        if command == b"SET":
+            expires_at = None
+            options = [arg.upper() for arg in args[3:]]
+            for idx, option in enumerate(options):
+                if option in (b"EX", b"PX"):
+                    amount = float(args[3 + idx + 1])
+                    expires_at = now + (amount if option == b"EX" else amount / 1000.0)
+            _store[args[1]] = (args[2], expires_at)
+            return "OK"
+        if command == b"DEL":
+            return sum(1 for key in args[1:] if _store.pop(key, None) is not None)
+        if command == b"SCAN":
+            # Single pass: every live key matching the pattern, cursor back to 0.
+            pattern = b"*"
+            for idx, arg in enumerate(args):
+                if arg.upper() == b"MATCH" and idx + 1 < len(args):
+                    pattern = args[idx + 1]
+            keys = [
+                key for key in list(_store)
+                if _live(key, now) and fnmatch.fnmatchcase(key.decode("utf-8", "replace"),
+                                                           pattern.decode("utf-8", "replace"))
+            ]
+            return [b"0", keys]
+        if command == b"DBSIZE":
+            return sum(1 for key in list(_store) if _live(key, now))
+        if command == b"FLUSHDB":
+            _store.clear()
+            return "OK"
+    raise ValueError(f"unknown command '{command.decode('utf-8', 'replace')}'")
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            try:
+                reply = _encode(execute(args))
+            except (ValueError, IndexError) as exc:
+                reply = b"-ERR %s\r\n" % str(exc).encode("utf-8")
+            self.wfile.write(reply)
+
+
+class ThreadingRespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory Redis stand-in for local development")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    with ThreadingRespServer((args.host, args.port), RespHandler) as server:
+        print(f"[redis_standin] listening on {args.host}:{args.port}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Re-drive captured /chat and /ws/chat conversations against a running server.
+
+Record real traffic with capture on, then load-test a build whose upstream
+calls are answered from the same file:
+
+    CAPTURE_PATH=capture.jsonl python app/app.py                       # record
+    UPSTREAM_REPLAY_PATH=capture.jsonl UPSTREAM_REPLAY_SPEED=4 python app/app.py
+    python replay_traffic.py capture.jsonl --speed 4 --concurrency 32
+
+Each conversation keeps its recorded turn spacing divided by --speed, so a
+message recorded while the previous turn was still running supersedes it
+again. Protocol 2 conversations get a fresh session id and follow the
+server's state versions; async HTTP turns are polled until their job ends.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, deque
+
+import websocket
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from Common import Codec  # noqa: E402
+from Transport.Framing import FrameDecoder  # noqa: E402
+
+TERMINAL_FRAMES = ("done", "cancelled", "error")
+JOB_POLL_SECONDS = 0.2
+
+
+def load_conversations(path: str) -> list:
+    """Captured turns grouped by conversation, each list in send order."""
+    conversations = {}
+    with open(path, "rb") as handle:
+        for line in handle:
+            try:
+                entry = Codec.loads(line)
+            except Codec.DecodeError:
+                continue
+            if isinstance(entry, dict) and entry.get("type") == "turn":
+                conversations.setdefault(entry["conversation"], []).append(entry)
+    result = [sorted(turns, key=lambda turn: turn["started_at"]) for turns in conversations.values()]
+    return sorted(result, key=lambda turns: turns[0]["started_at"])
+
+
+class Results:
+    def __init__(self) -> None:
+        self.turns = []
+        self._lock = threading.Lock()
+
+    def add(self, transport: str, outcome: str, latency_ms=None, first_frame_ms=None,
+            late_ms: float = 0.0) -> None:
+        with self._lock:
+            self.turns.append({
+                "transport": transport, "outcome": outcome, "latency_ms": latency_ms,
+                "first_frame_ms": first_frame_ms, "late_ms": late_ms,
+            })
+
+
+def _sleep_until(when: float) -> float:
+    """Sleep until the monotonic time ``when``; returns how late we are in ms."""
+    delay = when - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    return max(0.0, time.monotonic() - when) * 1000
+
+
+def _ms_since(started: float) -> float:
+    return round((time.monotonic() - started) * 1000, 1)
+
+
+class WsConnection:
+    """One /ws/chat connection; the server closes it after its last turn ends."""
+
+    def __init__(self, url: str, results: Results, state: dict, timeout: float) -> None:
+        self.results = results
+        self.state = state
+        self.ws = websocket.create_connection(url, timeout=timeout)
+        self.ws.settimeout(None)  # turns are bounded by wait(), not by each read
+        self.in_flight = deque()  # [sent_at, first_frame_ms, late_ms] per unfinished turn
+        self.closing = False
+        self.settled = threading.Condition()
+        self.reader = threading.Thread(target=self._read_frames, name="replay-ws-reader",
+                                       daemon=True)
+        self.reader.start()
+
+    def busy(self) -> bool:
+        with self.settled:
+            return bool(self.in_flight)
+
+    def send(self, payload: dict, late_ms: float) -> None:
+        with self.settled:
+            self.in_flight.append([time.monotonic(), None, late_ms])
+        self.ws.send(Codec.dumps(payload))
+
+    def wait(self, timeout: float) -> None:
+        with self.settled:
+            self.settled.wait_for(lambda: not self.in_flight, timeout=timeout)
+
+    def close(self) -> None:
+        self.closing = True
+        self.ws.close()
+        self.reader.join(timeout=1)
+
+    def _read_frames(self) -> None:
+        decoder = None
+        try:
+            while True:
+                data = self.ws.recv()
+                if not data:
+                    break
+                if isinstance(data, str):
+                    frame = Codec.loads(data)
+                    if frame.get("type") == "framing":
+                        decoder = FrameDecoder(frame["encoding"], frame.get("compression"))
+                        continue
+                else:
+                    frame = decoder.decode(data)
+                if "version" in frame:
+                    self.state["version"] = frame["version"]
+                with self.settled:
+                    if not self.in_flight:
+                        continue
+                    if self.in_flight[0][1] is None:
+                        self.in_flight[0][1] = _ms_since(self.in_flight[0][0])
+                    if frame.get("type") in TERMINAL_FRAMES:
+                        sent_at, first_ms, late_ms = self.in_flight.popleft()
+                        outcome = "ok" if frame["type"] == "done" else frame["type"]
+                        self.results.add("ws", outcome, _ms_since(sent_at), first_ms, late_ms)
+                        self.settled.notify_all()
+        except (websocket.WebSocketException, OSError):
+            pass
+        finally:
+            with self.settled:
+                while self.in_flight:
+                    late_ms = self.in_flight.popleft()[2]
+                    self.results.add("ws", "timeout" if self.closing else "disconnected",
+                                     late_ms=late_ms)
+                self.settled.notify_all()
+
+
+def replay_ws(base_url: str, turns: list, start: float, speed: float, timeout: float,
+              results: Results) -> None:
+    # Like the clients: a connection per turn, except that a message recorded
+    # while the previous turn was still running is sent on its connection
+    # and supersedes it.
+    url = base_url.replace("http", "ws", 1) + "/ws/chat"
+    session_id = uuid.uuid4().hex
+    state = {"version": None}
+    connection = None
+    try:
+        for turn in turns:
+            late_ms = _sleep_until(start + (turn["started_at"] - turns[0]["started_at"]) / speed)
+            payload = dict(turn["request"])
+            if payload.get("protocol") or "session_id" in payload:
+                payload["session_id"] = session_id
+                payload["state_version"] = state["version"]
+            if connection is None or not connection.busy():
+                if connection is not None:
+                    connection.close()
+                connection = WsConnection(url, results, state, timeout)
+            connection.send(payload, late_ms)
+        connection.wait(timeout)
+    finally:
+        if connection is not None:
+            connection.close()
+
+
+def _post(url: str, payload: dict, timeout: float):
+    req = urllib.request.Request(
+        url, data=Codec.dumps_bytes(payload),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, Codec.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, None
+
+
+def replay_http(base_url: str, turns: list, start: float, speed: float, timeout: float,
+                results: Results) -> None:
+    # HTTP turns carry their full state, so they run back to back per conversation.
+    for turn in turns:
+        late_ms = _sleep_until(start + (turn["started_at"] - turns[0]["started_at"]) / speed)
+        sent_at = time.monotonic()
+        is_async = turn["transport"] == "http_async"
+        try:
+            status, body = _post(base_url + "/chat" + ("?async=1" if is_async else ""),
+                                 turn["request"], timeout)
+            if is_async and status == 202:
+                status = _wait_for_job(base_url, body["job_id"], sent_at + timeout)
+            outcome = "ok" if status in (200, "done") else f"http_{status}"
+        except OSError as exc:
+            outcome = f"failed: {type(exc).__name__}"
+        results.add(turn["transport"], outcome, _ms_since(sent_at), late_ms=late_ms)
+
+
+def _wait_for_job(base_url: str, job_id: str, deadline: float):
+    while time.monotonic() < deadline:
+        with urllib.request.urlopen(f"{base_url}/jobs/{job_id}", timeout=10) as response:
+            status = Codec.loads(response.read())["status"]
+        if status in ("done", "failed"):
+            return status
+        time.sleep(JOB_POLL_SECONDS)
+    return "timeout"
+
+
+def run(conversations: list, base_url: str, speed: float, concurrency: int,
+        timeout: float) -> Results:
+    results = Results()
+    slots = threading.BoundedSemaphore(concurrency)
+    origin = conversations[0][0]["started_at"]
+    start = time.monotonic()
+
+    def drive(turns: list, conversation_start: float) -> None:
+        replay = replay_ws if turns[0]["transport"] == "ws" else replay_http
+        try:
+            replay(base_url, turns, conversation_start, speed, timeout, results)
+        except Exception as exc:
+            results.add(turns[0]["transport"], f"failed: {type(exc).__name__}")
+        finally:
+            slots.release()
+
+    threads = []
+    for turns in conversations:
+        _sleep_until(start + (turns[0]["started_at"] - origin) / speed)
+        slots.acquire()  # over --concurrency, later conversations start late
+        thread = threading.Thread(target=drive, args=(turns, time.monotonic()), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(results: Results, elapsed: float) -> None:
+    turns = results.turns
+    late = [turn["late_ms"] for turn in turns if turn["late_ms"] > 1]
+    print(f"{len(turns)} turns in {elapsed:.1f}s ({len(turns) / max(elapsed, 1e-9):.1f} turns/s)")
+    for outcome, count in Counter(turn["outcome"] for turn in turns).most_common():
+        print(f"  {outcome:<24}{count:>6}")
+    for label, key in (("turn latency", "latency_ms"), ("first frame", "first_frame_ms")):
+        values = [turn[key] for turn in turns if turn[key] is not None and turn["outcome"] == "ok"]
+        if values:
+            print(f"{label:<14} p50 {statistics.median(values):>8.0f} ms   "
+                  f"p95 {_percentile(values, 95):>8.0f} ms   p99 {_percentile(values, 99):>8.0f} ms")
+    if late:
+        print(f"sends behind schedule: {len(late)} (max {max(late):.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="JSONL written with CAPTURE_PATH")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Divide recorded gaps between turns and conversations by this")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Conversations in flight at once")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N conversations")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-turn timeout in seconds")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    conversations = load_conversations(args.capture)[:args.limit]
+    if not conversations:
+        sys.exit(f"{args.capture}: no captured turns")
+    print(f"replaying {len(conversations)} conversations "
+          f"({sum(len(turns) for turns in conversations)} turns) at {args.speed:g}x "
+          f"against {args.url}")
+    started = time.monotonic()
+    results = run(conversations, args.url.rstrip("/"), args.speed, args.concurrency, args.timeout)
+    report(results, time.monotonic() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from Common import RequestPriority
+from Orchestrator import Batch
+
+
+def test_batch_items_run_at_background_priority(monkeypatch):
+    seen = []
+
+    def fake_stream(message, *args, priority=RequestPriority.INTERACTIVE, **kwargs):
+        seen.append(priority)
+        yield {"type": "done"}
+
+    monkeypatch.setattr(Batch, "analyze_intents_stream", fake_stream)
+    results = list(Batch.run_batch([{"message": "Tokyo"}, {"message": "Kyoto"}]))
+    assert [entry["status"] for entry in results] == ["ok", "ok"]
+    assert seen == [RequestPriority.BACKGROUND, RequestPriority.BACKGROUND]
@@ -0,0 +1,54 @@
+import importlib.util
+import sys
+
+import pytest
+
+from Common import Codec
+
+SAMPLE = {"name": "Café Ladro", "rating": 4.5, "tags": ["coffee", None], "open": True}
+
+
+def _load_codec(monkeypatch, backend="auto", missing=()):
+    # A private copy, so the process-wide Codec module is left as it was.
+    monkeypatch.setenv("JSON_BACKEND", backend)
+    for name in missing:
+        monkeypatch.setitem(sys.modules, name, None)  # import raises ImportError
+    spec = importlib.util.spec_from_file_location("codec_under_test", Codec.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_falls_back_to_stdlib_without_optional_backends(monkeypatch):
+    codec = _load_codec(monkeypatch, missing=("orjson", "msgspec"))
+    assert codec.BACKEND == "stdlib"
+    assert codec.dumps(SAMPLE) == '{"name":"Café Ladro","rating":4.5,"tags":["coffee",null],"open":true}'
+
+
+def test_auto_prefers_msgspec_when_orjson_is_missing(monkeypatch):
+    pytest.importorskip("msgspec")
+    assert _load_codec(monkeypatch, missing=("orjson",)).BACKEND == "msgspec"
+
+
+def test_forcing_a_missing_backend_is_an_error(monkeypatch):
+    with pytest.raises(ValueError, match="JSON_BACKEND=orjson is not installed"):
+        _load_codec(monkeypatch, backend="orjson", missing=("orjson",))
+
+
+@pytest.mark.parametrize("backend", ["orjson", "msgspec", "stdlib"])
+def test_backends_agree(monkeypatch, backend):
+    if backend != "stdlib":
+        pytest.importorskip(backend)
+    codec = _load_codec(monkeypatch, backend=backend)
+    assert codec.BACKEND == backend
+    encoded = codec.dumps_bytes(SAMPLE)
+    assert codec.loads(encoded) == codec.loads(encoded.decode("utf-8")) == SAMPLE
+    assert codec.dumps(SAMPLE) == encoded.decode("utf-8")
+    assert codec.dumps_canonical(SAMPLE) == Codec.dumps_canonical(SAMPLE)
+    for bad in ("{not json", b"\xff\xfe", None):
+        with pytest.raises(codec.DecodeError):
+            codec.loads(bad)
+
+
+def test_canonical_encoding_is_sorted_ascii():
+    assert Codec.dumps_canonical({"b": 1, "a": "é"}) == '{"a":"\\u00e9","b":1}'
@@ -0,0 +1,46 @@
+import os
+import time
+
+from Cache import DiskCache
+from Cache.DiskCache import _SWEEP_EVERY
+
+
+def _files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def test_round_trip_and_expiry(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60)
+    cache.set("a", {"x": [1, 2]})
+    assert cache.get("a") == {"x": [1, 2]}
+    cache.set("b", "gone", ttl_seconds=-1)
+    assert cache.get("b") is None
+    assert _files(tmp_path) == ["a.json"]
+
+
+def test_sweep_removes_expired_entries_and_stale_temp_files(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60)
+    cache.set("live", 1)
+    cache.set("expired", 2, ttl_seconds=-1)
+    stale = tmp_path / "leftover.tmp"
+    stale.write_bytes(b"")
+    os.utime(stale, (time.time() - 7200, time.time() - 7200))
+    assert cache.sweep() == 1
+    assert _files(tmp_path) == ["live.json"]
+    assert not stale.exists()
+
+
+def test_sweep_caps_entries_oldest_first(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60, max_entries=2)
+    for idx, key in enumerate(("old", "mid", "new")):
+        cache.set(key, idx)
+        os.utime(tmp_path / f"{key}.json", (time.time() - 100 + idx, time.time() - 100 + idx))
+    assert cache.sweep() == 1
+    assert _files(tmp_path) == ["mid.json", "new.json"]
+
+
+def test_writes_trigger_a_sweep(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl_seconds=60, max_entries=10)
+    for idx in range(_SWEEP_EVERY):
+        cache.set(f"k{idx:04d}", idx)
+    assert len(_files(tmp_path)) == 10
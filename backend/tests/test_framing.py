@@ -0,0 +1,59 @@
+import zlib
+
+import pytest
+
+from Transport import FrameCodec, FrameDecoder, negotiate
+from Transport.Framing import SUPPORTED_ENCODINGS
+
+FRAMES = [
+    {"type": "pois", "data": [{"name": "Pike Place", "rating": 4.5, "tags": ["market"]}] * 5},
+    {"type": "pois", "data": [{"name": "Pike Place", "rating": 4.5, "tags": ["market"]}] * 6},
+    {"type": "done", "data": {"emoji": "☕", "blob": None, "ok": True}},
+]
+
+
+@pytest.mark.parametrize("encoding", SUPPORTED_ENCODINGS)
+@pytest.mark.parametrize("compression", [None, "deflate"])
+def test_frames_round_trip_in_order(encoding, compression):
+    codec = FrameCodec(encoding, compression)
+    decoder = FrameDecoder(encoding, compression)
+    for frame in FRAMES:
+        assert decoder.decode(codec.encode(frame)) == frame
+
+
+def test_plain_json_is_text_and_everything_else_binary():
+    assert isinstance(FrameCodec().encode(FRAMES[0]), str)
+    assert isinstance(FrameCodec("json", "deflate").encode(FRAMES[0]), bytes)
+    if "msgpack" in SUPPORTED_ENCODINGS:
+        assert isinstance(FrameCodec("msgpack").encode(FRAMES[0]), bytes)
+
+
+def test_deflate_keeps_context_across_frames():
+    codec = FrameCodec("json", "deflate")
+    first = codec.encode(FRAMES[0])
+    second = codec.encode(FRAMES[1])
+    # The repeated POIs are back-references into the previous frame's window.
+    assert len(second) < len(first)
+    fresh = FrameDecoder("json", "deflate")
+    with pytest.raises(zlib.error):
+        fresh.decode(second)
+
+
+def test_negotiate_picks_first_supported_choice():
+    assert negotiate(None) is None
+    codec = negotiate({"encoding": ["cbor", "json"], "compression": "deflate"})
+    assert codec.describe() == {"type": "framing", "encoding": "json", "compression": "deflate"}
+    codec = negotiate({"encoding": "cbor", "compression": ["brotli"]})
+    assert (codec.encoding, codec.compression) == ("json", None)
+
+
+def test_msgpack_is_preferred_when_installed():
+    pytest.importorskip("msgpack")
+    assert negotiate({"encoding": ["msgpack", "json"]}).encoding == "msgpack"
+
+
+def test_unsupported_framing_is_rejected():
+    with pytest.raises(ValueError):
+        FrameCodec("cbor")
+    with pytest.raises(ValueError):
+        FrameCodec("json", "brotli")
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from Cache import TieredCache
+from Common import RateLimitExceeded, RequestPriority
+from POI import ImageFetcher, ImageProxy
+
+
+def test_interactive_follower_retries_when_prefetch_leader_is_shed(monkeypatch):
+    leader_started = threading.Event()
+
+    def fake_search(location_name, api_key, per_page, page, extras, priority, cancel_token):
+        if priority == RequestPriority.PREFETCH:
+            leader_started.set()
+            time.sleep(0.2)
+            raise RateLimitExceeded("flickr: shed prefetch")
+        return {"urls": ["https://live.staticflickr.com/1/2_c.jpg"]}
+
+    monkeypatch.setattr(ImageFetcher, "_flickr_photo_search_urls", fake_search)
+    monkeypatch.setattr(ImageFetcher._image_search_cache, "get", lambda key: None)
+    name = f"shed-test-{time.time_ns()}"
+    results = {}
+
+    def call(label, priority):
+        try:
+            results[label] = ImageFetcher.flickr_photo_search(name, priority=priority)
+        except Exception as exc:
+            results[label] = exc
+
+    prefetch = threading.Thread(target=call, args=("prefetch", RequestPriority.PREFETCH))
+    prefetch.start()
+    leader_started.wait(1)
+    interactive = threading.Thread(target=call, args=("interactive", RequestPriority.INTERACTIVE))
+    interactive.start()
+    prefetch.join(2)
+    interactive.join(2)
+
+    assert isinstance(results["prefetch"], RateLimitExceeded)
+    assert results["interactive"] == {"urls": ["https://live.staticflickr.com/1/2_c.jpg"]}
+
+
+def _fresh_search_cache(monkeypatch):
+    cache = TieredCache("image_search_test", max_entries=16, ttl_seconds=60, shared=False)
+    monkeypatch.setattr(ImageFetcher, "_image_search_cache", cache)
+    monkeypatch.setattr(ImageFetcher, "prerender_variants", lambda urls: None)
+    return cache
+
+
+def _flickr_answer(monkeypatch, answer):
+    calls = []
+
+    def fake_internal(**kwargs):
+        calls.append(kwargs["location_name"])
+        return answer
+
+    monkeypatch.setattr(ImageFetcher, "flickr_photo_search_internal", fake_internal)
+    return calls
+
+
+def test_failed_search_is_raised_not_cached(monkeypatch):
+    cache = _fresh_search_cache(monkeypatch)
+    calls = _flickr_answer(monkeypatch, {"stat": "fail", "code": 100, "message": "Invalid API Key"})
+    with pytest.raises(ValueError, match="Invalid API Key"):
+        ImageFetcher.flickr_photo_search("Kyoto")
+    assert cache.get(ImageFetcher.image_search_cache_key("Kyoto")) is None
+    assert ImageFetcher.refresh_image_search("Kyoto") == []
+    assert calls == ["Kyoto", "Kyoto"]
+
+
+def test_empty_search_is_not_cached(monkeypatch):
+    cache = _fresh_search_cache(monkeypatch)
+    calls = _flickr_answer(monkeypatch, {"stat": "ok", "photos": {"photo": []}})
+    assert ImageFetcher.flickr_photo_search("Nowhere") == {"urls": []}
+    assert ImageFetcher.flickr_photo_search("Nowhere") == {"urls": []}
+    assert cache.get(ImageFetcher.image_search_cache_key("Nowhere")) is None
+    assert calls == ["Nowhere", "Nowhere"]
+
+
+def test_cached_urls_follow_the_proxy_setting(monkeypatch):
+    _fresh_search_cache(monkeypatch)
+    photo = {"server": "65535", "id": "123", "secret": "abcdef"}
+    calls = _flickr_answer(monkeypatch, {"stat": "ok", "photos": {"photo": [photo]}})
+    flickr = "https://live.staticflickr.com/65535/123_abcdef_c.jpg"
+
+    monkeypatch.setattr(ImageProxy, "IMAGE_PROXY_BASE_URL", "https://old.example")
+    assert ImageFetcher.flickr_photo_search("Osaka") == {
+        "urls": ["https://old.example/images/65535-123_abcdef_c"]}
+    monkeypatch.setattr(ImageProxy, "IMAGE_PROXY_BASE_URL", "")
+    assert ImageFetcher.flickr_photo_search("Osaka") == {"urls": [flickr]}
+    assert calls == ["Osaka"]
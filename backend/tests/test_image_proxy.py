@@ -0,0 +1,24 @@
+import app as backend
+
+IMAGE_ID = "65535-123_abcdef_c"
+
+
+def test_image_evicted_before_send_is_fetched_again(monkeypatch, tmp_path):
+    fresh = tmp_path / "fresh.jpg"
+    fresh.write_bytes(b"jpeg bytes")
+    paths = [str(tmp_path / "evicted.jpg"), str(fresh)]
+    monkeypatch.setattr(backend, "get_image_path", lambda image_id: paths.pop(0))
+    monkeypatch.setattr(backend, "schedule_variants", lambda image_id, path: None)
+
+    response = backend.app.test_client().get(f"/images/{IMAGE_ID}")
+    assert response.status_code == 200
+    assert response.data == b"jpeg bytes"
+    assert paths == []
+
+
+def test_image_evicted_twice_is_a_bad_gateway(monkeypatch, tmp_path):
+    monkeypatch.setattr(backend, "get_image_path", lambda image_id: str(tmp_path / "gone.jpg"))
+    monkeypatch.setattr(backend, "schedule_variants", lambda image_id, path: None)
+
+    response = backend.app.test_client().get(f"/images/{IMAGE_ID}")
+    assert response.status_code == 502
@@ -0,0 +1,86 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+import Cache.SharedTier as shared_tier_module
+from Common import OperationCancelled
+
+job_queue_module = importlib.import_module("Jobs.JobQueue")
+
+
+def _finalize(updates):
+    return {"frames": len(updates)}
+
+
+def _queues(monkeypatch, tmp_path):
+    # Two queues on one job directory stand in for two gunicorn workers.
+    monkeypatch.setattr(shared_tier_module, "CACHE_BACKEND", "disk")
+    monkeypatch.setattr(job_queue_module, "JOB_STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(job_queue_module, "JOB_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(job_queue_module, "JOB_CANCEL_POLL_SECONDS", 0.01)
+    return job_queue_module.JobQueue(workers=1), job_queue_module.JobQueue(workers=1)
+
+
+def test_other_worker_reads_status_and_frames(monkeypatch, tmp_path):
+    owner, other = _queues(monkeypatch, tmp_path)
+    job = owner.submit(lambda token: iter([{"type": "intents"}, {"type": "done"}]), _finalize)
+    assert job.updates_since(0, timeout=5)[0]
+    while not job.finished:
+        job.updates_since(len(job.updates), timeout=1)
+
+    remote = other.get(job.id)
+    assert isinstance(remote, job_queue_module.StoredJob)
+    assert remote.to_dict()["status"] == "done"
+    assert remote.to_dict()["result"] == {"frames": 2}
+    assert remote.updates_since(1, timeout=1) == ([{"type": "done"}], True)
+    assert other.get("missing") is None
+
+
+def test_cancel_from_other_worker_stops_running_job(monkeypatch, tmp_path):
+    owner, other = _queues(monkeypatch, tmp_path)
+    started = threading.Event()
+
+    def target(token):
+        yield {"type": "intents"}
+        started.set()
+        while True:
+            token.raise_if_cancelled()
+            time.sleep(0.01)
+
+    job = owner.submit(target, _finalize)
+    assert started.wait(5)
+    other.cancel(job.id)
+    remote = other.get(job.id)
+    updates, finished = [], False
+    for _ in range(500):
+        updates, finished = remote.updates_since(0, timeout=0.05)
+        if finished:
+            break
+    assert finished
+    assert job.status == "cancelled"
+    assert remote.to_dict()["status"] == "cancelled"
+    assert updates == [{"type": "intents"}]
+
+
+def test_cancel_while_queued_skips_the_job(monkeypatch, tmp_path):
+    owner, _ = _queues(monkeypatch, tmp_path)
+    release = threading.Event()
+    blocker = owner.submit(lambda token: iter([release.wait(5) and {"type": "done"}]), _finalize)
+    ran = []
+    queued = owner.submit(lambda token: ran.append(1) or iter([]), _finalize)
+    assert owner.cancel(queued.id).status == "cancelled"
+    release.set()
+    while not blocker.finished:
+        blocker.updates_since(len(blocker.updates), timeout=1)
+    owner.cancel(blocker.id)
+    assert blocker.status == "done"
+    assert ran == []
+
+
+def test_cancel_reaches_the_target_token():
+    job = job_queue_module.Job(lambda token: iter([]), _finalize)
+    job.cancel()
+    with pytest.raises(OperationCancelled):
+        job.cancel_token.raise_if_cancelled()
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from Common import CancelToken, OperationCancelled
+from POI import PlaceResolver
+from POI.POIModel import POIModel
+
+_PLACE = {"place_id": "p1", "lat": 35.0, "lng": 139.0, "address": "1 Street"}
+
+
+def _items(count):
+    return POIModel.from_json([
+        {"name": f"Spot {idx}", "description": "somewhere",
+         "geo_coordinate": {"lat": 35.0, "lng": 139.0}}
+        for idx in range(count)
+    ], require_images=False).items
+
+
+def _slow_lookups(monkeypatch, seconds):
+    executor = ThreadPoolExecutor(max_workers=4)
+    release = threading.Event()
+
+    def lookup():
+        release.wait(seconds)
+        return dict(_PLACE)
+
+    monkeypatch.setattr(PlaceResolver, "resolver_enabled", lambda: True)
+    monkeypatch.setattr(
+        PlaceResolver, "start_place_resolution", lambda item, destination=None: executor.submit(lookup))
+    return release
+
+
+def test_resolve_places_without_token_waits_for_every_lookup(monkeypatch):
+    _slow_lookups(monkeypatch, 0.05)
+    items = _items(2)
+    assert PlaceResolver.resolve_places(items, "Tokyo") == 2
+    assert [item.poi.place_id for item in items] == ["p1", "p1"]
+
+
+def test_resolve_places_stops_at_the_deadline(monkeypatch):
+    release = _slow_lookups(monkeypatch, 5)
+    items = _items(3)
+    started = time.monotonic()
+    assert PlaceResolver.resolve_places(items, "Tokyo", CancelToken(0.2)) == 0
+    assert time.monotonic() - started < 1
+    assert all(item.poi.place_id is None for item in items)
+    release.set()
+
+
+def test_resolve_places_raises_when_cancelled(monkeypatch):
+    release = _slow_lookups(monkeypatch, 5)
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+    with pytest.raises(OperationCancelled):
+        PlaceResolver.resolve_places(_items(2), "Tokyo", token)
+    release.set()
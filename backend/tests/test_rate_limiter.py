@@ -0,0 +1,27 @@
+import threading
+import time
+
+import pytest
+
+from Common import CancelToken, RateLimitExceeded, RequestPriority
+from Common.RateLimiter import UpstreamLimiter
+
+
+def test_shed_on_enqueue_unregisters_cancel_callback():
+    limiter = UpstreamLimiter("test_shed", requests_per_second=100, max_concurrency=1, max_queue=1)
+    granted = []
+
+    def queued():
+        with limiter.acquire(timeout=5):
+            granted.append(1)
+
+    with limiter.acquire():
+        waiter = threading.Thread(target=queued)
+        waiter.start()
+        time.sleep(0.1)  # The interactive waiter now fills the queue
+        token = CancelToken(10)
+        with pytest.raises(RateLimitExceeded):
+            limiter.acquire(priority=RequestPriority.PREFETCH, cancel_token=token)
+        assert token._callbacks == []
+    waiter.join(2)
+    assert granted == [1]
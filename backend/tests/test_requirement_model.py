@@ -0,0 +1,151 @@
+import pytest
+
+from Planner.RequirementModel import (
+    Priority,
+    RequirementModel,
+    extract_constraints,
+    normalize_description,
+)
+
+
+def _model(*descriptions, priority="preferred"):
+    return RequirementModel.from_json(
+        [{"description": description, "priority": priority} for description in descriptions])
+
+
+def _descriptions(model):
+    return _descriptions_of(model.items)
+
+
+def _descriptions_of(items):
+    return [item.description for item in items]
+
+
+def test_remove_does_not_match_inside_words_or_small_parts():
+    model = _model("3 day trip", "Daytime only", "Avoid staying in hostels")
+    assert model.remove("day") == []
+    assert _descriptions(model) == ["3 day trip", "Daytime only", "Avoid staying in hostels"]
+
+
+@pytest.mark.parametrize("needle, left", [
+    ("3 day trip", ["Daytime only", "Avoid staying in hostels"]),
+    ("3-Day trip!", ["Daytime only", "Avoid staying in hostels"]),
+    ("hostels", ["3 day trip", "Daytime only"]),
+    ("daytime", ["3 day trip", "Avoid staying in hostels"]),
+])
+def test_remove_exact_and_fuzzy(needle, left):
+    model = _model("3 day trip", "Daytime only", "Avoid staying in hostels")
+    model.remove(needle)
+    assert _descriptions(model) == left
+
+
+def test_remove_by_constraint_kind():
+    model = _model("Budget under $3000", "Prefer beaches")
+    model.remove("the budget limit")
+    assert _descriptions(model) == ["Prefer beaches"]
+
+
+def test_add_skips_duplicates_and_rewordings():
+    model = _model("Budget under $3000", priority="must_have")
+    assert not model.add("budget under $3,000")
+    assert not model.add("under $3000")
+    assert _descriptions(model) == ["Budget under $3000"]
+    assert model.items[0].priority == Priority.MUST_HAVE
+
+
+def test_add_replaces_a_different_budget_or_length():
+    model = _model("Budget under $3000", "3 day trip", "Prefer beaches", priority="must_have")
+    assert model.add("under $5000")
+    assert model.add("5 day trip")
+    assert _descriptions(model) == ["under $5000", "5 day trip", "Prefer beaches"]
+    # The replacement keeps its own priority.
+    assert [item.priority for item in model.items] == [
+        Priority.PREFERRED, Priority.PREFERRED, Priority.MUST_HAVE]
+    assert model.constraints().budget_amount == 5000
+    assert model.constraints().duration_days == 5
+
+
+def test_add_keeps_scoped_amounts_next_to_the_trip_total():
+    model = _model("Total budget $3000", "3 day trip", priority="must_have")
+    assert model.add("Flights under $800")
+    assert model.add("Spend 2 days in Kyoto")
+    assert _descriptions(model) == [
+        "Total budget $3000", "3 day trip", "Flights under $800", "Spend 2 days in Kyoto"]
+    assert model.constraints().budget_amount == 3000
+    assert model.constraints().duration_days == 3
+
+
+def test_add_does_not_touch_the_source_model():
+    model = _model("Budget under $3000", priority="must_have")
+    updated = RequirementModel.add_requirement(model, "under $5000")
+    assert _descriptions(updated) == ["under $5000"]
+    assert _descriptions(model) == ["Budget under $3000"]
+    assert model.items[0].priority == Priority.MUST_HAVE
+    assert updated.items[0].priority == Priority.PREFERRED
+
+
+def test_from_json_never_replaces():
+    model = RequirementModel.from_json([
+        {"description": "Total budget $3000", "priority": "must_have"},
+        {"description": "Flights under $800"},
+    ])
+    assert [(item.description, item.priority) for item in model.items] == [
+        ("Total budget $3000", Priority.MUST_HAVE), ("Flights under $800", Priority.PREFERRED)]
+    assert model.constraints().budget_amount == 3000
+
+    model = _model("3 day trip", "Spend 2 days in Kyoto")
+    assert _descriptions(model) == ["3 day trip", "Spend 2 days in Kyoto"]
+    assert model.constraints().duration_days == 3
+
+    model = _model("Budget under $3000", "under 4000 euros")
+    assert _descriptions(model) == ["Budget under $3000", "under 4000 euros"]
+    assert model.constraints().budget_amount == 4000
+
+
+def test_scoped_amount_counts_when_nothing_else_sets_it():
+    assert _model("2 weeks in Japan").constraints().duration_days == 14
+
+
+def test_remove_by_a_specific_word():
+    model = _model("Must visit at least one national park", "3 day trip")
+    assert _descriptions_of(model.remove("park")) == ["Must visit at least one national park"]
+    assert _descriptions(model) == ["3 day trip"]
+
+
+def test_avoid_requirements_do_not_replace_the_budget():
+    model = _model("Budget under $3000")
+    model.add("restaurants over $200", Priority.AVOID)
+    assert len(model.items) == 2
+    assert model.constraints().budget_amount == 3000
+
+
+def test_static_helpers_leave_the_original_untouched():
+    model = _model("3 day trip")
+    assert _descriptions(RequirementModel.remove_requirement(model, "3 day trip")) == []
+    assert _descriptions(RequirementModel.add_requirement(model, "Prefer beaches")) == [
+        "3 day trip", "Prefer beaches"]
+    assert _descriptions(model) == ["3 day trip"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Budget under $3,000", {"budget_amount": 3000.0, "budget_currency": "USD"}),
+    ("€1.5k max", {"budget_amount": 1500.0, "budget_currency": "EUR"}),
+    ("spend at most 2000 euros", {"budget_amount": 2000.0, "budget_currency": "EUR"}),
+    ("100 USD per day", {}),
+    ("$80/night hotels, $2000 total", {"budget_amount": 2000.0, "budget_currency": "USD"}),
+    ("daily budget of $100", {}),
+    ("£40 pp for dinner", {}),
+    ("2 weeks in Japan", {"duration_days": 14}),
+    ("4 nights", {"duration_days": 5}),
+    ("a two-week trip", {"duration_days": 14}),
+    ("a day at the beach", {}),
+    ("stone day bridge", {}),
+    ("travel 2025-03-14 to 2025-03-20", {"dates": ["2025-03-14", "2025-03-20"]}),
+    ("arrive March 3rd, 2026, leave 10 march", {"dates": ["2026-03-03", "--03-10"]}),
+])
+def test_extract_constraints(text, expected):
+    assert extract_constraints(text).to_dict() == expected
+
+
+def test_normalize_description():
+    assert normalize_description("  Budget under $3,000!! ") == "budget under $3000"
@@ -0,0 +1,81 @@
+import pytest
+
+from Transport import SendQueue, SendQueueClosed
+
+
+def _images(name, version=None):
+    frame = {"type": "poi_images", "data": {"name": name, "images": [f"{name}.jpg"]}}
+    if version is not None:
+        frame.update(base_version=version - 1, version=version)
+    return frame
+
+
+def _drain(queue, sent):
+    queue.start()
+    queue.close(timeout=2)
+    return sent
+
+
+def _queue(**kwargs):
+    sent = []
+    return SendQueue(sent.append, encode=lambda frame: frame, **kwargs), sent
+
+
+def test_newer_snapshot_replaces_queued_one_in_place():
+    queue, sent = _queue()
+    queue.put({"type": "pois", "data": [{"name": "a"}]})
+    queue.put(_images("a"))
+    queue.put({"type": "pois", "data": [{"name": "a"}, {"name": "b"}]})
+    assert queue.depth() == 2
+    assert _drain(queue, sent) == [
+        {"type": "pois", "data": [{"name": "a"}, {"name": "b"}]},
+        _images("a"),
+    ]
+
+
+def test_full_queue_folds_images_into_the_pois_snapshot():
+    queue, sent = _queue(max_frames=3)
+    queue.put({"type": "pois", "data": [{"name": "a"}, {"name": "b"}]})
+    queue.put(_images("a"))
+    queue.put(_images("missing"))
+    queue.put({"type": "plan", "data": {}})
+    assert _drain(queue, sent) == [
+        {"type": "pois", "data": [{"name": "a", "images": ["a.jpg"]}, {"name": "b"}]},
+        _images("missing"),
+        {"type": "plan", "data": {}},
+    ]
+
+
+def test_full_queue_merges_leftover_images_into_one_batch():
+    queue, sent = _queue(max_frames=3, batch_images=True)
+    queue.put({"type": "intents", "data": []})
+    queue.put(_images("a"))
+    queue.put(_images("b"))
+    queue.put({"type": "plan", "data": {}})
+    assert _drain(queue, sent) == [
+        {"type": "intents", "data": []},
+        {"type": "poi_images_batch", "data": [_images("a")["data"], _images("b")["data"]]},
+        {"type": "plan", "data": {}},
+    ]
+
+
+def test_writer_batches_consecutive_versioned_images():
+    queue, sent = _queue(batch_images=True)
+    queue.put(_images("a", version=2))
+    queue.put(_images("b", version=3))
+    queue.put({"type": "plan", "data": {}})
+    assert _drain(queue, sent) == [
+        {"type": "poi_images_batch", "data": [_images("a")["data"], _images("b")["data"]],
+         "base_version": 1, "version": 3},
+        {"type": "plan", "data": {}},
+    ]
+
+
+def test_versioned_frames_are_never_folded_and_a_full_queue_stalls():
+    queue, sent = _queue(max_frames=2, put_timeout=0.05)
+    queue.put({"type": "pois", "data": [{"name": "a"}], "version": 1})
+    queue.put(_images("a", version=2))
+    with pytest.raises(SendQueueClosed):
+        queue.put({"type": "plan", "data": {}})
+    assert queue.stalled
+    assert queue.depth() == 2
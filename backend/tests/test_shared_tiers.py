@@ -0,0 +1,93 @@
+import importlib.util
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from Cache import RedisCache, SQLiteCache
+from Cache.SQLiteCache import _PRUNE_EVERY
+
+_STANDIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "redis_standin.py")
+_spec = importlib.util.spec_from_file_location("redis_standin", _STANDIN_PATH)
+redis_standin = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(redis_standin)
+
+
+@pytest.fixture
+def redis_url():
+    server = redis_standin.ThreadingRespServer(("127.0.0.1", 0), redis_standin.RespHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    redis_standin._store.clear()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "shared.sqlite3")
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_tier(request, tmp_path):
+    """Factory for tiers that share one backing store, like two worker processes."""
+    if request.param == "sqlite":
+        path = str(tmp_path / "shared.sqlite3")
+        return lambda namespace, ttl_seconds=None: SQLiteCache(path, namespace, ttl_seconds)
+    url = request.getfixturevalue("redis_url")
+    return lambda namespace, ttl_seconds=None: RedisCache(url, namespace, ttl_seconds)
+
+
+def test_entries_are_visible_to_other_instances(make_tier):
+    writer, reader = make_tier("places"), make_tier("places")
+    writer.set("seattle", {"lat": 47.6, "names": ["Seattle", "Sea"]})
+    assert reader.get("seattle") == {"lat": 47.6, "names": ["Seattle", "Sea"]}
+    reader.delete("seattle")
+    assert writer.get("seattle") is None
+    assert writer.get("seattle", "default") == "default"
+
+
+def test_entries_expire(make_tier):
+    tier = make_tier("places", ttl_seconds=60)
+    tier.set("stale", 1, ttl_seconds=0.05)
+    tier.set("fresh", 2)
+    time.sleep(0.1)
+    assert tier.get("stale") is None
+    assert tier.get("fresh") == 2
+
+
+def test_clear_only_touches_its_namespace(make_tier):
+    places, plans = make_tier("places"), make_tier("plans")
+    for idx in range(3):
+        places.set(f"k{idx}", idx)
+    plans.set("k0", "kept")
+    places.clear()
+    assert [places.get(f"k{idx}") for idx in range(3)] == [None, None, None]
+    assert plans.get("k0") == "kept"
+
+
+def test_sqlite_prunes_expired_rows(sqlite_path):
+    tier = SQLiteCache(sqlite_path, "places", ttl_seconds=60)
+    tier.set("expired", 1, ttl_seconds=-1)
+    for idx in range(_PRUNE_EVERY - 1):
+        tier.set(f"k{idx}", idx)
+    rows = tier._connection().execute("SELECT key FROM cache_entries WHERE key = 'expired'").fetchall()
+    assert rows == []
+
+
+def test_redis_outage_reads_as_a_miss():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    tier = RedisCache(f"redis://127.0.0.1:{port}/0", "places", timeout=0.2)
+    tier.set("k", 1)
+    assert tier.get("k") is None
+    assert tier._down_until > time.monotonic()
+
+
+def test_redis_url_is_validated():
+    with pytest.raises(ValueError, match="invalid_redis_url"):
+        RedisCache("http://127.0.0.1:6379", "places")
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from Common import CancelToken, DeadlineExceeded, RateLimitExceeded, SingleFlight, metrics
+
+
+def _start_caller(flight, key, fn, cancel_token, results):
+    def follow():
+        try:
+            results.append(flight.do(key, fn, cancel_token=cancel_token))
+        except BaseException as exc:
+            results.append(exc)
+
+    thread = threading.Thread(target=follow)
+    thread.start()
+    return thread
+
+
+def _leader_then_follower(leader_error, leader_token, follower_token, name="test"):
+    flight = SingleFlight(name)
+    leader_started = threading.Event()
+    calls = []
+
+    def leader_fn():
+        calls.append("leader")
+        leader_started.set()
+        time.sleep(0.3)
+        raise leader_error
+
+    def follower_fn():
+        calls.append("follower")
+        return "fresh"
+
+    leader_results, results = [], []
+    leader = _start_caller(flight, "key", leader_fn, leader_token, leader_results)
+    leader_started.wait(1)
+    follower = _start_caller(flight, "key", follower_fn, follower_token, results)
+    leader.join(2)
+    follower.join(2)
+    assert leader_results == [leader_error]
+    return calls, results
+
+
+def test_follower_retries_when_leader_runs_out_of_time():
+    calls, results = _leader_then_follower(
+        DeadlineExceeded("turn_deadline_exceeded"), CancelToken(0.2), CancelToken(100))
+    assert calls == ["leader", "follower"]
+    assert results == ["fresh"]
+
+
+def test_follower_retries_when_leader_upstream_times_out_past_its_deadline():
+    # e.g. the OpenAI client's own timeout, sized from the leader's budget
+    calls, results = _leader_then_follower(
+        TimeoutError("Request timed out."), CancelToken(0.2), CancelToken(100))
+    assert results == ["fresh"]
+
+
+def test_follower_retries_when_leader_is_shed():
+    calls, results = _leader_then_follower(
+        RateLimitExceeded("shed"), CancelToken(100), CancelToken(100))
+    assert results == ["fresh"]
+
+
+def test_follower_shares_a_genuine_failure():
+    calls, results = _leader_then_follower(
+        ValueError("bad request"), CancelToken(100), None, name="test_shared_error")
+    assert calls == ["leader"]
+    assert isinstance(results[0], ValueError)
+    assert metrics.counter("singleflight.test_shared_error.shared") == 1
+
+
+def test_retried_follower_is_not_counted_as_shared():
+    _leader_then_follower(
+        RateLimitExceeded("shed"), CancelToken(100), CancelToken(100), name="test_retried")
+    assert metrics.counter("singleflight.test_retried.retried") == 1
+    assert metrics.counter("singleflight.test_retried.shared") == 0
+    assert metrics.counter("singleflight.test_retried.executed") == 2
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(1)
+        return "shared"
+
+    results = []
+    threads = [_start_caller(flight, "key", fn, None, results) for _ in range(4)]
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert calls == [1]
+    assert results == ["shared"] * 4
@@ -0,0 +1,95 @@
+import importlib.util
+import os
+
+import pytest
+
+from Transport.StateDelta import DeltaEncoder, poi_id
+
+pytest.importorskip("websocket")  # cli.py's own dependency
+_CLI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cli.py")
+_spec = importlib.util.spec_from_file_location("cli", _CLI_PATH)
+cli = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(cli)
+
+
+def _strip_ids(items):
+    return [{key: value for key, value in item.items() if key != "id"} for item in items]
+
+
+def _client_apply(client, frame):
+    """What cli.py does with each protocol-2 frame."""
+    kind = frame["type"]
+    if kind in ("pois", "requirements", "plan"):
+        client[kind] = frame["data"]
+    elif kind == "pois_delta":
+        client["pois"] = cli.apply_list_delta(client["pois"], frame)
+    elif kind == "requirements_delta":
+        client["requirements"] = cli.apply_list_delta(client["requirements"], frame)
+    elif kind == "plan_delta":
+        client["plan"] = cli.apply_plan_delta(client["plan"], frame)
+    if "version" in frame:
+        assert frame.get("base_version", client["version"]) == client["version"]
+        client["version"] = frame["version"]
+
+
+def _state():
+    return {"version": 0, "pois": [], "requirements": [], "plan": []}
+
+
+POI_SNAPSHOTS = [
+    [{"name": "Pike Place", "rating": 4.5}, {"name": "Space Needle"}],
+    [{"name": "Space Needle"}, {"name": "Pike Place", "rating": 4.7}, {"name": "MoPOP"}],
+    [{"name": "MoPOP", "images": ["m.jpg"]}],
+    [],
+]
+
+PLAN_SNAPSHOTS = [
+    [{"title": "A", "days": [{"stops": ["Pike Place"]}, {"stops": ["Space Needle"]}]}],
+    [
+        {"title": "A", "days": [{"stops": ["Pike Place", "MoPOP"]}]},
+        {"title": "B", "days": [{"stops": ["MoPOP"]}]},
+    ],
+    [{"title": "A2", "note": "rainy", "days": [{"stops": ["Pike Place", "MoPOP"]}, {"stops": []}]}],
+    [{"title": "A2", "days": [{"stops": []}]}],
+]
+
+
+def test_poi_and_requirement_deltas_round_trip_through_the_cli():
+    encoder, client = DeltaEncoder("s", _state(), in_sync=False), _state()
+    requirements = [{"description": "budget 500"}, {"description": "no museums"}]
+    for pois in POI_SNAPSHOTS:
+        _client_apply(client, encoder.encode({"type": "pois", "data": pois}))
+        assert _strip_ids(client["pois"]) == pois
+        assert [item["id"] for item in client["pois"]] == [poi_id(poi) for poi in pois]
+        _client_apply(client, encoder.encode({"type": "requirements", "data": requirements}))
+        assert _strip_ids(client["requirements"]) == requirements
+        requirements = requirements[1:] + [{"description": f"extra {len(client['pois'])}"}]
+    assert client["version"] == encoder.state["version"] == 2 * len(POI_SNAPSHOTS)
+
+
+def test_plan_deltas_round_trip_through_the_cli():
+    encoder, client = DeltaEncoder("s", _state(), in_sync=False), _state()
+    for plan in PLAN_SNAPSHOTS:
+        frame = encoder.encode({"type": "plan", "data": plan})
+        _client_apply(client, frame)
+        assert client["plan"] == plan
+    assert frame["type"] == "plan_delta"
+
+
+def test_in_sync_session_starts_with_deltas():
+    state = _state()
+    state.update(version=7, pois=[{"name": "Pike Place"}])
+    encoder = DeltaEncoder("s", state, in_sync=True)
+    client = {**_state(), "version": 7, "pois": [{"name": "Pike Place", "id": poi_id({"name": "Pike Place"})}]}
+    frame = encoder.encode({"type": "pois", "data": [{"name": "Pike Place"}, {"name": "MoPOP"}]})
+    assert frame["type"] == "pois_delta" and frame["base_version"] == 7
+    _client_apply(client, frame)
+    assert _strip_ids(client["pois"]) == [{"name": "Pike Place"}, {"name": "MoPOP"}]
+
+
+def test_images_frame_updates_encoder_state():
+    encoder = DeltaEncoder("s", _state(), in_sync=False)
+    encoder.encode({"type": "pois", "data": [{"name": "MoPOP"}]})
+    frame = encoder.encode({"type": "poi_images", "data": {"name": "MoPOP", "images": ["m.jpg"]}})
+    assert (frame["base_version"], frame["version"]) == (1, 2)
+    assert encoder.state["pois"] == [{"name": "MoPOP", "images": ["m.jpg"]}]
@@ -0,0 +1,33 @@
+import multiprocessing
+
+from POI import Thumbnails
+
+
+class _Recorder:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+
+    def contains(self, key):
+        return False
+
+
+def test_prerender_is_capped_per_search(monkeypatch):
+    recorder = _Recorder()
+    monkeypatch.setattr(Thumbnails, "THUMBNAILS_ENABLED", True)
+    monkeypatch.setattr(Thumbnails, "THUMBNAIL_PRERENDER", True)
+    monkeypatch.setattr(Thumbnails, "THUMBNAIL_PRERENDER_PER_SEARCH", 2)
+    monkeypatch.setattr(Thumbnails, "get_image_cache", lambda: recorder)
+    monkeypatch.setattr(Thumbnails, "image_id_from_proxy_url", lambda url: url)
+    monkeypatch.setattr(Thumbnails, "_prerender_executor", recorder)
+    monkeypatch.setattr(Thumbnails, "_prerendering", set())
+
+    Thumbnails.prerender_variants([f"img-{idx}" for idx in range(10)])
+    assert recorder.submitted == [("img-0",), ("img-1",)]
+
+
+def test_render_workers_are_not_forked():
+    assert Thumbnails.THUMBNAIL_START_METHOD in ("forkserver", "spawn")
+    assert Thumbnails.THUMBNAIL_START_METHOD in multiprocessing.get_all_start_methods()